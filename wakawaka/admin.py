@@ -1,18 +1,60 @@
+from typing import Any
+
+from django import forms
 from django.contrib import admin
+from django.forms import ModelForm
+from django.http import HttpRequest
+from django.utils.translation import gettext_lazy as _
 
 from wakawaka.models import Revision, WikiPage
 
 
+class RevisionAdminForm(forms.ModelForm):
+    """
+    Edits the full content of a revision, independent of how it's stored.
+    """
+
+    content = forms.CharField(label=_("Content"), widget=forms.Textarea)
+
+    class Meta:
+        model = Revision
+        fields = ("page", "content", "message", "creator", "creator_ip")
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.initial.setdefault("content", self.instance.content)
+
+    def save(self, commit: bool = True) -> Revision:
+        if "content" in self.changed_data or not self.instance.pk:
+            self.instance.content = self.cleaned_data["content"]
+        return super().save(commit=commit)
+
+
 class RevisionInlines(admin.TabularInline):
     model = Revision
+    form = RevisionAdminForm
     extra = 1
 
 
 @admin.register(WikiPage)
 class WikiPageAdmin(admin.ModelAdmin):
     inlines = (RevisionInlines,)
+    exclude = ("current_revision",)
+
+    def save_related(self, request: HttpRequest, form: ModelForm, *args: Any) -> None:
+        super().save_related(request, form, *args)
+        form.instance.update_current_revision()
 
 
 @admin.register(Revision)
 class RevisionAdmin(admin.ModelAdmin):
-    pass
+    form = RevisionAdminForm
+
+    def save_model(self, request: HttpRequest, obj: Revision, *args: Any) -> None:
+        super().save_model(request, obj, *args)
+        obj.page.update_current_revision()
+
+    def delete_model(self, request: HttpRequest, obj: Revision) -> None:
+        super().delete_model(request, obj)
+        obj.page.update_current_revision()
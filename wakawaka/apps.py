@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class WakawakaConfig(AppConfig):
+    name = "wakawaka"
+    default_auto_field = "django.db.models.AutoField"
+
+    def ready(self) -> None:
+        from wakawaka import signals  # noqa: F401 PLC0415 - Connects the signal receivers
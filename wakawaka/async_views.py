@@ -0,0 +1,199 @@
+"""
+Async versions of the read-only views, used instead of the views in
+`wakawaka.views` if `WAKAWAKA_ASYNC_VIEWS` is True.
+
+Under ASGI, a sync view runs in a thread for the whole request. These views
+look up pages and revisions with the async ORM instead, running independent
+lookups concurrently, and only render content and diffs in a thread, since
+these use the render cache and further queries. Listings are rendered right
+away, as all their objects are fetched beforehand.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import django
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseBadRequest
+
+from wakawaka import hierarchy, metrics, views
+from wakawaka.models import Revision, WikiPage
+from wakawaka.pagination import apaginate
+
+if TYPE_CHECKING:
+    from django.db.models import QuerySet
+
+
+async def resolve_user(request: HttpRequest) -> None:
+    """
+    Loads the user of the request with the async ORM, so `request.user` can
+    be used without a query later on. Before Django 5.0, which added
+    `request.auser()`, the user is loaded in a thread.
+    """
+    if django.VERSION >= (5, 0):
+        request.user = await request.auser()
+    else:
+        request.user = await sync_to_async(get_user)(request)
+
+
+def page_history(slug: str) -> QuerySet:
+    """
+    Returns the history of the page with the given slug, which can be
+    fetched along with the page rather than after it.
+    """
+    return views.history_queryset(Revision.objects.filter(page__slug=slug))
+
+
+@metrics.instrument
+async def page(
+    request: HttpRequest,
+    slug: str,
+    rev_id: int | None = None,
+    template_name: str = "wakawaka/page.html",
+    extra_context: dict | None = None,
+) -> HttpResponse:
+    """
+    Displays a wiki page. Redirects to the edit view if the page doesn't exist.
+    """
+    await resolve_user(request)
+    try:
+        with metrics.timer("lookup"):
+            queryset = WikiPage.objects.select_related("current_revision__creator")
+            lookups = [queryset.aget(slug=slug)]
+            if rev_id:
+                revisions = Revision.objects.filter(page__slug=slug)
+                lookups.append(revisions.aget(pk=rev_id))
+            results = await asyncio.gather(*lookups, return_exceptions=True)
+            if isinstance(results[0], BaseException):
+                raise results[0]
+            page = results[0]
+            if page.current_revision_id is None:
+                page.current_revision = await page.revisions.alatest()
+            rev = page.current_revision
+
+            # Display an older revision if rev_id is given
+            if rev_id:
+                rev_specific = results[1]
+                if isinstance(rev_specific, Revision.DoesNotExist):
+                    raise Http404 from rev_specific
+                if isinstance(rev_specific, BaseException):
+                    raise rev_specific
+                if rev.pk != rev_specific.pk:
+                    rev_specific.is_not_current = True
+                rev = rev_specific
+
+    # The Page does not exist (or has no revision yet), redirect to the edit
+    # form or deny, if the user has no permission to add pages
+    except (WikiPage.DoesNotExist, Revision.DoesNotExist) as e:
+        return views.missing_page_response(request, slug, e)
+
+    return await sync_to_async(views.page_response)(
+        request, page, rev, template_name, extra_context
+    )
+
+
+@metrics.instrument
+async def revisions(
+    request: HttpRequest,
+    slug: str,
+    template_name: str = "wakawaka/revisions.html",
+    extra_context: dict | None = None,
+    paginate_by: int | None = None,
+) -> HttpResponse:
+    """
+    Displays the list of all revisions for a specific WikiPage
+    """
+    await resolve_user(request)
+    page, pagination = await asyncio.gather(
+        WikiPage.objects.filter(slug=slug).afirst(),
+        apaginate(request, page_history(slug), paginate_by),
+    )
+    if page is None:
+        raise Http404
+    return views.revisions_response(
+        request, page, pagination, template_name, extra_context
+    )
+
+
+@metrics.instrument
+async def changes(
+    request: HttpRequest,
+    slug: str,
+    template_name: str = "wakawaka/changes.html",
+    extra_context: dict | None = None,
+) -> HttpResponse:
+    """
+    Displays the changes between two revisions.
+    """
+    await resolve_user(request)
+    try:
+        rev_a_id, rev_b_id = int(request.GET["a"]), int(request.GET["b"])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest("Bad Request")
+
+    # Fetch both revisions with their page, and only if they belong to the
+    # page in the URL, along with the history of that page.
+    queryset = Revision.objects.select_related("page").filter(
+        page__slug=slug, pk__in=(rev_a_id, rev_b_id)
+    )
+    revisions, pagination = await asyncio.gather(
+        queryset.ain_bulk(), apaginate(request, page_history(slug))
+    )
+    if rev_a_id not in revisions or rev_b_id not in revisions:
+        raise Http404
+
+    # The diff is computed by the diff engine, and cached.
+    return await sync_to_async(views.changes_response)(
+        request,
+        revisions[rev_a_id],
+        revisions[rev_b_id],
+        pagination,
+        template_name=template_name,
+        extra_context=extra_context,
+    )
+
+
+@metrics.instrument
+async def revision_list(
+    request: HttpRequest,
+    template_name: str = "wakawaka/revision_list.html",
+    extra_context: dict | None = None,
+    paginate_by: int | None = None,
+) -> HttpResponse:
+    """
+    Displays a list of all recent revisions.
+    """
+    await resolve_user(request)
+    queryset = views.history_queryset(Revision.objects.select_related("page"))
+    pagination = await apaginate(request, queryset, paginate_by)
+    template_context = {
+        "revision_list": pagination.object_list,
+        "pagination": pagination,
+    }
+    template_context.update(extra_context or {})
+    return views.render_template(request, template_name, template_context)
+
+
+@metrics.instrument
+async def page_list(
+    request: HttpRequest,
+    template_name: str = "wakawaka/page_list.html",
+    extra_context: dict | None = None,
+) -> HttpResponse:
+    """
+    Displays all Pages, one level of the page hierarchy at a time.
+    """
+    await resolve_user(request)
+    path, letter, after = views.index_params(request)
+    per_page = hierarchy.get_per_page()
+    queryset = hierarchy.children(path, letter, after)[: per_page + 1]
+    nodes = [node async for node in queryset]
+    buckets = []
+    if letter or len(nodes) > per_page:
+        buckets = [bucket async for bucket in hierarchy.buckets(path)]
+    return views.page_list_response(
+        request, nodes, buckets, template_name, extra_context
+    )
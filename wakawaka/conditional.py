@@ -0,0 +1,88 @@
+"""
+Conditional GET support for the views.
+
+The validators of a response are derived from cheap metadata, like the pk
+and modification time of revisions, before any content is loaded or
+rendered. A request whose `If-None-Match` or `If-Modified-Since` header
+matches gets a 304 response right away.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import TYPE_CHECKING, Any
+
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.translation import get_language
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from django.http import HttpRequest, HttpResponse
+
+    from wakawaka.models import Revision
+
+
+def make_etag(request: HttpRequest, *parts: Any) -> str:
+    """
+    Returns a strong ETag for the given parts, which also depends on the
+    user and language the response is rendered for.
+    """
+    user = getattr(request, "user", None)
+    value = "|".join(str(part) for part in (*parts, user and user.pk, get_language()))
+    return f'"{hashlib.sha256(value.encode()).hexdigest()}"'
+
+
+def revision_metadata(revisions: Iterable[Revision]) -> list[tuple]:
+    """
+    Returns the metadata of the given revisions which a history listing
+    depends on.
+    """
+    return [
+        (
+            rev.pk,
+            rev.modified.timestamp(),
+            rev.creator_id,
+            rev.size_delta,
+            rev.lines_added,
+            rev.lines_removed,
+        )
+        for rev in revisions
+    ]
+
+
+def has_pending_messages(request: HttpRequest) -> bool:
+    """
+    Returns True if the response displays messages, which are only shown
+    once. Such responses must not be validated.
+    """
+    return len(get_messages(request)) > 0
+
+
+def get_not_modified_response(
+    request: HttpRequest, etag: str, last_modified: float
+) -> HttpResponse | None:
+    """
+    Returns a 304 response if the client's cached copy is still valid,
+    otherwise None.
+    """
+    if request.method not in ("GET", "HEAD") or has_pending_messages(request):
+        return None
+    return get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified)
+    )
+
+
+def set_validators(
+    request: HttpRequest, response: HttpResponse, etag: str, last_modified: float
+) -> HttpResponse:
+    """
+    Sets the `ETag` and `Last-Modified` headers of the given response, unless
+    it displays messages.
+    """
+    if not has_pending_messages(request):
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(int(last_modified))
+    return response
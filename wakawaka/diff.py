@@ -0,0 +1,268 @@
+"""
+Diffs between revisions.
+
+The exact diff is computed by the engine set in `WAKAWAKA_DIFF_ENGINE`,
+either in the request thread or in a worker process with a time budget.
+Revisions too large for an exact diff, or whose diff exceeds the time
+budget, get a coarse diff of the changed region instead, or only a summary
+if even that would be too large.
+"""
+
+from __future__ import annotations
+
+import difflib
+import multiprocessing
+import threading
+import time
+from collections import Counter
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext
+
+from wakawaka import metrics
+from wakawaka.rendering import get_render_cache
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+    from wakawaka.models import Revision
+
+DIFF_CACHE_KEY = "wakawaka:diff:{old}:{new}"
+
+
+class DiffTimeoutError(Exception):
+    """
+    Raised by a diff engine if the diff exceeded its time budget.
+    """
+
+
+class DifflibEngine:
+    """
+    Computes the diff with `difflib` in the request thread.
+    """
+
+    def diff(self, old_lines: list[str], new_lines: list[str]) -> list[str]:
+        return self.compute(old_lines, new_lines)
+
+    def compute(self, old_lines: list[str], new_lines: list[str]) -> list[str]:
+        return list(
+            difflib.unified_diff(
+                old_lines, new_lines, "Original", "Current", lineterm=""
+            )
+        )
+
+
+class ProcessEngine(DifflibEngine):
+    """
+    Computes each diff in a worker process of its own, so it doesn't block
+    the request thread for longer than `WAKAWAKA_DIFF_TIMEOUT` seconds. At
+    most `WAKAWAKA_DIFF_WORKERS` diffs are computed at once. A diff exceeding
+    the timeout is given up and only its own process is killed, so the diffs
+    of other requests are unaffected.
+    """
+
+    _workers: threading.BoundedSemaphore | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_workers(cls) -> threading.BoundedSemaphore:
+        with cls._lock:
+            if cls._workers is None:
+                workers = getattr(settings, "WAKAWAKA_DIFF_WORKERS", 2)
+                cls._workers = threading.BoundedSemaphore(workers)
+            return cls._workers
+
+    def diff(self, old_lines: list[str], new_lines: list[str]) -> list[str]:
+        timeout = getattr(settings, "WAKAWAKA_DIFF_TIMEOUT", 5)
+        deadline = time.monotonic() + timeout
+        workers = self.get_workers()
+        if not workers.acquire(timeout=timeout):
+            raise DiffTimeoutError
+        try:
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=self.run, args=(sender, old_lines, new_lines), daemon=True
+            )
+            process.start()
+            sender.close()
+            try:
+                if not receiver.poll(max(deadline - time.monotonic(), 0)):
+                    raise DiffTimeoutError
+                return receiver.recv()
+            # The process died without a result, e.g. of a memory limit.
+            except EOFError as e:
+                raise DiffTimeoutError from e
+            finally:
+                process.kill()
+                process.join()
+                receiver.close()
+        finally:
+            workers.release()
+
+    def run(
+        self, sender: Connection, old_lines: list[str], new_lines: list[str]
+    ) -> None:
+        """
+        Sends the diff to the request thread. Runs in the worker process.
+        """
+        sender.send(self.compute(old_lines, new_lines))
+        sender.close()
+
+
+def get_diff_engine() -> DifflibEngine:
+    path = getattr(settings, "WAKAWAKA_DIFF_ENGINE", "wakawaka.diff.DifflibEngine")
+    return import_string(path)()
+
+
+def coarse_diff(
+    old_lines: list[str], new_lines: list[str], max_lines: int
+) -> list[str] | None:
+    """
+    Returns a diff with a single hunk, which replaces everything between the
+    common lines at the start and the end. Runs in linear time. Returns None
+    if the hunk would be longer than `max_lines`.
+    """
+    limit = min(len(old_lines), len(new_lines))
+    start = 0
+    while start < limit and old_lines[start] == new_lines[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old_lines[-1 - end] == new_lines[-1 - end]:
+        end += 1
+
+    removed = old_lines[start : len(old_lines) - end]
+    added = new_lines[start : len(new_lines) - end]
+    if len(removed) + len(added) > max_lines:
+        return None
+
+    old_range = _format_range(start, len(removed))
+    new_range = _format_range(start, len(added))
+    return [
+        "--- Original",
+        "+++ Current",
+        f"@@ -{old_range} +{new_range} @@",
+        *(f"-{line}" for line in removed),
+        *(f"+{line}" for line in added),
+    ]
+
+
+def count_lines(old_lines: list[str], new_lines: list[str]) -> tuple[int, int]:
+    """
+    Returns the number of removed and added lines, regardless of position.
+    Runs in linear time.
+    """
+    old_counts, new_counts = Counter(old_lines), Counter(new_lines)
+    return (
+        sum((old_counts - new_counts).values()),
+        sum((new_counts - old_counts).values()),
+    )
+
+
+def summarize_diff(old_lines: list[str], new_lines: list[str]) -> str:
+    """
+    Returns the number of removed and added lines, regardless of position.
+    """
+    removed, added = count_lines(old_lines, new_lines)
+    return gettext(
+        "The revisions are too large to compare: "
+        "%(removed)s lines removed, %(added)s lines added."
+    ) % {"removed": removed, "added": added}
+
+
+def get_max_lines() -> int:
+    return getattr(settings, "WAKAWAKA_DIFF_MAX_LINES", 10000)
+
+
+def count_changed_lines(old_lines: list[str], new_lines: list[str]) -> tuple[int, int]:
+    """
+    Returns the number of removed and added lines in the diff from
+    `old_lines` to `new_lines`, computed by the configured engine within the
+    same limits as a diff. Beyond them, the lines are counted regardless of
+    their position.
+    """
+    if len(old_lines) + len(new_lines) <= get_max_lines():
+        try:
+            lines = get_diff_engine().diff(old_lines, new_lines)
+        except DiffTimeoutError:
+            pass
+        else:
+            # Skip the file headers of the diff.
+            removed = sum(1 for line in lines[2:] if line.startswith("-"))
+            added = sum(1 for line in lines[2:] if line.startswith("+"))
+            return removed, added
+    return count_lines(old_lines, new_lines)
+
+
+def compute_diff(old: str, new: str) -> tuple[str, bool]:
+    """
+    Returns the unified diff from `old` to `new`, computed by the configured
+    engine, and whether the engine timed out. Falls back to a coarse diff if
+    there are more than `WAKAWAKA_DIFF_MAX_LINES` lines to compare or the
+    engine timed out, and to a summary if the coarse diff is longer than
+    `WAKAWAKA_DIFF_MAX_COARSE_LINES` lines.
+    """
+    old_lines, new_lines = old.splitlines(), new.splitlines()
+
+    lines = None
+    timed_out = False
+    if len(old_lines) + len(new_lines) <= get_max_lines():
+        try:
+            lines = get_diff_engine().diff(old_lines, new_lines)
+        except DiffTimeoutError:
+            timed_out = True
+
+    if lines is None:
+        max_lines = getattr(settings, "WAKAWAKA_DIFF_MAX_COARSE_LINES", 50000)
+        lines = coarse_diff(old_lines, new_lines, max_lines)
+    if lines is None:
+        return summarize_diff(old_lines, new_lines), timed_out
+    return "\n".join(lines), timed_out
+
+
+def unified_diff(old: Revision, new: Revision) -> str:
+    """
+    Returns the unified diff from the content of the `old` revision to the
+    one of the `new` revision.
+
+    The content of a revision never changes, so the diff is cached by the
+    content hashes of both revisions, in the render cache. Revisions with
+    identical content share the cached diff. The fallback for a diff that
+    timed out is only cached for `WAKAWAKA_DIFF_RETRY_AFTER` seconds, after
+    which the exact diff is tried again.
+    """
+    if old.content_hash == new.content_hash:
+        return gettext("No changes were made between this two files.")
+
+    cache = get_render_cache()
+    key = DIFF_CACHE_KEY.format(old=old.content_hash, new=new.content_hash)
+    if cache is not None:
+        diff = cache.get(key)
+        metrics.count_cache_request("diff", hit=diff is not None)
+        if diff is not None:
+            return diff
+
+    with metrics.timer("diff"):
+        diff, timed_out = compute_diff(old.content, new.content)
+
+    if cache is not None:
+        if timed_out:
+            timeout = getattr(settings, "WAKAWAKA_DIFF_RETRY_AFTER", 60)
+        else:
+            timeout = getattr(
+                settings, "WAKAWAKA_RENDER_CACHE_TIMEOUT", 60 * 60 * 24 * 7
+            )
+        cache.set(key, diff, timeout=timeout)
+    return diff
+
+
+def _format_range(start: int, length: int) -> str:
+    """
+    Formats a line range of a hunk header, like `difflib.unified_diff`.
+    """
+    if length == 1:
+        return str(start + 1)
+    if length == 0:
+        return f"{start},0"
+    return f"{start + 1},{length}"
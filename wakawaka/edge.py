@@ -0,0 +1,141 @@
+"""
+Caching of page views in a CDN or reverse proxy like Varnish.
+
+Page views of anonymous users are marked as cacheable by shared caches and
+tagged with surrogate keys: the page slug, the revision id and the slugs
+the revision links to. Whenever a page changes, the affected keys are
+purged through the purger set in `WAKAWAKA_PURGER`.
+"""
+
+from __future__ import annotations
+
+import logging
+import urllib.request
+from typing import TYPE_CHECKING, ClassVar
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django.utils.module_loading import import_string
+
+from wakawaka.conditional import has_pending_messages
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from django.http import HttpRequest, HttpResponse
+
+    from wakawaka.models import Revision, WikiPage
+
+logger = logging.getLogger(__name__)
+
+
+def page_key(slug: str) -> str:
+    return f"page:{slug}"
+
+
+def revision_key(pk: int) -> str:
+    return f"rev:{pk}"
+
+
+def link_key(slug: str) -> str:
+    return f"link:{slug}"
+
+
+def get_surrogate_key_header() -> str:
+    return getattr(settings, "WAKAWAKA_SURROGATE_KEY_HEADER", "Surrogate-Key")
+
+
+class NullPurger:
+    """
+    Discards all purge requests.
+    """
+
+    def purge(self, keys: set[str]) -> None:
+        pass
+
+
+class RecordingPurger(NullPurger):
+    """
+    Records the purged keys in `RecordingPurger.purged`, for tests.
+    """
+
+    purged: ClassVar[list[set[str]]] = []
+
+    def purge(self, keys: set[str]) -> None:
+        self.purged.append(keys)
+
+
+class HTTPPurger(NullPurger):
+    """
+    Sends a `PURGE` request to `WAKAWAKA_PURGE_URL` with the keys in the
+    surrogate key header, e.g. for Varnish with the xkey module. Failures are
+    logged and don't affect the edit.
+    """
+
+    def purge(self, keys: set[str]) -> None:
+        request = urllib.request.Request(  # noqa: S310 - The URL is a setting
+            settings.WAKAWAKA_PURGE_URL,
+            method="PURGE",
+            headers={get_surrogate_key_header(): " ".join(sorted(keys))},
+        )
+        timeout = getattr(settings, "WAKAWAKA_PURGE_TIMEOUT", 5)
+        try:
+            urllib.request.urlopen(request, timeout=timeout).close()  # noqa: S310
+        except OSError:
+            logger.exception("Purging %s failed", " ".join(sorted(keys)))
+
+
+def get_purger() -> NullPurger:
+    path = getattr(settings, "WAKAWAKA_PURGER", "wakawaka.edge.NullPurger")
+    return import_string(path)()
+
+
+def purge(*keys: str) -> None:
+    """
+    Purges the given surrogate keys, once the current transaction is
+    committed.
+    """
+    transaction.on_commit(lambda: get_purger().purge(set(keys)))
+
+
+def purge_page(page: WikiPage, *revisions: Revision, links: bool = False) -> None:
+    """
+    Purges all cached views of the given page and revisions. If `links` is
+    True, the page was created or deleted, and the views linking to it are
+    purged as well.
+    """
+    keys = [page_key(page.slug), *(revision_key(rev.pk) for rev in revisions)]
+    if links:
+        keys.append(link_key(page.slug))
+    purge(*keys)
+
+
+def set_edge_headers(
+    request: HttpRequest,
+    response: HttpResponse,
+    *,
+    page: WikiPage,
+    rev: Revision,
+    linked_slugs: Iterable[str],
+) -> HttpResponse:
+    """
+    Makes a page view of an anonymous user cacheable by shared caches, for
+    `WAKAWAKA_SHARED_MAX_AGE` seconds, and tags it with surrogate keys.
+    Browsers revalidate it on each request. Views for logged in users, or
+    displaying messages, are private.
+    """
+    if request.user.is_authenticated or has_pending_messages(request):
+        patch_cache_control(response, private=True)
+        return response
+
+    shared_max_age = getattr(settings, "WAKAWAKA_SHARED_MAX_AGE", 60 * 60 * 24)
+    patch_cache_control(response, public=True, max_age=0, s_maxage=shared_max_age)
+
+    keys = [
+        page_key(page.slug),
+        revision_key(rev.pk),
+        *(link_key(slug) for slug in sorted(linked_slugs)),
+    ]
+    response.headers[get_surrogate_key_header()] = " ".join(keys)
+    return response
@@ -0,0 +1,187 @@
+"""
+Streaming export of the wiki content.
+
+Every page is exported with either its current revision or its full
+history, as JSON Lines or as a tar or zip archive. Revisions are read with
+a server-side cursor and the output is produced in chunks, so the export is
+never held in memory as a whole, no matter how large the history is.
+
+JSON Lines output has one revision per line with the keys `slug`,
+`content`, `created`, `creator`, `creator_ip` and `message`, which is the
+input format of the `wakawaka_import` command. Archives contain one text
+file per revision: `<slug>.txt` for current revisions, and
+`<slug>/rev<id>.txt` for the full history.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import tarfile
+import time
+import zipfile
+from typing import TYPE_CHECKING
+
+from django.db.models import Subquery
+
+from wakawaka import storage
+from wakawaka.models import Revision, WikiPage
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+JSONL = "jsonl"
+TAR = "tar"
+ZIP = "zip"
+FORMATS = (JSONL, TAR, ZIP)
+
+CONTENT_TYPES = {
+    JSONL: "application/jsonl; charset=utf-8",
+    TAR: "application/x-tar",
+    ZIP: "application/zip",
+}
+
+# Number of revisions fetched from the cursor at a time.
+CHUNK_SIZE = 500
+
+# Zip archives can't store dates before 1980.
+ZIP_EPOCH = 315532800
+
+
+def export_queryset(history: bool = False) -> Iterable[Revision]:
+    """
+    Returns the revisions to export, ordered by page and in the order they
+    were stored, i.e. each delta after its base.
+    """
+    queryset = Revision.objects.all()
+    if not history:
+        queryset = queryset.filter(
+            pk__in=Subquery(
+                WikiPage.objects.filter(current_revision__isnull=False).values(
+                    "current_revision"
+                )
+            )
+        )
+    return (
+        queryset.select_related("page", "creator", "body")
+        .only(
+            "page__slug",
+            "creator__username",
+            "creator_ip",
+            "message",
+            "created",
+            "delta_keyframe",
+            "delta_depth",
+            *storage.READ_FIELDS,
+        )
+        .order_by("page__slug", "pk")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def with_content(revisions: Iterable[Revision]) -> Iterator[tuple[Revision, str]]:
+    """
+    Yields each revision with its content. A delta against the revision
+    just before it is applied to that revision's content, so the history of
+    a page stored as deltas is rebuilt without further queries.
+    """
+    previous_pk = previous_text = None
+    for rev in revisions:
+        if rev.delta_base_id is None:
+            text = rev.body.content
+        elif rev.delta_base_id == previous_pk:
+            text = storage.apply_delta(previous_text, rev.delta)
+        else:
+            text = rev.content
+        previous_pk, previous_text = rev.pk, text
+        yield rev, text
+
+
+def to_record(rev: Revision, text: str) -> dict:
+    return {
+        "slug": rev.page.slug,
+        "content": text,
+        "created": rev.created.isoformat(),
+        "creator": rev.creator.username if rev.creator else None,
+        "creator_ip": rev.creator_ip,
+        "message": rev.message,
+    }
+
+
+def archive_name(rev: Revision, history: bool) -> str:
+    if history:
+        return f"{rev.page.slug}/rev{rev.pk}.txt"
+    return f"{rev.page.slug}.txt"
+
+
+class _StreamBuffer:
+    """
+    A write-only file which collects the written data until it's taken.
+    """
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def export_jsonl(revisions: Iterable[tuple[Revision, str]]) -> Iterator[bytes]:
+    for rev, text in revisions:
+        yield (json.dumps(to_record(rev, text)) + "\n").encode()
+
+
+def export_tar(
+    revisions: Iterable[tuple[Revision, str]], history: bool
+) -> Iterator[bytes]:
+    buffer = _StreamBuffer()
+    # The `w|` mode writes a stream, without seeking back.
+    with tarfile.open(fileobj=buffer, mode="w|") as archive:
+        for rev, text in revisions:
+            data = text.encode()
+            info = tarfile.TarInfo(archive_name(rev, history))
+            info.size = len(data)
+            info.mtime = int(rev.created.timestamp())
+            archive.addfile(info, io.BytesIO(data))
+            yield buffer.take()
+    yield buffer.take()
+
+
+def export_zip(
+    revisions: Iterable[tuple[Revision, str]], history: bool
+) -> Iterator[bytes]:
+    buffer = _StreamBuffer()
+    # The buffer can't seek, so zipfile writes data descriptors after each
+    # file rather than updating its header.
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for rev, text in revisions:
+            info = zipfile.ZipInfo(
+                archive_name(rev, history),
+                date_time=time.gmtime(max(rev.created.timestamp(), ZIP_EPOCH))[:6],
+            )
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, text)
+            yield buffer.take()
+    yield buffer.take()
+
+
+def export(export_format: str, history: bool = False) -> Iterator[bytes]:
+    """
+    Yields the export of all pages in the given format, in chunks of about
+    one revision each.
+    """
+    revisions = with_content(export_queryset(history))
+    if export_format == TAR:
+        return export_tar(revisions, history)
+    if export_format == ZIP:
+        return export_zip(revisions, history)
+    return export_jsonl(revisions)
@@ -4,14 +4,35 @@ from typing import Any
 
 from django import forms
 from django.contrib import messages
+from django.db import transaction
 from django.http import HttpRequest, HttpResponseRedirect
 from django.urls import reverse
 from django.utils.translation import gettext
 from django.utils.translation import gettext_lazy as _
 
+from wakawaka import edge, links, merge, search
 from wakawaka.models import Revision, WikiPage
 
 
+class EditConflict(Exception):  # noqa: N818
+    """
+    Raised by `WikiPageForm.save` if the page was changed since the edit
+    started, and the changes overlap with the edit. `content` has both
+    versions of the overlapping lines marked.
+    """
+
+    def __init__(self, head: Revision, content: str) -> None:
+        super().__init__(head, content)
+        self.head = head
+        self.content = content
+
+
+class _HeadMovedError(Exception):
+    """
+    Rolls back a revision whose page was changed since its edit started.
+    """
+
+
 class WikiPageForm(forms.Form):
     content = forms.CharField(
         label=_("Content"),
@@ -22,17 +43,99 @@ class WikiPageForm(forms.Form):
         widget=forms.TextInput,
         required=False,
     )
+    # The current revision of the page when the edit started.
+    base_revision = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
+    def __init__(self, *args: Any, page: WikiPage | None = None, **kwargs: Any) -> None:
+        """
+        `page` is the edited page, which the base revision must belong to.
+        """
+        self.page = page
+        super().__init__(*args, **kwargs)
+
+    def clean_base_revision(self) -> int | None:
+        base_id = self.cleaned_data["base_revision"]
+        if base_id is None:
+            return None
+        if self.page is None or self.page.pk is None:
+            revisions = Revision.objects.none()
+        else:
+            revisions = self.page.revisions.all()
+        if not revisions.filter(pk=base_id).exists():
+            raise forms.ValidationError(
+                _("The revision this edit is based on doesn't exist anymore.")
+            )
+        return base_id
 
     def save(
         self, request: HttpRequest, page: WikiPage, *args: Any, **kwargs: Any
-    ) -> None:
-        Revision.objects.create(
-            page=page,
-            creator=request.user,
-            creator_ip=request.META.get("REMOTE_ADDR"),
-            content=self.cleaned_data["content"],
-            message=self.cleaned_data["message"],
-        )
+    ) -> Revision:
+        """
+        Saves the content as the current revision of the page, unless the
+        page was changed since the edit started. Concurrent changes are then
+        merged with the edit, or `EditConflict` is raised if they overlap.
+        No lock is held meanwhile: the current revision is only replaced if
+        it's still the base revision of the edit.
+
+        Without a base revision, the edit is based on the current revision
+        as of the `page` instance.
+        """
+        content = self.cleaned_data["content"]
+        base_id = self.cleaned_data.get("base_revision")
+        if base_id is None:
+            base_id = page.current_revision_id
+        self.merged = False
+        while True:
+            try:
+                return self._save_revision(request, page, content, base_id)
+            except _HeadMovedError:
+                pass
+
+            page.refresh_from_db(fields=["current_revision"])
+            head = page.current_revision
+            if head is None:
+                # All revisions were deleted meanwhile, the edit recreates the
+                # page.
+                base_id = None
+                continue
+
+            # Merge the edit with the changes saved since the base revision.
+            # Without it, e.g. if it was deleted meanwhile, all changes
+            # conflict.
+            base = page.revisions.filter(pk=base_id).first()
+            content, conflicts = merge.merge(
+                base.content if base else "", content, head.content
+            )
+            if conflicts:
+                raise EditConflict(head, content)
+            if content == head.content:
+                return head
+            base_id = head.pk
+            self.merged = True
+
+    def _save_revision(
+        self, request: HttpRequest, page: WikiPage, content: str, base_id: int | None
+    ) -> Revision:
+        created = page.current_revision_id is None
+        with transaction.atomic():
+            rev = Revision.objects.create(
+                page=page,
+                creator=request.user,
+                creator_ip=request.META.get("REMOTE_ADDR"),
+                content=content,
+                message=self.cleaned_data["message"],
+            )
+            # Compare and swap the current revision.
+            updated = WikiPage.objects.filter(
+                pk=page.pk, current_revision=base_id
+            ).update(current_revision=rev)
+            if not updated:
+                raise _HeadMovedError
+            page.current_revision = rev
+            search.index_page(page, rev)
+            links.update_links(page, rev)
+            edge.purge_page(page, links=created)
+        return rev
 
 
 class DeleteWikiPageForm(forms.Form):
@@ -59,10 +162,15 @@ class DeleteWikiPageForm(forms.Form):
         super().__init__(*args, **kwargs)
 
     def _delete_page(self, page: WikiPage) -> None:
-        page.delete()
+        with transaction.atomic():
+            page.delete()
+            edge.purge_page(page, links=True)
 
     def _delete_revision(self, rev: Revision) -> None:
-        rev.delete()
+        with transaction.atomic():
+            edge.purge_page(rev.page, rev)
+            rev.delete()
+            rev.page.update_current_revision()
 
     def delete_wiki(
         self, request: HttpRequest, page: WikiPage, rev: Revision
@@ -86,7 +194,7 @@ class DeleteWikiPageForm(forms.Form):
 
         # Revision handling
         if self.cleaned_data.get("delete") == "rev":
-            revision_length = len(page.revisions.all())
+            revision_length = page.revisions.count()
 
             # Delete the revision if there are more than 1 and the user has permission
             if revision_length > 1 and request.user.has_perm(
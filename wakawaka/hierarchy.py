@@ -0,0 +1,161 @@
+"""
+The hierarchy of pages with nested slugs, like `ProjectAlpha/DesignNotes`.
+
+Every slug and each of its prefixes is stored as a `PageNode`, keyed by its
+path and pointing to the page with that slug, if any. `ProjectAlpha` has a
+node even if there is no such page, as long as there are pages below it.
+Each node stores the path of its parent and the number of pages below it,
+so the index lists the children of a node, with their page counts, with a
+single indexed query, no matter how large the wiki is. All nodes below a
+node are a prefix range of the indexed paths.
+
+The nodes are updated when pages are created and deleted, and can be rebuilt
+with the `wakawaka_rebuild_index` management command.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.db.models import Count, F
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+    from django.db.models import QuerySet
+
+    from wakawaka.models import PageNode
+
+SEPARATOR = "/"
+
+# The bucket of names not starting with a letter.
+OTHER_BUCKET = "#"
+
+
+def _node_model() -> type[PageNode]:
+    from wakawaka.models import PageNode  # noqa: PLC0415 - Circular import
+
+    return PageNode
+
+
+def get_per_page() -> int:
+    return getattr(settings, "WAKAWAKA_INDEX_PER_PAGE", 200)
+
+
+def ancestors(path: str) -> list[str]:
+    """
+    Returns the paths above the given one, e.g. `["A", "A/B"]` for `A/B/C`.
+    """
+    parts = path.split(SEPARATOR)
+    return [SEPARATOR.join(parts[:i]) for i in range(1, len(parts))]
+
+
+def parent_path(path: str) -> str:
+    """
+    Returns the path of the parent, which is empty for top-level nodes.
+    """
+    return path.rpartition(SEPARATOR)[0]
+
+
+def bucket(name: str) -> str:
+    """
+    Returns the alphabetical bucket of a node name, its uppercased first
+    letter.
+    """
+    letter = name[:1].upper()
+    return letter if letter.isalpha() else OTHER_BUCKET
+
+
+def build_node(path: str, page_id: int | None = None, pages: int = 0) -> PageNode:
+    name = path.rpartition(SEPARATOR)[2]
+    return _node_model()(
+        path=path,
+        parent=parent_path(path),
+        name=name,
+        bucket=bucket(name),
+        page_id=page_id,
+        pages=pages,
+    )
+
+
+def _update_counts(counts: Counter, sign: int) -> None:
+    """
+    Adds the given numbers of pages to the page counts of the nodes, with
+    one query per distinct number.
+    """
+    paths_by_count = defaultdict(list)
+    for path, count in counts.items():
+        paths_by_count[count].append(path)
+    for count, paths in paths_by_count.items():
+        _node_model().objects.filter(path__in=paths).update(
+            pages=F("pages") + sign * count
+        )
+
+
+def add_pages(pages: Mapping[str, int]) -> None:
+    """
+    Adds the nodes of the given new pages, a mapping of their slug to their
+    id, and the nodes above them, and counts the pages in the latter.
+    """
+    nodes = _node_model().objects
+    counts = Counter(path for slug in pages for path in ancestors(slug))
+    paths = counts.keys() | pages.keys()
+    existing = set(nodes.filter(path__in=paths).values_list("path", flat=True))
+    nodes.bulk_create(
+        [build_node(path, pages.get(path)) for path in sorted(paths - existing)],
+        ignore_conflicts=True,
+    )
+    for slug in pages.keys() & existing:
+        nodes.filter(path=slug).update(page=pages[slug])
+    _update_counts(counts, 1)
+
+
+def remove_pages(slugs: Iterable[str]) -> None:
+    """
+    Uncounts the given deleted pages in the nodes above them, and removes
+    the nodes that have neither a page nor pages below them anymore.
+    """
+    slugs = set(slugs)
+    counts = Counter(path for slug in slugs for path in ancestors(slug))
+    _update_counts(counts, -1)
+    _node_model().objects.filter(
+        path__in=counts.keys() | slugs, page=None, pages__lte=0
+    ).delete()
+
+
+def children(path: str = "", letter: str = "", after: str = "") -> QuerySet:
+    """
+    Returns the child nodes of the given path, the top-level nodes by
+    default, ordered by name. Optionally only those in the bucket of the given
+    letter, and those after the given name.
+    """
+    queryset = _node_model().objects.filter(parent=path)
+    if letter:
+        queryset = queryset.filter(bucket=letter)
+    if after:
+        queryset = queryset.filter(name__gt=after)
+    return queryset.order_by("name")
+
+
+def buckets(path: str = "") -> QuerySet:
+    """
+    Returns the alphabetical buckets of the children of the given path, with
+    their number of children.
+    """
+    return (
+        _node_model()
+        .objects.filter(parent=path)
+        .values_list("bucket")
+        .annotate(count=Count("pk"))
+        .order_by("bucket")
+    )
+
+
+def descendants(path: str) -> QuerySet:
+    """
+    Returns all nodes below the given path. The prefix lookup is a range scan
+    of the index of the paths.
+    """
+    return _node_model().objects.filter(path__startswith=path + SEPARATOR)
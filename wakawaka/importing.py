@@ -0,0 +1,283 @@
+"""
+Bulk import of revisions from other wikis.
+
+Readers stream `ImportedRevision` records from JSONL or MediaWiki XML
+input, without holding more than a single record in memory. Records are
+stored in batches with `bulk_create`, keeping their original timestamps and
+creators. The current revision, search document and links of each page are
+updated with every batch.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import xml.etree.ElementTree as ET
+from typing import IO, TYPE_CHECKING, NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.db import connections, router
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from wakawaka import edge, hierarchy
+from wakawaka.links import extract_links
+from wakawaka.models import Revision, RevisionBody, SearchDocument, WikiLink, WikiPage
+from wakawaka.rendering import invalidate_links
+from wakawaka.search import split_words
+from wakawaka.storage import content_digest
+from wakawaka.wikiwords import WIKI_SLUG
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from datetime import datetime
+
+
+class InvalidInputError(ValueError):
+    """
+    Raised for input which can't be imported.
+    """
+
+
+class ImportedRevision(NamedTuple):
+    slug: str
+    content: str
+    created: datetime
+    creator: str | None = None
+    creator_ip: str | None = None
+    message: str = ""
+
+
+def parse_timestamp(value: str | None) -> datetime:
+    """
+    Parses an ISO 8601 timestamp. Timestamps without a timezone are in the
+    current timezone, missing timestamps are now.
+    """
+    if not value:
+        return timezone.now()
+    timestamp = parse_datetime(value)
+    if timestamp is None:
+        msg = f"Invalid timestamp: {value!r}"
+        raise InvalidInputError(msg)
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timestamp
+
+
+def read_jsonl(lines: Iterable[str]) -> Iterator[ImportedRevision]:
+    """
+    Reads one revision per line, as a JSON object with the keys `slug`,
+    `content`, and optionally `created`, `creator` (a username),
+    `creator_ip` and `message`.
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+            if not re.fullmatch(WIKI_SLUG, data["slug"]):
+                msg = f"Invalid slug: {data['slug']!r}"
+                raise InvalidInputError(msg)
+            yield ImportedRevision(
+                slug=data["slug"],
+                content=data["content"],
+                created=parse_timestamp(data.get("created")),
+                creator=data.get("creator"),
+                creator_ip=data.get("creator_ip"),
+                message=data.get("message") or "",
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            msg = f"Line {number}: {e!r}"
+            raise InvalidInputError(msg) from e
+
+
+def mediawiki_slug(title: str) -> str | None:
+    """
+    Returns the CamelCase slug for a MediaWiki page title, e.g. `CarrotCake`
+    for `Carrot cake`, or None if the title makes no valid slug.
+    """
+    slug = "/".join(
+        "".join(word[:1].upper() + word[1:] for word in re.findall(r"[^\W_]+", part))
+        for part in title.split("/")
+    )
+    return slug if re.fullmatch(WIKI_SLUG, slug) else None
+
+
+def read_mediawiki(stream: IO[bytes]) -> Iterator[ImportedRevision]:
+    """
+    Reads the revisions of all pages in the main namespace of a MediaWiki
+    XML export. Pages whose title makes no valid slug are skipped.
+    """
+    slug = None
+    root = None
+    # The export is trusted input of the site admin.
+    for event, elem in ET.iterparse(stream, events=("start", "end")):  # noqa: S314
+        tag = elem.tag.rpartition("}")[2]
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+
+        if tag == "title":
+            slug = mediawiki_slug(elem.text or "")
+        elif tag == "ns" and elem.text != "0":
+            slug = None
+        elif tag == "revision":
+            if slug is not None:
+                yield _mediawiki_revision(slug, elem)
+            elem.clear()
+        elif tag == "page":
+            # Drop the finished page, so memory use stays constant.
+            root.clear()
+
+
+def _mediawiki_revision(slug: str, elem: ET.Element) -> ImportedRevision:
+    # The text of each element within the revision, including the username
+    # or ip of the contributor.
+    texts = {child.tag.rpartition("}")[2]: child.text for child in elem.iter()}
+    return ImportedRevision(
+        slug=slug,
+        content=texts.get("text") or "",
+        created=parse_timestamp(texts.get("timestamp")),
+        creator=texts.get("username"),
+        creator_ip=texts.get("ip"),
+        message=texts.get("comment") or "",
+    )
+
+
+def restore_timestamps(
+    objs: list[WikiPage] | list[Revision], timestamps: Iterable[datetime]
+) -> None:
+    """
+    Stores the given original timestamps as the `created` and `modified`
+    dates of the given pages or revisions. `bulk_create` sets both to the
+    current time, but `bulk_update` stores them as they are.
+    """
+    for obj, timestamp in zip(objs, timestamps):
+        obj.created = obj.modified = timestamp
+    if objs:
+        type(objs[0]).objects.bulk_update(objs, ("created", "modified"))
+
+
+def insert_revisions(revisions: list[Revision], timestamps: list[datetime]) -> None:
+    """
+    Stores the given new revisions with their original timestamps. Databases
+    which don't return the primary keys of bulk inserted rows, like MySQL,
+    store them one by one, since their primary keys are needed to restore
+    the timestamps.
+    """
+    connection = connections[router.db_for_write(Revision)]
+    if connection.features.can_return_rows_from_bulk_insert:
+        Revision.objects.bulk_create(revisions)
+        restore_timestamps(revisions, timestamps)
+        return
+
+    for rev, timestamp in zip(revisions, timestamps):
+        rev.created = rev.modified = timestamp
+        # A raw save stores the timestamps as they are and, like
+        # `bulk_create`, skips `Revision.save()`.
+        rev.save_base(raw=True)
+
+
+def import_batch(records: list[ImportedRevision]) -> int:
+    """
+    Stores the given revisions, creating their pages as needed, and returns
+    the number of pages created. Must run within a transaction. Revisions are
+    stored as full content, regardless of `WAKAWAKA_REVISION_STORAGE`.
+    """
+    created = {}
+    for record in records:
+        if record.slug not in created or record.created < created[record.slug]:
+            created[record.slug] = record.created
+    existing = set(
+        WikiPage.objects.filter(slug__in=created).values_list("slug", flat=True)
+    )
+    new_pages = [WikiPage(slug=slug) for slug in created if slug not in existing]
+    WikiPage.objects.bulk_create(new_pages, ignore_conflicts=True)
+    pages = dict(WikiPage.objects.filter(slug__in=created).values_list("slug", "pk"))
+    for page in new_pages:
+        page.pk = pages[page.slug]
+    restore_timestamps(new_pages, (created[page.slug] for page in new_pages))
+    hierarchy.add_pages({page.slug: pages[page.slug] for page in new_pages})
+
+    usernames = {record.creator for record in records if record.creator}
+    users = dict(
+        get_user_model()
+        .objects.filter(username__in=usernames)
+        .values_list("username", "pk")
+    )
+
+    digests = [content_digest(record.content) for record in records]
+    bodies = {
+        digest: RevisionBody(digest=digest, content=record.content)
+        for digest, record in zip(digests, records)
+    }
+    RevisionBody.objects.bulk_create(bodies.values(), ignore_conflicts=True)
+    insert_revisions(
+        [
+            Revision(
+                page_id=pages[record.slug],
+                content_hash=digest,
+                body_id=digest,
+                message=record.message,
+                creator_id=users.get(record.creator),
+                creator_ip=record.creator_ip,
+            )
+            for digest, record in zip(digests, records)
+        ],
+        [record.created for record in records],
+    )
+
+    update_pages(pages.values())
+    invalidate_links(*(page.slug for page in new_pages))
+    edge.purge(
+        *(edge.page_key(slug) for slug in pages),
+        *(edge.link_key(page.slug) for page in new_pages),
+    )
+    return len(new_pages)
+
+
+def update_pages(page_ids: Iterable[int]) -> None:
+    """
+    Points the given pages to their latest revision, and updates their search
+    documents and links, with a fixed number of queries.
+    """
+    latest = Revision.objects.filter(page=OuterRef("pk")).order_by("-modified", "-pk")
+    pages = list(
+        WikiPage.objects.filter(pk__in=page_ids).annotate(
+            latest_id=Subquery(latest.values("pk")[:1]),
+            latest_modified=Subquery(latest.values("modified")[:1]),
+        )
+    )
+    revisions = Revision.objects.select_related("body").in_bulk(
+        [page.latest_id for page in pages]
+    )
+    for page in pages:
+        page.current_revision = revisions[page.latest_id]
+        page.modified = max(page.modified, page.latest_modified)
+    WikiPage.objects.bulk_update(pages, ("current_revision", "modified"))
+
+    SearchDocument.objects.bulk_create(
+        [
+            SearchDocument(
+                page=page,
+                slug=page.slug,
+                title=split_words(page.slug),
+                content=page.current_revision.content,
+            )
+            for page in pages
+        ],
+        update_conflicts=True,
+        unique_fields=("page",),
+        update_fields=("slug", "title", "content"),
+    )
+
+    WikiLink.objects.filter(source__in=pages).delete()
+    WikiLink.objects.bulk_create(
+        [
+            WikiLink(source=page, target_slug=slug)
+            for page in pages
+            for slug in extract_links(page, page.current_revision.content)
+        ]
+    )
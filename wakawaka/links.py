@@ -0,0 +1,51 @@
+"""
+The link graph of the wiki.
+
+The WikiWords in the current revision of each page are stored as `WikiLink`
+edges, so backlinks, orphaned pages and wanted pages can be looked up with
+a single indexed query rather than by scanning all revisions.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from wakawaka.models import Revision, WikiLink, WikiPage
+
+
+def _link_model() -> type[WikiLink]:
+    from wakawaka.models import WikiLink  # noqa: PLC0415 - Circular import
+
+    return WikiLink
+
+
+def extract_links(page: WikiPage, content: str) -> set[str]:
+    """
+    Returns the slugs of all pages the given content of a page links to,
+    except the page itself.
+    """
+    from wakawaka.wikiwords import find_wikiwords  # noqa: PLC0415 - Circular import
+
+    return find_wikiwords(content) - {page.slug}
+
+
+def update_links(page: WikiPage, rev: Revision | None) -> None:
+    """
+    Updates the outgoing links of the given page to the links in the given
+    revision, its current one. Only added and removed links are written.
+    """
+    links = _link_model().objects
+    targets = set() if rev is None else extract_links(page, rev.content)
+    existing = set(links.filter(source=page.pk).values_list("target_slug", flat=True))
+
+    if existing - targets:
+        links.filter(source=page.pk, target_slug__in=existing - targets).delete()
+    if targets - existing:
+        links.bulk_create(
+            [
+                _link_model()(source_id=page.pk, target_slug=slug)
+                for slug in targets - existing
+            ],
+            ignore_conflicts=True,
+        )
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from wakawaka.links import extract_links
+from wakawaka.models import WikiLink, WikiPage
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the stored links of all pages from their current revision, "
+        "in batches."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of pages processed per transaction.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = options["batch_size"]
+        queryset = WikiPage.objects.select_related("current_revision__body").order_by(
+            "pk"
+        )
+
+        pages_done = links_done = last_pk = 0
+        while pages := list(queryset.filter(pk__gt=last_pk)[:batch_size]):
+            links = [
+                WikiLink(source=page, target_slug=slug)
+                for page in pages
+                if page.current_revision is not None
+                for slug in extract_links(page, page.current_revision.content)
+            ]
+            with transaction.atomic():
+                WikiLink.objects.filter(source__in=pages).delete()
+                WikiLink.objects.bulk_create(links)
+
+            pages_done += len(pages)
+            links_done += len(links)
+            last_pk = pages[-1].pk
+            self.stdout.write(f"Processed {pages_done} pages...")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Stored {links_done} links of {pages_done} pages.")
+        )
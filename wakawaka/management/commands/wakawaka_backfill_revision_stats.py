@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from wakawaka import storage
+from wakawaka.exporting import with_content
+from wakawaka.models import Revision
+from wakawaka.revision_stats import STATS_FIELDS, set_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Stores the size, size change, lines added and removed and word count "
+        "of revisions without them, page by page."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute the metadata of all revisions, not only of those "
+            "without it.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of revisions updated per transaction.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.batch_size = options["batch_size"]
+        missing = Revision.objects.all()
+        if not options["all"]:
+            missing = missing.filter(size__isnull=True)
+
+        self.done = 0
+        self.pending: list[Revision] = []
+        last_page = 0
+        while page_ids := list(
+            missing.filter(page__gt=last_page)
+            .order_by("page")
+            .values_list("page", flat=True)
+            .distinct()[:100]
+        ):
+            for page_id in page_ids:
+                self.backfill_page(page_id, options["all"])
+            last_page = page_ids[-1]
+        self.flush()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Stored the metadata of {self.done} revisions.")
+        )
+
+    def backfill_page(self, page_id: int, everything: bool) -> None:
+        """
+        Computes the metadata of the revisions of a page in the order of its
+        history, rebuilding each content from its parent where possible.
+        """
+        revisions = (
+            Revision.objects.filter(page=page_id)
+            .select_related("body")
+            .only(*storage.READ_FIELDS, "delta_keyframe", "delta_depth", *STATS_FIELDS)
+            .order_by("modified", "pk")
+            .iterator(chunk_size=self.batch_size)
+        )
+        parent_text = None
+        for rev, text in with_content(revisions):
+            if everything or rev.size is None:
+                set_stats(rev, text, parent_text)
+                self.pending.append(rev)
+                if len(self.pending) >= self.batch_size:
+                    self.flush()
+            parent_text = text
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        with transaction.atomic():
+            Revision.objects.bulk_update(self.pending, STATS_FIELDS)
+        self.done += len(self.pending)
+        self.pending = []
+        self.stdout.write(f"Processed {self.done} revisions...")
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce, Length
+from django.utils import timezone
+
+from wakawaka import edge, retention, storage
+from wakawaka.models import Revision, RevisionBody, WikiPage
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+# Number of pages fetched at once.
+CHUNK_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes old revisions according to the retention policy: all recent "
+        "revisions are kept, older ones are thinned to one per day, week or "
+        "month. The first and current revision of each page are always kept."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=None,
+            help="Keep all revisions of the last N days. Defaults to "
+            "WAKAWAKA_RETENTION_DAYS.",
+        )
+        parser.add_argument(
+            "--period",
+            choices=retention.PERIODS,
+            default=None,
+            help="Keep one older revision per period. Defaults to "
+            "WAKAWAKA_RETENTION_PERIOD.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of revisions deleted per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be deleted and the space reclaimed.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        keep_days = options["keep_days"]
+        if keep_days is None:
+            keep_days = retention.get_retention_days()
+        period = options["period"] or retention.get_retention_period()
+        cutoff = timezone.now() - timedelta(days=keep_days)
+        self.batch_size = options["batch_size"]
+        self.dry_run = options["dry_run"]
+
+        size_before = stored_size()
+        self.deleted = self.pages = 0
+        self.estimate = [0, 0]
+        pending: list[int] = []
+        slugs: list[str] = []
+
+        for page_id, slug, current_id in iterate_pages():
+            revisions = (
+                Revision.objects.filter(page=page_id, modified__lt=cutoff)
+                .order_by("modified", "pk")
+                .values_list("pk", "modified")
+            )
+            expired = retention.expired_revisions(revisions, cutoff, period, current_id)
+            if not expired:
+                continue
+            self.pages += 1
+            pending.extend(expired)
+            slugs.append(slug)
+            while len(pending) >= self.batch_size:
+                self.delete(pending[: self.batch_size], slugs)
+                pending = pending[self.batch_size :]
+                slugs = [slug]
+        if pending:
+            self.delete(pending, slugs)
+
+        if self.dry_run:
+            contents, deltas = self.estimate
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Would delete {self.deleted} revisions of {self.pages} pages, "
+                    f"reclaiming about {contents} characters of content and "
+                    f"{deltas} bytes of deltas."
+                )
+            )
+            return
+
+        storage.delete_unused_bodies(self.batch_size)
+        size_after = stored_size()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {self.deleted} revisions of {self.pages} pages, "
+                f"reclaiming {size_before[0] - size_after[0]} characters of "
+                f"content and {size_before[1] - size_after[1]} bytes of deltas."
+            )
+        )
+
+    def delete(self, ids: list[int], slugs: list[str]) -> None:
+        """
+        Deletes the given revisions in one transaction, or adds the space
+        they'd free to the estimate in a dry run.
+        """
+        self.deleted += len(ids)
+        if self.dry_run:
+            contents, deltas = reclaimed_size(ids)
+            self.estimate[0] += contents
+            self.estimate[1] += deltas
+            return
+
+        # Revisions stored as a delta against a deleted revision are turned
+        # into keyframes by the `pre_delete` signal, and the revisions after
+        # the deleted ones are compared to their new parents by `post_delete`.
+        with transaction.atomic():
+            Revision.objects.filter(pk__in=ids).delete()
+            edge.purge(
+                *(edge.page_key(slug) for slug in slugs),
+                *(edge.revision_key(pk) for pk in ids),
+            )
+        self.stdout.write(f"Deleted {self.deleted} revisions...")
+
+
+def iterate_pages() -> Iterator[tuple[int, str, int | None]]:
+    """
+    Yields the id, slug and current revision id of each page. Pages are
+    fetched in chunks, so no cursor is kept open while revisions are deleted.
+    """
+    last_pk = 0
+    while pages := list(
+        WikiPage.objects.filter(pk__gt=last_pk)
+        .order_by("pk")
+        .values_list("pk", "slug", "current_revision")[:CHUNK_SIZE]
+    ):
+        yield from pages
+        last_pk = pages[-1][0]
+
+
+def stored_size() -> tuple[int, int]:
+    """
+    Returns the number of characters of all bodies and bytes of all deltas.
+    """
+    contents = RevisionBody.objects.aggregate(size=Coalesce(Sum(Length("content")), 0))
+    deltas = Revision.objects.aggregate(size=Coalesce(Sum(Length("delta")), 0))
+    return contents["size"], deltas["size"]
+
+
+def reclaimed_size(ids: list[int]) -> tuple[int, int]:
+    """
+    Returns the characters of the bodies only used by the given revisions,
+    and the bytes of their deltas.
+    """
+    revisions = Revision.objects.filter(pk__in=ids)
+    bodies = set(revisions.filter(body__isnull=False).values_list("body", flat=True))
+    bodies -= set(
+        Revision.objects.filter(body__in=bodies)
+        .exclude(pk__in=ids)
+        .values_list("body", flat=True)
+    )
+    contents = RevisionBody.objects.filter(pk__in=bodies).aggregate(
+        size=Coalesce(Sum(Length("content")), 0)
+    )["size"]
+    deltas = revisions.aggregate(size=Coalesce(Sum(Length("delta")), 0))["size"]
+    return contents, deltas
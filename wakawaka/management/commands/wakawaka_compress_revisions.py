@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from wakawaka import storage
+from wakawaka.models import Revision, WikiPage
+
+# Number of revisions fetched and updated at once.
+CHUNK_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = (
+        "Converts the stored revisions of all pages to full content or deltas "
+        "with periodic keyframes, page by page."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--mode",
+            choices=(storage.FULL, storage.DELTA),
+            default=None,
+            help="Storage mode to convert to. Defaults to WAKAWAKA_REVISION_STORAGE.",
+        )
+        parser.add_argument(
+            "--keyframe-interval",
+            type=int,
+            default=None,
+            help="Store a keyframe every N revisions. Defaults to "
+            "WAKAWAKA_KEYFRAME_INTERVAL.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of pages converted per transaction.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        mode = options["mode"] or storage.get_storage_mode()
+        interval = options["keyframe_interval"] or storage.get_keyframe_interval()
+        batch_size = options["batch_size"]
+
+        before = after = revisions = 0
+        last_pk = 0
+        while True:
+            page_ids = list(
+                WikiPage.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not page_ids:
+                break
+            last_pk = page_ids[-1]
+
+            with transaction.atomic():
+                for page_id in page_ids:
+                    stats = self.convert_page(page_id, mode, interval)
+                    revisions += stats[0]
+                    before += stats[1]
+                    after += stats[2]
+
+            self.stdout.write(f"Converted {revisions} revisions...")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Converted {revisions} revisions to {mode} storage: "
+                f"{before} bytes before, {after} bytes after."
+            )
+        )
+
+    def convert_page(self, page_id: int, mode: str, interval: int) -> tuple:
+        """
+        Re-encodes the revisions of one page, oldest first. Only the previous
+        revision's content is kept in memory.
+        """
+        queryset = Revision.objects.filter(page=page_id).order_by("modified", "pk")
+        fields = storage.STORAGE_FIELDS
+
+        count = before = after = 0
+        changed = []
+        prev = prev_text = keyframe_id = None
+        queryset = queryset.select_related("body").only(*fields, "body__content")
+        for rev in queryset.iterator(chunk_size=CHUNK_SIZE):
+            before += stored_size(rev)
+
+            # Revisions are usually stored against their predecessor, whose
+            # content is known already.
+            if prev is not None and rev.delta_base_id == prev.pk:
+                text = storage.apply_delta(prev_text, rev.delta)
+            else:
+                text = rev.content
+
+            delta = None
+            keyframe_due = prev is None or prev.delta_depth + 1 >= interval
+            if mode == storage.DELTA and not keyframe_due:
+                delta = storage.encode_delta(prev_text, text)
+                if len(delta) >= len(text.encode()):
+                    delta = None
+
+            if delta is None:
+                # The body of a keyframe usually exists already.
+                if rev.body_id != rev.content_hash:
+                    rev.body = storage.store_body(text, rev.content_hash)
+                rev.delta = None
+                rev.delta_base_id = None
+                rev.delta_keyframe_id = None
+                rev.delta_depth = 0
+                keyframe_id = rev.pk
+            else:
+                rev.body = None
+                rev.delta = delta
+                rev.delta_base_id = prev.pk
+                rev.delta_keyframe_id = keyframe_id
+                rev.delta_depth = prev.delta_depth + 1
+
+            after += stored_size(rev)
+            count += 1
+            changed.append(rev)
+            if len(changed) >= CHUNK_SIZE:
+                Revision.objects.bulk_update(changed, fields)
+                changed = []
+            prev, prev_text = rev, text
+
+        Revision.objects.bulk_update(changed, fields)
+        return count, before, after
+
+
+def stored_size(rev: Revision) -> int:
+    """
+    Returns the number of bytes stored for the given revision. A body shared
+    by several revisions is counted for each of them.
+    """
+    if rev.body_id is not None:
+        return len(rev.body.content.encode())
+    return len(rev.delta or b"")
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from wakawaka.exporting import FORMATS, JSONL, export
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports every page with its current revision or full history, as "
+        "JSONL or a tar or zip archive. The output is written as it's read."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "output",
+            help="File to write, or - for stdout.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            default=None,
+            help="Output format. Defaults to the extension of the output file, "
+            "else jsonl.",
+        )
+        parser.add_argument(
+            "--history",
+            action="store_true",
+            help="Export all revisions of each page, rather than the current one.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path = options["output"]
+        export_format = options["format"] or (
+            suffix if (suffix := Path(path).suffix[1:]) in FORMATS else JSONL
+        )
+        chunks = export(export_format, history=options["history"])
+
+        if path == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        try:
+            with Path(path).open("wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        except OSError as e:
+            raise CommandError(str(e)) from e
+        self.stdout.write(self.style.SUCCESS(f"Exported the wiki to {path}."))
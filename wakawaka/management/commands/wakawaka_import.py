@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import itertools
+import sys
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+
+from wakawaka.importing import (
+    InvalidInputError,
+    import_batch,
+    read_jsonl,
+    read_mediawiki,
+)
+from wakawaka.models import ImportCheckpoint
+
+JSONL = "jsonl"
+MEDIAWIKI = "mediawiki"
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports revisions from a JSONL file or a MediaWiki XML export, in "
+        "batches. An interrupted import continues where it stopped when run "
+        "again."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "input",
+            help="File to import, or - for stdin.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=(JSONL, MEDIAWIKI),
+            default=None,
+            help="Input format. Defaults to mediawiki for .xml files, else jsonl.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of revisions stored per transaction.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=None,
+            help="Name of the checkpoint to resume from. Defaults to the "
+            "absolute path of the input, required for stdin.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Start from the beginning, ignoring the checkpoint.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path = options["input"]
+        input_format = options["format"] or (
+            MEDIAWIKI if path.endswith(".xml") else JSONL
+        )
+        name = options["checkpoint"]
+        if name is None:
+            if path == "-":
+                msg = "Importing from stdin requires a --checkpoint name."
+                raise CommandError(msg)
+            name = str(Path(path).resolve())
+
+        checkpoint, _created = ImportCheckpoint.objects.get_or_create(name=name)
+        if options["restart"]:
+            checkpoint.position = 0
+            checkpoint.save()
+        if checkpoint.position:
+            self.stdout.write(f"Resuming after {checkpoint.position} revisions...")
+
+        with self.open(path, input_format) as stream:
+            records = (
+                read_mediawiki(stream)
+                if input_format == MEDIAWIKI
+                else read_jsonl(stream)
+            )
+            records = itertools.islice(records, checkpoint.position, None)
+            try:
+                revisions, pages = self.import_records(
+                    records, checkpoint, options["batch_size"]
+                )
+            except InvalidInputError as e:
+                raise CommandError(str(e)) from e
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {revisions} revisions, {pages} new pages.")
+        )
+
+    def open(self, path: str, input_format: str) -> Any:
+        # MediaWiki XML declares its own encoding.
+        if input_format == MEDIAWIKI:
+            mode, encoding = "rb", None
+        else:
+            mode, encoding = "r", "utf-8"
+
+        if path == "-":
+            return open(  # Closed by the caller
+                sys.stdin.fileno(), mode, encoding=encoding, closefd=False
+            )
+        try:
+            return Path(path).open(mode, encoding=encoding)
+        except OSError as e:
+            raise CommandError(str(e)) from e
+
+    def import_records(
+        self, records: Any, checkpoint: ImportCheckpoint, batch_size: int
+    ) -> tuple[int, int]:
+        revisions = pages = 0
+        while batch := list(itertools.islice(records, batch_size)):
+            # The checkpoint is saved along with the batch, so a batch is
+            # either stored and skipped next time, or not stored at all.
+            with transaction.atomic():
+                pages += import_batch(batch)
+                checkpoint.position += len(batch)
+                checkpoint.save(update_fields=("position", "modified"))
+            revisions += len(batch)
+            self.stdout.write(f"Imported {revisions} revisions...")
+        return revisions, pages
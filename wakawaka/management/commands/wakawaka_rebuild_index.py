@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from wakawaka.hierarchy import ancestors, build_node
+from wakawaka.models import PageNode, WikiPage
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the page hierarchy of the page index from the slugs of all pages."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of pages fetched and nodes stored at once.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = options["batch_size"]
+
+        # The page id and the number of pages below each node.
+        nodes: dict[str, list] = {}
+        last_pk = 0
+        while pages := list(
+            WikiPage.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", "slug")[:batch_size]
+        ):
+            for pk, slug in pages:
+                nodes.setdefault(slug, [None, 0])[0] = pk
+                for path in ancestors(slug):
+                    nodes.setdefault(path, [None, 0])[1] += 1
+            last_pk = pages[-1][0]
+
+        with transaction.atomic():
+            PageNode.objects.all().delete()
+            PageNode.objects.bulk_create(
+                [
+                    build_node(path, page_id, pages)
+                    for path, (page_id, pages) in sorted(nodes.items())
+                ],
+                batch_size=batch_size,
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Stored {len(nodes)} nodes of the page index.")
+        )
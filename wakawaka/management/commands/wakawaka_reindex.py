@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from wakawaka.models import SearchDocument, WikiPage
+from wakawaka.search import get_search_backend, split_words
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the search index from the current revision of every page, in batches."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of pages indexed per transaction.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = options["batch_size"]
+        backend = get_search_backend()
+        backend.install()
+
+        # Pages without a revision have nothing to search for.
+        SearchDocument.objects.filter(page__current_revision__isnull=True).delete()
+
+        queryset = (
+            WikiPage.objects.filter(current_revision__isnull=False)
+            .select_related("current_revision__body")
+            .order_by("pk")
+        )
+        indexed = last_pk = 0
+        while pages := list(queryset.filter(pk__gt=last_pk)[:batch_size]):
+            documents = [
+                SearchDocument(
+                    page=page,
+                    slug=page.slug,
+                    title=split_words(page.slug),
+                    content=page.current_revision.content,
+                )
+                for page in pages
+            ]
+            with transaction.atomic():
+                SearchDocument.objects.bulk_create(
+                    documents,
+                    update_conflicts=True,
+                    unique_fields=("page",),
+                    update_fields=("slug", "title", "content"),
+                )
+            indexed += len(documents)
+            last_pk = pages[-1].pk
+            self.stdout.write(f"Indexed {indexed} pages...")
+
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} pages."))
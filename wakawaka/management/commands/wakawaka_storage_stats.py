@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, Length
+
+from wakawaka import storage
+from wakawaka.models import Revision, RevisionBody
+
+
+class Command(BaseCommand):
+    help = (
+        "Shows how revision content is stored and how much is saved by "
+        "storing identical content only once."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Delete bodies which are no longer used by any revision.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of unused bodies deleted per transaction.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        orphans = RevisionBody.objects.filter(revisions__isnull=True)
+        if options["prune"]:
+            pruned = storage.delete_unused_bodies(options["batch_size"])
+            self.stdout.write(f"Deleted {pruned} unused bodies.")
+
+        revisions = Revision.objects.aggregate(
+            count=Count("pk"),
+            keyframes=Count("body"),
+            delta_size=Coalesce(Sum(Length("delta")), 0),
+            referenced_size=Coalesce(Sum(Length("body__content")), 0),
+        )
+        bodies = RevisionBody.objects.aggregate(
+            count=Count("pk"),
+            size=Coalesce(Sum(Length("content")), 0),
+        )
+
+        saved = revisions["referenced_size"] - bodies["size"]
+        ratio = saved / revisions["referenced_size"] if saved > 0 else 0
+
+        self.stdout.write(
+            f"Revisions: {revisions['count']} "
+            f"({revisions['keyframes']} full, "
+            f"{revisions['count'] - revisions['keyframes']} deltas)\n"
+            f"Bodies: {bodies['count']} ({orphans.count()} unused)\n"
+            f"Referenced content: {revisions['referenced_size']} characters\n"
+            f"Stored content: {bodies['size']} characters\n"
+            f"Deltas: {revisions['delta_size']} bytes"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Deduplication saves {saved} characters ({ratio:.1%}).")
+        )
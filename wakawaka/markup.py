@@ -0,0 +1,171 @@
+"""
+A single pass renderer for wiki content.
+
+The content is split into words and separators once. URLs are turned into
+links and WikiWords are found per word, and paragraphs and line breaks are
+emitted while walking the separators. The result is identical to the
+`urlize|wikify|linebreaks` filter chain, but the content is only scanned a
+fixed number of times, with no regular expression that may backtrack over
+more than a single run of characters. Rendering takes linear time, even for
+adversarial input like very long words.
+"""
+
+from __future__ import annotations
+
+import html
+import re
+from typing import TYPE_CHECKING
+
+from django.utils.html import urlize
+from django.utils.safestring import SafeString, mark_safe
+
+from wakawaka.wikiwords import DEFAULT_WIKI_SLUG, WIKI_SLUG, WIKI_WORDS_REGEX
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+# The separators of Django's `urlize`. Words are everything in between.
+SEPARATOR_RE = re.compile(r"""([\s<>"']+)""")
+NEWLINES_RE = re.compile(r"\n+")
+
+# Words longer than this are never turned into a link, which bounds the time
+# spent in `urlize` on a single word.
+MAX_URL_LENGTH = 2048
+
+# A segment of a slug in the default format, two or more humps of upper and
+# lower case letters, starting at a word boundary. The humps can only be
+# split one way, so a failing match only backtracks over a single run of
+# letters, and matches never overlap.
+SEGMENT_RE = re.compile(r"(?<!\w)(?:[A-Z]+[a-z]+){2,}")
+WORD_CHAR_RE = re.compile(r"\w")
+
+
+class ParsedContent:
+    """
+    Wiki content split into HTML fragments and WikiWords. The WikiWords are
+    resolved to links by `to_html`, so they can all be looked up at once.
+    """
+
+    def __init__(self, parts: list[str], slug_indexes: list[int]) -> None:
+        self.parts = parts
+        self.slug_indexes = slug_indexes
+
+    @property
+    def slugs(self) -> set[str]:
+        return {self.parts[i] for i in self.slug_indexes}
+
+    def to_html(self, links: dict[str, str]) -> SafeString:
+        """
+        Returns the HTML, with each WikiWord replaced by its link markup.
+        """
+        parts = self.parts.copy()
+        for i in self.slug_indexes:
+            parts[i] = links[parts[i]]
+        return mark_safe("".join(parts))  # noqa: S308
+
+
+def parse_content(content: str) -> ParsedContent:
+    """
+    Splits the given wiki content into HTML fragments and WikiWords.
+    """
+    content = content.replace("\r\n", "\n").replace("\r", "\n")
+
+    parts = ["<p>"]
+    slug_indexes = []
+    # Words repeat a lot, so each distinct token is only rendered once.
+    separators: dict[str, str] = {}
+    words: dict[str, str | tuple[str, ...]] = {}
+
+    for i, token in enumerate(SEPARATOR_RE.split(content)):
+        if i % 2:
+            if token not in separators:
+                separators[token] = _render_separator(token)
+            parts.append(separators[token])
+            continue
+
+        if token not in words:
+            words[token] = _render_word(token)
+        word = words[token]
+        if isinstance(word, str):
+            parts.append(word)
+        else:
+            # Every other piece is a WikiWord
+            slug_indexes.extend(range(len(parts) + 1, len(parts) + len(word), 2))
+            parts.extend(word)
+
+    parts.append("</p>")
+    return ParsedContent(parts, slug_indexes)
+
+
+def _render_separator(separator: str) -> str:
+    # Newlines end a line or, two or more, a paragraph.
+    separator = html.escape(separator)
+    if "\n" in separator:
+        separator = NEWLINES_RE.sub(_replace_newlines, separator)
+    return separator
+
+
+def _render_word(word: str) -> str | tuple[str, ...]:
+    """
+    Returns the HTML of the given word, or, if it contains WikiWords, a tuple
+    of HTML fragments and WikiWords, alternating.
+    """
+    if ("." in word or "@" in word or ":" in word) and len(word) <= MAX_URL_LENGTH:
+        word = urlize(word, nofollow=True, autoescape=True)
+    elif "&" in word:
+        # Words contain no other characters escaped by `html.escape`.
+        word = word.replace("&", "&amp;")
+
+    find_slugs = _find_default_slugs if WIKI_SLUG == DEFAULT_WIKI_SLUG else _find_slugs
+    pieces = []
+    start = 0
+    for slug_start, slug_end in find_slugs(word):
+        pieces.extend((word[start:slug_start], word[slug_start:slug_end]))
+        start = slug_end
+    if not pieces:
+        return str(word)
+    pieces.append(word[start:])
+    return tuple(pieces)
+
+
+def _replace_newlines(m: re.Match) -> str:
+    return "<br>" if len(m.group()) == 1 else "</p>\n\n<p>"
+
+
+def _find_slugs(word: str) -> Iterator[tuple[int, int]]:
+    """
+    Yields the start and end of each WikiWord in the given word, for a
+    custom `WAKAWAKA_SLUG_REGEX`.
+    """
+    for m in WIKI_WORDS_REGEX.finditer(word):
+        yield m.start(1), m.end(1)
+
+
+def _find_default_slugs(word: str) -> Iterator[tuple[int, int]]:
+    """
+    Yields the start and end of each WikiWord in the given word, matching
+    exactly what the default `WIKI_WORDS_REGEX` matches, in linear time.
+
+    A slug is a chain of segments separated by slashes. It must be followed
+    by a non word character. If the whole chain isn't, the slug ends at the
+    slash before the last segment.
+    """
+    segments = [m.span() for m in SEGMENT_RE.finditer(word)]
+    i = 0
+    while i < len(segments):
+        j = i
+        while (
+            j + 1 < len(segments)
+            and segments[j + 1][0] == segments[j][1] + 1
+            and word[segments[j][1]] == "/"
+        ):
+            j += 1
+
+        if WORD_CHAR_RE.match(word, segments[j][1]):
+            if j == i:
+                i += 1
+                continue
+            j -= 1
+
+        yield segments[i][0], segments[j][1]
+        i = j + 1
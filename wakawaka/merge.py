@@ -0,0 +1,114 @@
+"""
+Line based three-way merge of concurrent edits.
+
+Both edits are compared to the revision they started from, their base. The
+regions where neither edit changed the base are kept; in between, a change
+made by only one of the edits, or the same change made by both, is taken
+over. Where both edits changed the same lines differently, the merge has a
+conflict, which is marked in the result with both versions of the lines.
+
+Lines are compared without their line endings, since browsers submit text
+with CRLF line endings, while other revisions may have been stored with LF.
+"""
+
+from __future__ import annotations
+
+import difflib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+CONFLICT_START = "<<<<<<< Your changes"
+CONFLICT_SEPARATOR = "======="
+CONFLICT_END = ">>>>>>> Current revision"
+
+
+def matching_blocks(base: list[str], other: list[str]) -> list[tuple[int, int, int]]:
+    matcher = difflib.SequenceMatcher(None, base, other, autojunk=False)
+    return matcher.get_matching_blocks()
+
+
+def stable_regions(
+    base: list[str], ours: list[str], theirs: list[str]
+) -> Iterator[tuple[int, int, int, int]]:
+    """
+    Yields the regions of the base left unchanged by both edits, as the start
+    and end in the base and the start in each edit. Ends with an empty
+    region at the end of all three.
+    """
+    ours_blocks = matching_blocks(base, ours)
+    theirs_blocks = matching_blocks(base, theirs)
+    i = j = 0
+    while i < len(ours_blocks) and j < len(theirs_blocks):
+        ours_base, ours_start, ours_size = ours_blocks[i]
+        theirs_base, theirs_start, theirs_size = theirs_blocks[j]
+        start = max(ours_base, theirs_base)
+        end = min(ours_base + ours_size, theirs_base + theirs_size)
+        if start < end:
+            yield (
+                start,
+                end,
+                ours_start + start - ours_base,
+                theirs_start + start - theirs_base,
+            )
+        if ours_base + ours_size < theirs_base + theirs_size:
+            i += 1
+        else:
+            j += 1
+    yield len(base), len(base), len(ours), len(theirs)
+
+
+def split_lines(text: str) -> list[str]:
+    """
+    Splits the text into lines without their line endings, so neither a
+    missing newline at the end nor CRLF line endings count as a change.
+    """
+    lines = text.replace("\r\n", "\n").split("\n")
+    # The text ends with a newline, or is empty.
+    if lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def merge(base: str, ours: str, theirs: str) -> tuple[str, int]:
+    """
+    Merges the edits `ours` and `theirs` of the `base` text. Returns the
+    merged text, with the line endings of `ours`, and the number of conflicts
+    marked in it.
+    """
+    base_lines = split_lines(base)
+    ours_lines = split_lines(ours)
+    theirs_lines = split_lines(theirs)
+
+    merged: list[str] = []
+    conflicts = 0
+    base_pos = ours_pos = theirs_pos = 0
+    for start, end, ours_start, theirs_start in stable_regions(
+        base_lines, ours_lines, theirs_lines
+    ):
+        # The lines changed by either edit since the last stable region.
+        base_changed = base_lines[base_pos:start]
+        ours_changed = ours_lines[ours_pos:ours_start]
+        theirs_changed = theirs_lines[theirs_pos:theirs_start]
+        if theirs_changed in (ours_changed, base_changed):
+            merged.extend(ours_changed)
+        elif ours_changed == base_changed:
+            merged.extend(theirs_changed)
+        else:
+            merged.append(CONFLICT_START)
+            merged.extend(ours_changed)
+            merged.append(CONFLICT_SEPARATOR)
+            merged.extend(theirs_changed)
+            merged.append(CONFLICT_END)
+            conflicts += 1
+
+        merged.extend(base_lines[start:end])
+        base_pos = end
+        ours_pos = ours_start + end - start
+        theirs_pos = theirs_start + end - start
+    newline = "\r\n" if "\r\n" in ours else "\n"
+    text = newline.join(merged)
+    if merged and ours.endswith("\n"):
+        text += newline
+    return text, conflicts
@@ -0,0 +1,308 @@
+"""
+Opt-in instrumentation of the wiki views.
+
+If `WAKAWAKA_METRICS` is True, each view records its latency and number of
+database queries, along with the time spent in sections like rendering the
+content, resolving WikiWords or rendering the template, and the hits and
+misses of the render and diff caches. The metrics are kept in memory per
+process and exposed in the Prometheus text format by the `metrics` view.
+After each request, the `view_measured` signal is sent with the measurements
+of that request, e.g. to forward them to another metrics system.
+
+While disabled, instrumented views only check the setting, and timers and
+cache counters don't do anything.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Callable
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.dispatch import Signal
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from django.http import HttpRequest, HttpResponse
+
+# Sent after each request to an instrumented view, with the arguments
+# `request`, `response`, `view`, `duration`, `queries` and `sections`.
+view_measured = Signal()
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# The measurements of the current request, while in an instrumented view.
+_measurement: ContextVar[_Measurement | None] = ContextVar(
+    "wakawaka_measurement", default=None
+)
+
+
+def is_enabled() -> bool:
+    return getattr(settings, "WAKAWAKA_METRICS", False)
+
+
+class Histogram:
+    """
+    Counts observed values in buckets of upper bounds, like a Prometheus
+    histogram.
+    """
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> Iterator[tuple[str, int]]:
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            yield str(bound), total
+
+
+class Registry:
+    """
+    The metrics recorded in this process.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.view_durations: dict[str, Histogram] = {}
+        self.view_queries: dict[str, Histogram] = {}
+        self.section_durations: dict[tuple[str, str], Histogram] = {}
+        self.cache_requests: Counter[tuple[str, str]] = Counter()
+
+    def observe_view(
+        self, view: str, duration: float, queries: int, sections: dict[str, float]
+    ) -> None:
+        with self.lock:
+            _histogram(self.view_durations, view, DURATION_BUCKETS).observe(duration)
+            _histogram(self.view_queries, view, QUERY_BUCKETS).observe(queries)
+            for section, seconds in sections.items():
+                _histogram(
+                    self.section_durations, (view, section), DURATION_BUCKETS
+                ).observe(seconds)
+
+    def count_cache_request(self, cache: str, hit: bool) -> None:
+        with self.lock:
+            self.cache_requests[cache, "hit" if hit else "miss"] += 1
+
+    def to_prometheus(self) -> str:
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self.lock:
+            _histogram_lines(
+                lines,
+                "wakawaka_view_duration_seconds",
+                "Time spent in a view.",
+                {(("view", view),): h for view, h in self.view_durations.items()},
+            )
+            _histogram_lines(
+                lines,
+                "wakawaka_view_queries",
+                "Number of database queries of a view.",
+                {(("view", view),): h for view, h in self.view_queries.items()},
+            )
+            _histogram_lines(
+                lines,
+                "wakawaka_section_duration_seconds",
+                "Time spent in a section of a view, per request.",
+                {
+                    (("view", view), ("section", section)): h
+                    for (view, section), h in self.section_durations.items()
+                },
+            )
+            lines.append("# HELP wakawaka_cache_requests_total Cache lookups.")
+            lines.append("# TYPE wakawaka_cache_requests_total counter")
+            for (cache, result), count in sorted(self.cache_requests.items()):
+                labels = _labels((("cache", cache), ("result", result)))
+                lines.append(f"wakawaka_cache_requests_total{labels} {count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def _histogram(
+    histograms: dict[Any, Histogram], key: Any, buckets: tuple[float, ...]
+) -> Histogram:
+    if key not in histograms:
+        histograms[key] = Histogram(buckets)
+    return histograms[key]
+
+
+def _labels(labels: tuple[tuple[str, str], ...]) -> str:
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _histogram_lines(
+    lines: list[str],
+    name: str,
+    description: str,
+    histograms: dict[tuple[tuple[str, str], ...], Histogram],
+) -> None:
+    lines.append(f"# HELP {name} {description}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, histogram in sorted(histograms.items(), key=lambda item: item[0]):
+        for bound, count in histogram.cumulative_counts():
+            lines.append(f"{name}_bucket{_labels((*labels, ('le', bound)))} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+
+class _Measurement:
+    """
+    The queries and section timings of one request.
+    """
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.sections: dict[str, float] = {}
+
+    def record(
+        self,
+        view: Callable,
+        request: HttpRequest,
+        response: HttpResponse,
+        duration: float,
+    ) -> None:
+        registry.observe_view(view.__name__, duration, self.queries, self.sections)
+        view_measured.send(
+            sender=view,
+            request=request,
+            response=response,
+            view=view.__name__,
+            duration=duration,
+            queries=self.queries,
+            sections=self.sections,
+        )
+
+
+def _count_query(execute: Callable, *query: Any) -> Any:
+    measurement = _measurement.get()
+    if measurement is not None:
+        measurement.queries += 1
+    return execute(*query)
+
+
+def _watch_connections() -> None:
+    """
+    Counts the queries of the connections of the current thread. The query
+    counter is installed once per connection and counts the queries of the
+    request it runs for, which is looked up in the context. Concurrent async
+    requests share the connections of a single thread, so installing and
+    removing a counter per request would count each other's queries.
+    """
+    for connection in connections.all():
+        if _count_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(_count_query)
+
+
+def instrument(view: Callable[..., HttpResponse]) -> Callable[..., HttpResponse]:
+    """
+    Records the latency, the number of queries and the section timings of
+    each request to the given view, if metrics are enabled. Async views are
+    supported as well.
+    """
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapper(
+            request: HttpRequest, *args: Any, **kwargs: Any
+        ) -> HttpResponse:
+            if not is_enabled():
+                return await view(request, *args, **kwargs)
+
+            # The async ORM runs queries in a thread, with the connections
+            # of that thread.
+            await sync_to_async(_watch_connections)()
+            measurement = _Measurement()
+            token = _measurement.set(measurement)
+            try:
+                start = time.perf_counter()
+                response = await view(request, *args, **kwargs)
+                duration = time.perf_counter() - start
+            finally:
+                _measurement.reset(token)
+
+            measurement.record(view, request, response, duration)
+            return response
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        if not is_enabled():
+            return view(request, *args, **kwargs)
+
+        _watch_connections()
+        measurement = _Measurement()
+        token = _measurement.set(measurement)
+        try:
+            start = time.perf_counter()
+            response = view(request, *args, **kwargs)
+            duration = time.perf_counter() - start
+        finally:
+            _measurement.reset(token)
+
+        measurement.record(view, request, response, duration)
+        return response
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def _timer(sections: dict[str, float], section: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        sections[section] = sections.get(section, 0.0) + duration
+
+
+def timer(section: str) -> contextlib.AbstractContextManager:
+    """
+    Times the code within the block as the given section of the current
+    request. Does nothing outside of an instrumented view::
+
+        >>> with metrics.timer("template"):
+        ...     response = render(request, template_name, context)
+    """
+    measurement = _measurement.get()
+    if measurement is None:
+        return contextlib.nullcontext()
+    return _timer(measurement.sections, section)
+
+
+def count_cache_request(cache: str, hit: bool) -> None:
+    """
+    Counts a lookup in the given cache, e.g. `render` or `diff`. Does nothing
+    outside of an instrumented view.
+    """
+    if _measurement.get() is not None:
+        registry.count_cache_request(cache, hit)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from wakawaka import routers
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from django.http import HttpRequest, HttpResponse
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+
+class ReplicaPinningMiddleware:
+    """
+    Lets `wakawaka.routers.ReplicaRouter` send the reads of safe requests
+    to a read replica, unless the session is pinned to the primary database.
+
+    Requests with other methods, like the POST of the edit form, read from
+    the primary. If a request wrote to the primary, its session is pinned
+    to the primary for `WAKAWAKA_REPLICA_PIN_SECONDS`, so the following
+    requests don't see content the replicas haven't caught up with yet.
+
+    Must come after the `SessionMiddleware`. Does nothing unless
+    `WAKAWAKA_READ_REPLICAS` is set.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(
+        self,
+        get_response: Callable[[HttpRequest], HttpResponse | Awaitable[HttpResponse]],
+    ) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not routers.get_read_replicas():
+            return self.get_response(request)
+
+        session = getattr(request, "session", None)
+        pinned_until = (
+            session.get(routers.PINNED_UNTIL_SESSION_KEY)
+            if session is not None
+            else None
+        )
+        state = routers.RequestState(is_pinned(request, pinned_until))
+        token = routers.request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.request_state.reset(token)
+        if state.written and session is not None:
+            session[routers.PINNED_UNTIL_SESSION_KEY] = pin_until()
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if not routers.get_read_replicas():
+            return await self.get_response(request)
+
+        session = getattr(request, "session", None)
+        pinned_until = (
+            await session.aget(routers.PINNED_UNTIL_SESSION_KEY)
+            if session is not None
+            else None
+        )
+        state = routers.RequestState(is_pinned(request, pinned_until))
+        token = routers.request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.request_state.reset(token)
+        if state.written and session is not None:
+            await session.aset(routers.PINNED_UNTIL_SESSION_KEY, pin_until())
+        return response
+
+
+def is_pinned(request: HttpRequest, pinned_until: float | None) -> bool:
+    """
+    Returns whether all reads of the request go to the primary database.
+    """
+    if request.method not in SAFE_METHODS:
+        return True
+    return pinned_until is not None and pinned_until > time.time()
+
+
+def pin_until() -> float:
+    return time.time() + routers.get_pin_seconds()
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_current_revision(apps, schema_editor):
+    WikiPage = apps.get_model('wakawaka', 'WikiPage')
+    Revision = apps.get_model('wakawaka', 'Revision')
+    latest = Revision.objects.filter(page=OuterRef('pk')).order_by('-modified', '-pk')
+    WikiPage.objects.update(current_revision=Subquery(latest.values('pk')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wakawaka', '0003_alter_revision_options_alter_wikipage_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wikipage',
+            name='current_revision',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wakawaka.revision', verbose_name='current revision'),
+        ),
+        migrations.RunPython(backfill_current_revision, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:02
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_pages(apps, schema_editor):
+    """
+    Slugs are unique from now on. Merge the revisions of pages sharing a slug
+    into the oldest of these pages, and delete the others.
+    """
+    WikiPage = apps.get_model('wakawaka', 'WikiPage')
+    Revision = apps.get_model('wakawaka', 'Revision')
+    duplicates = (
+        WikiPage.objects.values('slug')
+        .annotate(num=Count('pk'))
+        .filter(num__gt=1)
+        .values_list('slug', flat=True)
+    )
+    for slug in duplicates.iterator():
+        keep, *others = WikiPage.objects.filter(slug=slug).order_by('pk')
+        Revision.objects.filter(page__in=others).update(page=keep)
+        WikiPage.objects.filter(pk__in=[p.pk for p in others]).delete()
+        keep.current_revision = (
+            Revision.objects.filter(page=keep).order_by('-modified', '-pk').first()
+        )
+        keep.save(update_fields=['current_revision'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wakawaka', '0004_wikipage_current_revision'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_pages, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='wikipage',
+            name='slug',
+            field=models.CharField(max_length=255, unique=True, verbose_name='slug'),
+        ),
+        migrations.AddIndex(
+            model_name='revision',
+            index=models.Index(fields=['page', '-modified'], name='wakawaka_rev_page_modified'),
+        ),
+    ]
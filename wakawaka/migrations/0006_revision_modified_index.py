@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wakawaka', '0005_unique_slug_revision_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='revision',
+            index=models.Index(fields=['-modified', '-id'], name='wakawaka_rev_modified'),
+        ),
+    ]
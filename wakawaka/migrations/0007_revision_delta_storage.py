@@ -0,0 +1,48 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wakawaka', '0006_revision_modified_index'),
+    ]
+
+    operations = [
+        # The content field is now accessed through the Revision.content
+        # property. The database column stays the same.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name='revision',
+                    old_name='content',
+                    new_name='raw_content',
+                ),
+                migrations.AlterField(
+                    model_name='revision',
+                    name='raw_content',
+                    field=models.TextField(blank=True, db_column='content', verbose_name='content'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='revision',
+            name='delta',
+            field=models.BinaryField(blank=True, null=True, verbose_name='delta'),
+        ),
+        migrations.AddField(
+            model_name='revision',
+            name='delta_base',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wakawaka.revision', verbose_name='delta base'),
+        ),
+        migrations.AddField(
+            model_name='revision',
+            name='delta_depth',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='delta depth'),
+        ),
+        migrations.AddField(
+            model_name='revision',
+            name='delta_keyframe',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wakawaka.revision', verbose_name='delta keyframe'),
+        ),
+    ]
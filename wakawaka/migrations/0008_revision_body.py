@@ -0,0 +1,126 @@
+import hashlib
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Number of revisions updated at once.
+CHUNK_SIZE = 500
+
+
+def apply_delta(base, delta):
+    """
+    A copy of `wakawaka.storage.apply_delta` as of this migration.
+    """
+    base_lines = base.splitlines(keepends=True)
+    ops = json.loads(zlib.decompress(delta))
+    return ''.join(op if isinstance(op, str) else ''.join(base_lines[op[0]:op[1]]) for op in ops)
+
+
+def get_text(Revision, rev_id, known):
+    """
+    Returns the content of the revision with the given pk, which is usually
+    known already as the predecessor of the current revision.
+    """
+    chain = []
+    while rev_id not in known:
+        rev = Revision.objects.only('raw_content', 'delta', 'delta_base').get(pk=rev_id)
+        if rev.delta_base_id is None:
+            known[rev_id] = rev.raw_content
+            break
+        chain.append(rev)
+        rev_id = rev.delta_base_id
+
+    text = known[rev_id]
+    for rev in reversed(chain):
+        text = apply_delta(text, rev.delta)
+    return text
+
+
+def move_to_bodies(apps, schema_editor):
+    """
+    Moves the content of each keyframe revision into a body, page by page
+    and in chunks. Identical content is only stored once.
+    """
+    WikiPage = apps.get_model('wakawaka', 'WikiPage')
+    Revision = apps.get_model('wakawaka', 'Revision')
+    RevisionBody = apps.get_model('wakawaka', 'RevisionBody')
+
+    def flush(revisions, bodies):
+        RevisionBody.objects.bulk_create(
+            [RevisionBody(digest=digest, content=text) for digest, text in bodies.items()],
+            ignore_conflicts=True,
+        )
+        Revision.objects.bulk_update(revisions, ['content_hash', 'body'])
+
+    for page_id in WikiPage.objects.order_by('pk').values_list('pk', flat=True):
+        queryset = Revision.objects.filter(page=page_id).order_by('modified', 'pk')
+        known = {}
+        revisions, bodies = [], {}
+        for rev in queryset.only('raw_content', 'delta', 'delta_base').iterator(chunk_size=CHUNK_SIZE):
+            if rev.delta_base_id is None:
+                text = rev.raw_content
+            else:
+                text = apply_delta(get_text(Revision, rev.delta_base_id, known), rev.delta)
+
+            rev.content_hash = hashlib.sha256(text.encode()).hexdigest()
+            if rev.delta_base_id is None:
+                rev.body_id = rev.content_hash
+                bodies[rev.content_hash] = text
+
+            revisions.append(rev)
+            known = {rev.pk: text}
+            if len(revisions) >= CHUNK_SIZE:
+                flush(revisions, bodies)
+                revisions, bodies = [], {}
+        flush(revisions, bodies)
+
+
+def move_from_bodies(apps, schema_editor):
+    Revision = apps.get_model('wakawaka', 'Revision')
+
+    queryset = Revision.objects.filter(body__isnull=False).select_related('body').order_by('pk')
+    last_pk = 0
+    while revisions := list(queryset.filter(pk__gt=last_pk)[:CHUNK_SIZE]):
+        for rev in revisions:
+            rev.raw_content = rev.body.content
+        Revision.objects.bulk_update(revisions, ['raw_content'])
+        last_pk = revisions[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wakawaka', '0007_revision_delta_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevisionBody',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='digest')),
+                ('content', models.TextField(blank=True, verbose_name='content')),
+            ],
+            options={
+                'verbose_name': 'Revision body',
+                'verbose_name_plural': 'Revision bodies',
+            },
+        ),
+        migrations.AddField(
+            model_name='revision',
+            name='content_hash',
+            field=models.CharField(db_index=True, default='', max_length=64, verbose_name='content hash'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='revision',
+            name='body',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='revisions', to='wakawaka.revisionbody', verbose_name='body'),
+        ),
+        migrations.RunPython(move_to_bodies, move_from_bodies),
+        migrations.RemoveField(
+            model_name='revision',
+            name='raw_content',
+        ),
+    ]
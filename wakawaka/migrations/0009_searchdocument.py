@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:21
+
+import json
+import re
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Number of pages indexed at once.
+CHUNK_SIZE = 500
+
+
+def split_words(slug):
+    """
+    A copy of `wakawaka.search.split_words` as of this migration.
+    """
+    return re.sub(r'(?<=[a-z0-9])(?=[A-Z])|/', ' ', slug)
+
+
+def apply_delta(base, delta):
+    """
+    A copy of `wakawaka.storage.apply_delta` as of this migration.
+    """
+    base_lines = base.splitlines(keepends=True)
+    ops = json.loads(zlib.decompress(delta))
+    return ''.join(op if isinstance(op, str) else ''.join(base_lines[op[0]:op[1]]) for op in ops)
+
+
+def read_content(Revision, rev):
+    """
+    Returns the content of the given revision, applying its deltas on top of
+    their keyframe.
+    """
+    deltas = []
+    while rev.delta_base_id is not None:
+        deltas.append(rev.delta)
+        rev = Revision.objects.select_related('body').only('body__content', 'delta', 'delta_base').get(pk=rev.delta_base_id)
+
+    text = rev.body.content
+    for delta in reversed(deltas):
+        text = apply_delta(text, delta)
+    return text
+
+
+def index_pages(apps, schema_editor):
+    """
+    Stores the search documents of the existing pages, like the
+    `wakawaka_reindex` management command. The search backend indexes them
+    once it's installed, after migrating.
+    """
+    WikiPage = apps.get_model('wakawaka', 'WikiPage')
+    Revision = apps.get_model('wakawaka', 'Revision')
+    SearchDocument = apps.get_model('wakawaka', 'SearchDocument')
+
+    queryset = WikiPage.objects.filter(current_revision__isnull=False).select_related('current_revision__body').order_by('pk')
+    last_pk = 0
+    while pages := list(queryset.filter(pk__gt=last_pk)[:CHUNK_SIZE]):
+        SearchDocument.objects.bulk_create([
+            SearchDocument(
+                page=page,
+                slug=page.slug,
+                title=split_words(page.slug),
+                content=read_content(Revision, page.current_revision),
+            )
+            for page in pages
+        ])
+        last_pk = pages[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wakawaka', '0008_revision_body'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='wakawaka.wikipage')),
+                ('slug', models.CharField(max_length=255, verbose_name='slug')),
+                ('title', models.CharField(max_length=255, verbose_name='title')),
+                ('content', models.TextField(blank=True, verbose_name='content')),
+            ],
+            options={
+                'verbose_name': 'Search document',
+                'verbose_name_plural': 'Search documents',
+            },
+        ),
+        migrations.RunPython(index_pages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:23
+
+import json
+import re
+import zlib
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Number of pages processed at once.
+CHUNK_SIZE = 500
+
+# A copy of `wakawaka.wikiwords.DEFAULT_WIKI_SLUG` as of this migration.
+DEFAULT_WIKI_SLUG = r'((([A-Z]+[a-z]+){2,})(/([A-Z]+[a-z]+){2,})*)'
+
+
+def apply_delta(base, delta):
+    """
+    A copy of `wakawaka.storage.apply_delta` as of this migration.
+    """
+    base_lines = base.splitlines(keepends=True)
+    ops = json.loads(zlib.decompress(delta))
+    return ''.join(op if isinstance(op, str) else ''.join(base_lines[op[0]:op[1]]) for op in ops)
+
+
+def read_content(Revision, rev):
+    """
+    Returns the content of the given revision, applying its deltas on top of
+    their keyframe.
+    """
+    deltas = []
+    while rev.delta_base_id is not None:
+        deltas.append(rev.delta)
+        rev = Revision.objects.select_related('body').only('body__content', 'delta', 'delta_base').get(pk=rev.delta_base_id)
+
+    text = rev.body.content
+    for delta in reversed(deltas):
+        text = apply_delta(text, delta)
+    return text
+
+
+def store_links(apps, schema_editor):
+    """
+    Stores the links of the existing pages, like the
+    `wakawaka_backfill_links` management command.
+    """
+    WikiPage = apps.get_model('wakawaka', 'WikiPage')
+    Revision = apps.get_model('wakawaka', 'Revision')
+    WikiLink = apps.get_model('wakawaka', 'WikiLink')
+
+    slug_regex = getattr(settings, 'WAKAWAKA_SLUG_REGEX', DEFAULT_WIKI_SLUG)
+    wikiwords = re.compile(rf'\b{slug_regex}\b', re.UNICODE)
+
+    queryset = WikiPage.objects.filter(current_revision__isnull=False).select_related('current_revision__body').order_by('pk')
+    last_pk = 0
+    while pages := list(queryset.filter(pk__gt=last_pk)[:CHUNK_SIZE]):
+        links = []
+        for page in pages:
+            content = read_content(Revision, page.current_revision)
+            slugs = {m.group(1) for m in wikiwords.finditer(content)} - {page.slug}
+            links.extend(WikiLink(source=page, target_slug=slug) for slug in slugs)
+        WikiLink.objects.bulk_create(links)
+        last_pk = pages[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wakawaka', '0009_searchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WikiLink',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_slug', models.CharField(db_index=True, max_length=255, verbose_name='target slug')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_links', to='wakawaka.wikipage', verbose_name='source')),
+            ],
+            options={
+                'verbose_name': 'Wiki link',
+                'verbose_name_plural': 'Wiki links',
+                'constraints': [models.UniqueConstraint(fields=('source', 'target_slug'), name='wakawaka_unique_link')],
+            },
+        ),
+        migrations.RunPython(store_links, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Number of pages fetched and nodes stored at once.
+CHUNK_SIZE = 1000
+
+SEPARATOR = '/'
+
+
+def build_node(PageNode, path, page_id, pages):
+    """
+    A copy of `wakawaka.hierarchy.build_node` as of this migration.
+    """
+    parent, _sep, name = path.rpartition(SEPARATOR)
+    letter = name[:1].upper()
+    return PageNode(
+        path=path,
+        parent=parent,
+        name=name,
+        bucket=letter if letter.isalpha() else '#',
+        page_id=page_id,
+        pages=pages,
+    )
+
+
+def build_nodes(apps, schema_editor):
+    """
+    Stores the page hierarchy of the existing pages, like the
+    `wakawaka_rebuild_index` management command.
+    """
+    WikiPage = apps.get_model('wakawaka', 'WikiPage')
+    PageNode = apps.get_model('wakawaka', 'PageNode')
+
+    # The page id and the number of pages below each node.
+    nodes = {}
+    last_pk = 0
+    while pages := list(WikiPage.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'slug')[:CHUNK_SIZE]):
+        for pk, slug in pages:
+            nodes.setdefault(slug, [None, 0])[0] = pk
+            parts = slug.split(SEPARATOR)
+            for i in range(1, len(parts)):
+                nodes.setdefault(SEPARATOR.join(parts[:i]), [None, 0])[1] += 1
+        last_pk = pages[-1][0]
+
+    PageNode.objects.bulk_create(
+        [build_node(PageNode, path, page_id, pages) for path, (page_id, pages) in sorted(nodes.items())],
+        batch_size=CHUNK_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wakawaka', '0011_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageNode',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True, verbose_name='path')),
+                ('parent', models.CharField(blank=True, max_length=255, verbose_name='parent')),
+                ('name', models.CharField(max_length=255, verbose_name='name')),
+                ('bucket', models.CharField(max_length=1, verbose_name='bucket')),
+                ('pages', models.PositiveIntegerField(default=0, verbose_name='pages below')),
+                ('page', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='node', to='wakawaka.wikipage', verbose_name='page')),
+            ],
+            options={
+                'verbose_name': 'Page node',
+                'verbose_name_plural': 'Page nodes',
+                'indexes': [models.Index(fields=['parent', 'name'], name='wakawaka_pagenode_children'), models.Index(fields=['parent', 'bucket', 'name'], name='wakawaka_pagenode_bucket')],
+            },
+        ),
+        migrations.RunPython(build_nodes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wakawaka', '0012_pagenode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='revision',
+            name='lines_added',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='lines added'),
+        ),
+        migrations.AddField(
+            model_name='revision',
+            name='lines_removed',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='lines removed'),
+        ),
+        migrations.AddField(
+            model_name='revision',
+            name='size',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='size in bytes'),
+        ),
+        migrations.AddField(
+            model_name='revision',
+            name='size_delta',
+            field=models.IntegerField(blank=True, null=True, verbose_name='size change in bytes'),
+        ),
+        migrations.AddField(
+            model_name='revision',
+            name='word_count',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='word count'),
+        ),
+    ]
@@ -1,15 +1,27 @@
 from __future__ import annotations
 
+from typing import Any
+
 from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext
 from django.utils.translation import gettext_lazy as _
 
+from wakawaka import links, revision_stats, search, storage
+
 
 class WikiPage(models.Model):
-    slug = models.CharField(_("slug"), max_length=255)
+    slug = models.CharField(_("slug"), max_length=255, unique=True)
     created = models.DateTimeField(_("created"), auto_now_add=True)
     modified = models.DateTimeField(_("modified"), auto_now=True)
+    current_revision = models.ForeignKey(
+        "Revision",
+        verbose_name=_("current revision"),
+        blank=True,
+        null=True,
+        related_name="+",
+        on_delete=models.SET_NULL,
+    )
 
     class Meta:
         verbose_name = _("Wiki page")
@@ -20,8 +32,38 @@ class WikiPage(models.Model):
         return self.slug
 
     @property
-    def current(self) -> WikiPage:
-        return self.revisions.latest()
+    def current(self) -> Revision:
+        if self.current_revision_id is None:
+            self.current_revision = self.revisions.latest()
+        return self.current_revision
+
+    def update_current_revision(self) -> None:
+        """
+        Points `current_revision` to the latest revision of this page.
+        """
+        self.current_revision = self.revisions.order_by("-modified", "-pk").first()
+        WikiPage.objects.filter(pk=self.pk).update(
+            current_revision=self.current_revision,
+        )
+        search.index_page(self, self.current_revision)
+        links.update_links(self, self.current_revision)
+
+
+class RevisionBody(models.Model):
+    """
+    The content of one or more revisions, stored once and keyed by the
+    SHA-256 digest of the content.
+    """
+
+    digest = models.CharField(_("digest"), max_length=64, primary_key=True)
+    content = models.TextField(_("content"), blank=True)
+
+    class Meta:
+        verbose_name = _("Revision body")
+        verbose_name_plural = _("Revision bodies")
+
+    def __str__(self) -> str:
+        return self.digest
 
 
 class Revision(models.Model):
@@ -30,7 +72,33 @@ class Revision(models.Model):
         related_name="revisions",
         on_delete=models.CASCADE,
     )
-    content = models.TextField(_("content"))
+    content_hash = models.CharField(_("content hash"), max_length=64, db_index=True)
+    body = models.ForeignKey(
+        RevisionBody,
+        verbose_name=_("body"),
+        blank=True,
+        null=True,
+        related_name="revisions",
+        on_delete=models.PROTECT,
+    )
+    delta = models.BinaryField(_("delta"), blank=True, null=True)
+    delta_base = models.ForeignKey(
+        "self",
+        verbose_name=_("delta base"),
+        blank=True,
+        null=True,
+        related_name="+",
+        on_delete=models.SET_NULL,
+    )
+    delta_keyframe = models.ForeignKey(
+        "self",
+        verbose_name=_("delta keyframe"),
+        blank=True,
+        null=True,
+        related_name="+",
+        on_delete=models.SET_NULL,
+    )
+    delta_depth = models.PositiveSmallIntegerField(_("delta depth"), default=0)
     message = models.TextField(_("change message"), blank=True)
     creator = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -43,14 +111,159 @@ class Revision(models.Model):
     created = models.DateTimeField(_("created"), auto_now_add=True)
     modified = models.DateTimeField(_("modified"), auto_now=True)
 
+    # Metadata of the content, see `wakawaka.revision_stats`.
+    size = models.PositiveIntegerField(_("size in bytes"), blank=True, null=True)
+    size_delta = models.IntegerField(_("size change in bytes"), blank=True, null=True)
+    lines_added = models.PositiveIntegerField(_("lines added"), blank=True, null=True)
+    lines_removed = models.PositiveIntegerField(
+        _("lines removed"), blank=True, null=True
+    )
+    word_count = models.PositiveIntegerField(_("word count"), blank=True, null=True)
+
+    _content = None
+    _content_changed = False
+
     class Meta:
         verbose_name = _("Revision")
         verbose_name_plural = _("Revisions")
         ordering = ("-modified",)
         get_latest_by = "modified"
+        indexes = (
+            models.Index(
+                fields=("page", "-modified"), name="wakawaka_rev_page_modified"
+            ),
+            models.Index(fields=("-modified", "-id"), name="wakawaka_rev_modified"),
+        )
 
     def __str__(self) -> str:
         return gettext("Revision %(created)s for %(page_slug)s") % {
             "created": self.created.strftime("%Y%m%d-%H%M"),
             "page_slug": self.page.slug,
         }
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if self._content_changed:
+            parent = revision_stats.parent_revision(self)
+            revision_stats.set_stats(
+                self, self._content, parent.content if parent else None
+            )
+            storage.store_content(self, self._content)
+            self._content_changed = False
+        super().save(*args, **kwargs)
+
+    @property
+    def content(self) -> str:
+        """
+        The full content of this revision, independent of how it's stored.
+        """
+        if self._content is None:
+            self._content = storage.read_content(self)
+        return self._content
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._content = value
+        self._content_changed = True
+
+
+class SearchDocument(models.Model):
+    """
+    The searchable content of a page, which is the content of its current
+    revision. See `wakawaka.search`.
+    """
+
+    page = models.OneToOneField(
+        WikiPage,
+        primary_key=True,
+        related_name="search_document",
+        on_delete=models.CASCADE,
+    )
+    slug = models.CharField(_("slug"), max_length=255)
+    title = models.CharField(_("title"), max_length=255)
+    content = models.TextField(_("content"), blank=True)
+
+    class Meta:
+        verbose_name = _("Search document")
+        verbose_name_plural = _("Search documents")
+
+    def __str__(self) -> str:
+        return self.slug
+
+
+class WikiLink(models.Model):
+    """
+    A link from the current revision of a page to another page, which may
+    not exist yet. See `wakawaka.links`.
+    """
+
+    source = models.ForeignKey(
+        WikiPage,
+        verbose_name=_("source"),
+        related_name="outgoing_links",
+        on_delete=models.CASCADE,
+    )
+    target_slug = models.CharField(_("target slug"), max_length=255, db_index=True)
+
+    class Meta:
+        verbose_name = _("Wiki link")
+        verbose_name_plural = _("Wiki links")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("source", "target_slug"), name="wakawaka_unique_link"
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.source_id} -> {self.target_slug}"
+
+
+class ImportCheckpoint(models.Model):
+    """
+    The number of revisions of an input that `wakawaka_import` has stored,
+    so an interrupted import continues where it stopped.
+    """
+
+    name = models.CharField(_("name"), max_length=255, unique=True)
+    position = models.PositiveBigIntegerField(_("position"), default=0)
+    modified = models.DateTimeField(_("modified"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Import checkpoint")
+        verbose_name_plural = _("Import checkpoints")
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.position}"
+
+
+class PageNode(models.Model):
+    """
+    A node of the page hierarchy: the slug of a page, or a prefix of slugs
+    of pages below it. See `wakawaka.hierarchy`.
+    """
+
+    path = models.CharField(_("path"), max_length=255, unique=True)
+    parent = models.CharField(_("parent"), max_length=255, blank=True)
+    name = models.CharField(_("name"), max_length=255)
+    bucket = models.CharField(_("bucket"), max_length=1)
+    page = models.OneToOneField(
+        WikiPage,
+        verbose_name=_("page"),
+        blank=True,
+        null=True,
+        related_name="node",
+        on_delete=models.SET_NULL,
+    )
+    pages = models.PositiveIntegerField(_("pages below"), default=0)
+
+    class Meta:
+        verbose_name = _("Page node")
+        verbose_name_plural = _("Page nodes")
+        indexes = (
+            models.Index(fields=("parent", "name"), name="wakawaka_pagenode_children"),
+            models.Index(
+                fields=("parent", "bucket", "name"), name="wakawaka_pagenode_bucket"
+            ),
+        )
+
+    def __str__(self) -> str:
+        return self.path
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.db.models import Q
+
+if TYPE_CHECKING:
+    from django.db.models import Model, QuerySet
+    from django.http import HttpRequest
+
+NEWER_PARAM = "newer"
+OLDER_PARAM = "older"
+
+
+def encode_cursor(obj: Model) -> str:
+    value = f"{obj.modified.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int] | None:
+    """
+    Returns the `(modified, pk)` pair of the given cursor, or None if it's
+    not a valid cursor.
+    """
+    try:
+        value = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        modified, pk = value.decode().split("|")
+        return datetime.fromisoformat(modified), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+class KeysetPage:
+    """
+    A page of objects, ordered by `-modified, -pk`, with cursors to the
+    newer and older pages.
+    """
+
+    def __init__(
+        self,
+        request: HttpRequest,
+        object_list: list,
+        has_newer: bool,
+        has_older: bool,
+    ) -> None:
+        self.request = request
+        self.object_list = object_list
+        self.has_newer = has_newer and bool(object_list)
+        self.has_older = has_older and bool(object_list)
+
+    def __iter__(self):  # noqa: ANN204
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_other_pages(self) -> bool:
+        return self.has_newer or self.has_older
+
+    def _query_string(self, param: str, obj: Model) -> str:
+        query = self.request.GET.copy()
+        query.pop(NEWER_PARAM, None)
+        query.pop(OLDER_PARAM, None)
+        query[param] = encode_cursor(obj)
+        return query.urlencode()
+
+    def newer_query_string(self) -> str:
+        return self._query_string(NEWER_PARAM, self.object_list[0])
+
+    def older_query_string(self) -> str:
+        return self._query_string(OLDER_PARAM, self.object_list[-1])
+
+
+def keyset_queryset(
+    request: HttpRequest, queryset: QuerySet, per_page: int
+) -> tuple[QuerySet, bool, bool]:
+    """
+    Returns the query for the page of the given queryset which the `newer`
+    or `older` cursor in the query string points to, one object more than
+    fits the page, and whether either cursor was given.
+    """
+    newer = decode_cursor(request.GET.get(NEWER_PARAM, ""))
+    older = decode_cursor(request.GET.get(OLDER_PARAM, ""))
+
+    # Objects newer than the cursor, fetched in ascending order starting at
+    # the cursor, and reversed again.
+    if newer:
+        modified, pk = newer
+        queryset = queryset.filter(
+            Q(modified__gt=modified) | Q(modified=modified, pk__gt=pk),
+        )
+        return queryset.order_by("modified", "pk")[: per_page + 1], True, False
+
+    # Objects older than the cursor, or the most recent ones.
+    if older:
+        modified, pk = older
+        queryset = queryset.filter(
+            Q(modified__lt=modified) | Q(modified=modified, pk__lt=pk),
+        )
+    return queryset.order_by("-modified", "-pk")[: per_page + 1], False, bool(older)
+
+
+def keyset_page(
+    request: HttpRequest, object_list: list, per_page: int, newer: bool, older: bool
+) -> KeysetPage:
+    if newer:
+        has_newer = len(object_list) > per_page
+        object_list = object_list[:per_page][::-1]
+        return KeysetPage(request, object_list, has_newer=has_newer, has_older=True)
+
+    has_older = len(object_list) > per_page
+    return KeysetPage(
+        request, object_list[:per_page], has_newer=older, has_older=has_older
+    )
+
+
+def get_per_page(per_page: int | None) -> int:
+    if per_page is None:
+        return getattr(settings, "WAKAWAKA_REVISIONS_PER_PAGE", 50)
+    return per_page
+
+
+def paginate(
+    request: HttpRequest, queryset: QuerySet, per_page: int | None = None
+) -> KeysetPage:
+    """
+    Returns a page of the given queryset, ordered by `-modified, -pk`, based
+    on the `newer` or `older` cursor in the query string.
+
+    The page is fetched by filtering on the cursor's keys rather than using
+    an OFFSET, so deep pages are as fast as the first one.
+    """
+    per_page = get_per_page(per_page)
+    queryset, newer, older = keyset_queryset(request, queryset, per_page)
+    return keyset_page(request, list(queryset), per_page, newer, older)
+
+
+async def apaginate(
+    request: HttpRequest, queryset: QuerySet, per_page: int | None = None
+) -> KeysetPage:
+    """
+    Async version of `paginate`.
+    """
+    per_page = get_per_page(per_page)
+    queryset, newer, older = keyset_queryset(request, queryset, per_page)
+    object_list = [obj async for obj in queryset]
+    return keyset_page(request, object_list, per_page, newer, older)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import time
+import uuid
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+from django.utils.safestring import SafeString, mark_safe
+
+from wakawaka import metrics
+from wakawaka.markup import parse_content
+from wakawaka.wikiwords import resolve_wikiwords
+
+if TYPE_CHECKING:
+    from wakawaka.models import Revision
+
+RENDER_CACHE_KEY = "wakawaka:render:{pk}:{modified}"
+LINK_TOKEN_KEY = "wakawaka:link:{digest}"  # noqa: S105
+LINK_EPOCH_KEY = "wakawaka:link-epoch"
+
+
+def get_render_cache() -> BaseCache | None:
+    """
+    Returns the cache used for rendered revisions, or None if the render
+    cache is disabled by setting `WAKAWAKA_RENDER_CACHE` to None.
+    """
+    alias = getattr(settings, "WAKAWAKA_RENDER_CACHE", "default")
+    if alias is None:
+        return None
+    return caches[alias]
+
+
+def link_token_key(slug: str) -> str:
+    digest = hashlib.sha256(slug.encode()).hexdigest()
+    return LINK_TOKEN_KEY.format(digest=digest)
+
+
+def invalidate_links(*slugs: str) -> None:
+    """
+    Invalidates all rendered revisions which link to one of the given slugs,
+    by assigning a new link token to each of them. Called whenever a page is
+    created or deleted, so red and blue links stay correct. The link epoch
+    is renewed as well.
+
+    The tokens are renewed once the current transaction is committed. A
+    revision rendered before that still sees the old set of pages, and would
+    otherwise be cached under the new tokens.
+    """
+    cache = get_render_cache()
+    if cache is None:
+        return
+    transaction.on_commit(lambda: _renew_link_tokens(cache, slugs))
+
+
+def _renew_link_tokens(cache: BaseCache, slugs: tuple[str, ...]) -> None:
+    tokens = {link_token_key(slug): uuid.uuid4().hex for slug in slugs}
+    cache.set_many({**tokens, LINK_EPOCH_KEY: time.time()}, timeout=None)
+
+
+def get_link_epoch() -> float | None:
+    """
+    Returns the time the set of existing pages last changed, as far as the
+    render cache knows. Any response containing rendered links is outdated
+    once the epoch changes. Returns None if the render cache is disabled.
+    """
+    cache = get_render_cache()
+    if cache is None:
+        return None
+    epoch = cache.get(LINK_EPOCH_KEY)
+    if epoch is None:
+        cache.add(LINK_EPOCH_KEY, time.time(), timeout=None)
+        epoch = cache.get(LINK_EPOCH_KEY)
+    return epoch
+
+
+def render_content(content: str) -> SafeString:
+    """
+    Renders the given wiki content into HTML. This is the equivalent of the
+    `urlize|wikify|linebreaks` filter chain, in a single pass.
+    """
+    parsed = parse_content(content)
+    return parsed.to_html(resolve_wikiwords(parsed.slugs))
+
+
+def render_revision(rev: Revision) -> SafeString:
+    """
+    Renders the content of the given revision and caches the result. See
+    `render_revision_with_links`.
+    """
+    html, _slugs = render_revision_with_links(rev)
+    return html
+
+
+def render_revision_with_links(rev: Revision) -> tuple[SafeString, set[str]]:
+    """
+    Renders the content of the given revision and caches the result. Returns
+    the HTML and the set of slugs it links to.
+
+    A revision's content never changes, but the rendered HTML depends on
+    whether the pages it links to exist. Along with the HTML, the link token
+    of each linked slug is stored. A cached entry is only used if none of
+    these tokens has changed since.
+    """
+    cache = get_render_cache()
+    if cache is None:
+        with metrics.timer("render"):
+            parsed = parse_content(rev.content)
+            return parsed.to_html(resolve_wikiwords(parsed.slugs)), parsed.slugs
+
+    key = RENDER_CACHE_KEY.format(pk=rev.pk, modified=rev.modified.timestamp())
+    entry = cache.get(key)
+    if entry is not None:
+        html, tokens = entry
+        if not tokens or _get_link_tokens(cache, tokens.keys()) == tokens:
+            metrics.count_cache_request("render", hit=True)
+            return mark_safe(html), set(tokens)  # noqa: S308
+    metrics.count_cache_request("render", hit=False)
+
+    with metrics.timer("render"):
+        parsed = parse_content(rev.content)
+
+        # Take the link tokens before the links are resolved, so a page
+        # created meanwhile invalidates this entry rather than being missed.
+        tokens = _get_link_tokens(cache, parsed.slugs)
+        html = parsed.to_html(resolve_wikiwords(parsed.slugs))
+
+    timeout = getattr(settings, "WAKAWAKA_RENDER_CACHE_TIMEOUT", 60 * 60 * 24 * 7)
+    cache.set(key, (str(html), tokens), timeout=timeout)
+    return html, set(tokens)
+
+
+def _get_link_tokens(cache: BaseCache, slugs: set[str]) -> dict[str, str | None]:
+    keys = {slug: link_token_key(slug) for slug in slugs}
+    tokens = cache.get_many(keys.values())
+    return {slug: tokens.get(key) for slug, key in keys.items()}
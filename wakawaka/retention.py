@@ -0,0 +1,73 @@
+"""
+Retention policy for the revisions of a page.
+
+All revisions from the last `WAKAWAKA_RETENTION_DAYS` days are kept. Older
+revisions are thinned to the latest one of each day, week or month, set in
+`WAKAWAKA_RETENTION_PERIOD`. The first and the current revision of a page
+are always kept. The `wakawaka_compact_revisions` management command
+applies the policy.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.utils import timezone
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable, Iterable
+    from datetime import datetime
+
+DAY = "day"
+WEEK = "week"
+MONTH = "month"
+PERIODS = (DAY, WEEK, MONTH)
+
+
+def get_retention_days() -> int:
+    return getattr(settings, "WAKAWAKA_RETENTION_DAYS", 90)
+
+
+def get_retention_period() -> str:
+    return getattr(settings, "WAKAWAKA_RETENTION_PERIOD", DAY)
+
+
+def period_key(timestamp: datetime, period: str) -> Hashable:
+    """
+    Returns the day, ISO week or month of the given timestamp, in the
+    current timezone.
+    """
+    timestamp = timezone.localtime(timestamp)
+    if period == MONTH:
+        return timestamp.year, timestamp.month
+    if period == WEEK:
+        return timestamp.isocalendar()[:2]
+    return timestamp.date()
+
+
+def expired_revisions(
+    revisions: Iterable[tuple[int, datetime]],
+    cutoff: datetime,
+    period: str,
+    current_id: int | None,
+) -> list[int]:
+    """
+    Returns the ids of the revisions to delete, from the `(pk, modified)`
+    pairs of all revisions of one page which are older than `cutoff`,
+    oldest first. Of each period, the latest revision is kept.
+    """
+    expired = []
+    first_pk = previous_pk = previous_key = None
+    for pk, modified in revisions:
+        if modified >= cutoff:
+            break
+        key = period_key(modified, period)
+        # The previous revision is the latest of its period, unless this one
+        # is in the same period.
+        if key == previous_key and previous_pk not in (first_pk, current_id):
+            expired.append(previous_pk)
+        if first_pk is None:
+            first_pk = pk
+        previous_pk, previous_key = pk, key
+    return expired
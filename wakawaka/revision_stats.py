@@ -0,0 +1,99 @@
+"""
+Metadata of each revision, displayed in the history listings.
+
+The size of a revision's content in bytes, the change in size and the lines
+added and removed compared to its parent (the revision before it in the
+history of its page), and its number of words are stored on the revision
+when it's created, so the listings never need to load content. Revisions
+stored without them, e.g. by `wakawaka_import`, get them from the
+`wakawaka_backfill_revision_stats` management command.
+
+When a revision is deleted, the revision after it is compared to its new
+parent, the revision before the deleted one.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.db.models import Q
+
+if TYPE_CHECKING:
+    from wakawaka.models import Revision
+
+STATS_FIELDS = ("size", "size_delta", "lines_added", "lines_removed", "word_count")
+
+
+def compute_stats(text: str, parent_text: str | None) -> dict[str, int]:
+    """
+    Returns the metadata of a revision with the given content, compared to
+    the content of its parent. The first revision of a page has no parent.
+
+    The lines added and removed are counted with the diff engine, within the
+    size limit and time budget of diffs. Beyond them, lines are counted
+    regardless of their position.
+    """
+    from wakawaka.diff import count_changed_lines  # noqa: PLC0415 - Circular import
+
+    parent_text = parent_text or ""
+    lines_removed, lines_added = count_changed_lines(
+        parent_text.splitlines(), text.splitlines()
+    )
+
+    size = len(text.encode())
+    return {
+        "size": size,
+        "size_delta": size - len(parent_text.encode()),
+        "lines_added": lines_added,
+        "lines_removed": lines_removed,
+        "word_count": len(text.split()),
+    }
+
+
+def set_stats(rev: Revision, text: str, parent_text: str | None) -> None:
+    for field, value in compute_stats(text, parent_text).items():
+        setattr(rev, field, value)
+
+
+def parent_revision(rev: Revision) -> Revision | None:
+    """
+    Returns the revision before the given one in the history of its page.
+    A new revision's parent is the latest revision of the page.
+    """
+    queryset = type(rev).objects.filter(page=rev.page_id)
+    if rev.pk is not None:
+        queryset = queryset.filter(
+            Q(modified__lt=rev.modified) | Q(modified=rev.modified, pk__lt=rev.pk)
+        )
+    return queryset.select_related("body").order_by("-modified", "-pk").first()
+
+
+def child_revision(rev: Revision) -> Revision | None:
+    """
+    Returns the revision after the given one in the history of its page.
+    """
+    return (
+        type(rev)
+        .objects.filter(page=rev.page_id)
+        .filter(Q(modified__gt=rev.modified) | Q(modified=rev.modified, pk__gt=rev.pk))
+        .select_related("body")
+        .order_by("modified", "pk")
+        .first()
+    )
+
+
+def update_child_stats(rev: Revision) -> None:
+    """
+    Recomputes the metadata of the revision after the given one, which was
+    deleted, against its new parent. Revisions without metadata are left to
+    the backfill.
+    """
+    child = child_revision(rev)
+    if child is None or child.size is None:
+        return
+    parent = parent_revision(child)
+    set_stats(child, child.content, parent.content if parent else None)
+    # Saving the revision would change its modification date.
+    type(rev).objects.filter(pk=child.pk).update(
+        **{field: getattr(child, field) for field in STATS_FIELDS}
+    )
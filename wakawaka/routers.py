@@ -0,0 +1,95 @@
+"""
+Routing of the wiki's queries to read replicas.
+
+`ReplicaRouter` sends reads of the wiki models to one of the databases in
+`WAKAWAKA_READ_REPLICAS`, and all writes to the primary, which is the
+`default` database, the one used by `transaction.atomic()` and
+`transaction.on_commit()` without `using`.
+Reads only go to a replica within requests handled by
+`wakawaka.middleware.ReplicaPinningMiddleware`, and only if that request
+is a safe one (GET, HEAD, ...) and the user's session isn't pinned to the
+primary. Management commands and other code outside of requests always read
+from the primary, so they never act on stale data.
+
+After a request wrote to the primary, the session is pinned to the primary
+for `WAKAWAKA_REPLICA_PIN_SECONDS`, so the user reads their own writes, e.g.
+when redirected to the page they just saved.
+"""
+
+from __future__ import annotations
+
+import random
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+if TYPE_CHECKING:
+    from django.db.models import Model
+
+APP_LABEL = "wakawaka"
+
+# Session key of the time until which reads go to the primary.
+PINNED_UNTIL_SESSION_KEY = "wakawaka_primary_until"
+
+
+def get_read_replicas() -> list[str]:
+    return list(getattr(settings, "WAKAWAKA_READ_REPLICAS", ()))
+
+
+def get_pin_seconds() -> float:
+    return getattr(settings, "WAKAWAKA_REPLICA_PIN_SECONDS", 10)
+
+
+class RequestState:
+    """
+    Whether the queries of a request may read from a replica, and whether
+    the request wrote to the primary.
+    """
+
+    def __init__(self, pinned: bool) -> None:
+        self.pinned = pinned
+        self.written = False
+        # A request reads from one replica only, so it sees a single state
+        # of the wiki, even if the replicas lag behind differently.
+        self.replica = random.choice(get_read_replicas())  # noqa: S311
+
+
+# The state of the current request, set by `ReplicaPinningMiddleware`.
+request_state: ContextVar[RequestState | None] = ContextVar(
+    "wakawaka_request_state", default=None
+)
+
+
+class ReplicaRouter:
+    """
+    Routes reads of the wiki models to a read replica, and writes to the
+    primary database.
+    """
+
+    def db_for_read(self, model: type[Model], **hints: Any) -> str | None:
+        if model._meta.app_label != APP_LABEL or not get_read_replicas():  # noqa: SLF001
+            return None
+        state = request_state.get()
+        if state is None or state.pinned or state.written:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model: type[Model], **hints: Any) -> str | None:
+        if model._meta.app_label != APP_LABEL or not get_read_replicas():  # noqa: SLF001
+            return None
+        state = request_state.get()
+        if state is not None:
+            state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> bool | None:
+        """
+        Objects read from a replica can be related to those on the primary,
+        as the replicas are copies of it.
+        """
+        databases = {DEFAULT_DB_ALIAS, *get_read_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:  # noqa: SLF001
+            return True
+        return None
@@ -0,0 +1,285 @@
+"""
+Full-text search over the current revision of each page.
+
+The current content of every page is kept in a `SearchDocument`, which is
+updated whenever the current revision of a page changes. The search backend
+indexes these documents: SQLite uses an FTS5 table kept in sync by triggers,
+PostgreSQL a GIN index on a `tsvector` expression. Other databases fall back
+to a simple `icontains` search.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+if TYPE_CHECKING:
+    from django.db.backends.utils import CursorWrapper
+    from django.db.models import QuerySet
+
+    from wakawaka.models import Revision, SearchDocument, WikiPage
+
+BACKENDS = {
+    "sqlite": "wakawaka.search.SQLiteSearchBackend",
+    "postgresql": "wakawaka.search.PostgreSQLSearchBackend",
+}
+
+
+def split_words(slug: str) -> str:
+    """
+    Returns the words of a CamelCase slug, e.g. `Carrot Cake` for
+    `CarrotCake`, so they can be searched for individually.
+    """
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])|/", " ", slug)
+
+
+def get_search_terms(query: str) -> list[str]:
+    return re.findall(r"\w+", query)
+
+
+def _document_model() -> type[SearchDocument]:
+    from wakawaka.models import SearchDocument  # noqa: PLC0415 - Circular import
+
+    return SearchDocument
+
+
+def index_page(page: WikiPage, rev: Revision | None) -> None:
+    """
+    Updates the search document of the given page to the content of the
+    given revision, its current one. A page without revision is removed
+    from the index.
+    """
+    documents = _document_model().objects
+    if rev is None:
+        documents.filter(page=page.pk).delete()
+        return
+    documents.update_or_create(
+        page_id=page.pk,
+        defaults={
+            "slug": page.slug,
+            "title": split_words(page.slug),
+            "content": rev.content,
+        },
+    )
+
+
+class SimpleSearchBackend:
+    """
+    Finds documents containing all search terms, ordered by slug. Works on
+    every database, but scans all documents.
+    """
+
+    def __init__(self, using: str) -> None:
+        self.using = using
+
+    def install(self) -> None:
+        """
+        Creates the database objects the backend needs, if missing.
+        """
+
+    def rebuild(self) -> None:
+        """
+        Brings the index in sync with the search documents, after a full
+        reindex.
+        """
+
+    def get_queryset(self, query: str) -> QuerySet:
+        condition = Q()
+        for term in get_search_terms(query):
+            condition &= Q(title__icontains=term) | Q(content__icontains=term)
+        return _document_model().objects.using(self.using).filter(condition)
+
+    def count(self, query: str) -> int:
+        if not get_search_terms(query):
+            return 0
+        return self.get_queryset(query).count()
+
+    def search(self, query: str, offset: int, limit: int) -> list[int]:
+        """
+        Returns the page ids of the matching documents, best match first.
+        """
+        if not get_search_terms(query):
+            return []
+        queryset = self.get_queryset(query).order_by("slug")
+        return list(queryset.values_list("page_id", flat=True)[offset : offset + limit])
+
+
+class SQLiteSearchBackend(SimpleSearchBackend):
+    """
+    Searches an FTS5 table, which indexes the search documents as external
+    content and is kept in sync by triggers. Results are ranked with bm25,
+    with matches in the title weighted higher. Search terms match as prefix.
+    """
+
+    table = "wakawaka_search_fts"
+
+    def install(self) -> None:
+        documents = _document_model()._meta.db_table  # noqa: SLF001 - Model metadata
+        table = self.table
+        with connections[self.using].cursor() as cursor:
+            # The triggers are dropped along with the documents table.
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = %s", [f"{table}_insert"]
+            )
+            exists = cursor.fetchone() is not None
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+                f"title, content, content='{documents}', content_rowid='page_id')"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT "  # noqa: S608 - Only the query is user input
+                f"ON {documents} BEGIN "
+                f"INSERT INTO {table}(rowid, title, content) "
+                f"VALUES (new.page_id, new.title, new.content); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE "  # noqa: S608 - Only the query is user input
+                f"ON {documents} BEGIN "
+                f"INSERT INTO {table}({table}, rowid, title, content) "
+                f"VALUES ('delete', old.page_id, old.title, old.content); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE "  # noqa: S608 - Only the query is user input
+                f"ON {documents} BEGIN "
+                f"INSERT INTO {table}({table}, rowid, title, content) "
+                f"VALUES ('delete', old.page_id, old.title, old.content); "
+                f"INSERT INTO {table}(rowid, title, content) "
+                f"VALUES (new.page_id, new.title, new.content); END"
+            )
+
+        # Documents stored without the triggers, e.g. by the migration, are
+        # indexed.
+        if not exists:
+            self.rebuild()
+
+    def rebuild(self) -> None:
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")  # noqa: S608 - Only the query is user input
+
+    def get_match(self, query: str) -> str:
+        # Quoting every term makes FTS5 operators in the query plain words.
+        return " ".join(f'"{term}"*' for term in get_search_terms(query))
+
+    def count(self, query: str) -> int:
+        if not get_search_terms(query):
+            return 0
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {self.table} WHERE {self.table} MATCH %s",  # noqa: S608 - Only the query is user input
+                [self.get_match(query)],
+            )
+            return cursor.fetchone()[0]
+
+    def search(self, query: str, offset: int, limit: int) -> list[int]:
+        if not get_search_terms(query):
+            return []
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "  # noqa: S608 - Only the query is user input
+                f"ORDER BY bm25({self.table}, 10.0, 1.0) LIMIT %s OFFSET %s",
+                [self.get_match(query), limit, offset],
+            )
+            return _fetch_ids(cursor)
+
+
+class PostgreSQLSearchBackend(SimpleSearchBackend):
+    """
+    Searches with a GIN index on the `tsvector` of the title and content
+    of each document, ranked with `ts_rank`. The text search configuration
+    is set with `WAKAWAKA_SEARCH_CONFIG`.
+    """
+
+    index = "wakawaka_search_gin"
+
+    def get_vector(self) -> str:
+        config = getattr(settings, "WAKAWAKA_SEARCH_CONFIG", "simple")
+        if not re.fullmatch(r"\w+", config):
+            msg = f"Invalid text search configuration: {config!r}"
+            raise ValueError(msg)
+        # The expression must match the index exactly, so the configuration
+        # is inlined rather than passed as a parameter.
+        return (
+            f"(setweight(to_tsvector('{config}'::regconfig, title), 'A') || "
+            f"setweight(to_tsvector('{config}'::regconfig, content), 'B'))"
+        )
+
+    def get_tsquery(self) -> str:
+        config = getattr(settings, "WAKAWAKA_SEARCH_CONFIG", "simple")
+        return f"websearch_to_tsquery('{config}'::regconfig, %s)"
+
+    def install(self) -> None:
+        documents = _document_model()._meta.db_table  # noqa: SLF001 - Model metadata
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.index} ON {documents} "
+                f"USING GIN ({self.get_vector()})"
+            )
+
+    def count(self, query: str) -> int:
+        if not get_search_terms(query):
+            return 0
+        documents = _document_model()._meta.db_table  # noqa: SLF001 - Model metadata
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {documents} "  # noqa: S608 - Only the query is user input
+                f"WHERE {self.get_vector()} @@ {self.get_tsquery()}",
+                [query],
+            )
+            return cursor.fetchone()[0]
+
+    def search(self, query: str, offset: int, limit: int) -> list[int]:
+        if not get_search_terms(query):
+            return []
+        documents = _document_model()._meta.db_table  # noqa: SLF001 - Model metadata
+        vector, tsquery = self.get_vector(), self.get_tsquery()
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT page_id FROM {documents} WHERE {vector} @@ {tsquery} "  # noqa: S608 - Only the query is user input
+                f"ORDER BY ts_rank({vector}, {tsquery}) DESC, slug "
+                f"LIMIT %s OFFSET %s",
+                [query, query, limit, offset],
+            )
+            return _fetch_ids(cursor)
+
+
+def get_search_backend(using: str | None = None) -> SimpleSearchBackend:
+    """
+    Returns the search backend set in `WAKAWAKA_SEARCH_BACKEND`, or the one
+    matching the database of the search documents.
+    """
+    if using is None:
+        using = router.db_for_read(_document_model())
+    path = getattr(settings, "WAKAWAKA_SEARCH_BACKEND", None) or BACKENDS.get(
+        connections[using].vendor, "wakawaka.search.SimpleSearchBackend"
+    )
+    return import_string(path)(using)
+
+
+class SearchResults:
+    """
+    The ranked search documents for a query, which can be paginated with
+    Django's `Paginator`. Only the documents of the requested slice are
+    fetched.
+    """
+
+    def __init__(self, query: str, backend: SimpleSearchBackend | None = None) -> None:
+        self.query = query
+        self.backend = backend or get_search_backend()
+
+    def count(self) -> int:
+        return self.backend.count(self.query)
+
+    def __getitem__(self, index: slice) -> list[SearchDocument]:
+        offset = index.start or 0
+        ids = self.backend.search(self.query, offset, index.stop - offset)
+        documents = _document_model().objects.using(self.backend.using).in_bulk(ids)
+        return [documents[pk] for pk in ids if pk in documents]
+
+
+def _fetch_ids(cursor: CursorWrapper) -> list[int]:
+    return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,95 @@
+from typing import Any
+
+from django.apps import AppConfig
+from django.db import connections, router
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete
+from django.dispatch import receiver
+
+from wakawaka import hierarchy, revision_stats, storage
+from wakawaka.models import Revision, SearchDocument, WikiPage
+from wakawaka.rendering import invalidate_links
+from wakawaka.search import get_search_backend
+
+
+@receiver(post_save, sender=WikiPage)
+@receiver(post_delete, sender=WikiPage)
+def invalidate_page_links(sender: type, instance: WikiPage, **kwargs: Any) -> None:
+    """
+    Creating or deleting a page turns links to it blue or red, so rendered
+    revisions linking to it need to be re-rendered.
+    """
+    invalidate_links(instance.slug)
+
+
+@receiver(post_save, sender=WikiPage)
+def add_page_node(
+    sender: type, instance: WikiPage, created: bool = False, **kwargs: Any
+) -> None:
+    """
+    Adds new pages to the page hierarchy.
+    """
+    if created:
+        hierarchy.add_pages({instance.slug: instance.pk})
+
+
+@receiver(post_delete, sender=WikiPage)
+def remove_page_node(sender: type, instance: WikiPage, **kwargs: Any) -> None:
+    hierarchy.remove_pages([instance.slug])
+
+
+def deleted_with_page(instance: Revision, origin: Any) -> bool:
+    """
+    Returns True if the revision is deleted because its page is deleted.
+    """
+    if isinstance(origin, WikiPage) and origin.pk == instance.page_id:
+        return True
+    return isinstance(origin, QuerySet) and origin.model is WikiPage
+
+
+@receiver(pre_delete, sender=Revision)
+def materialize_delta_children(
+    sender: type, instance: Revision, origin: Any = None, **kwargs: Any
+) -> None:
+    """
+    Revisions stored as a delta against a deleted revision are turned into
+    keyframes, unless the whole page or they themselves are deleted along
+    with it.
+    """
+    if deleted_with_page(instance, origin):
+        return
+    if isinstance(origin, QuerySet) and origin.model is Revision:
+        storage.materialize_children(instance, exclude=origin)
+        return
+    storage.materialize_children(instance)
+
+
+@receiver(post_delete, sender=Revision)
+def update_child_stats(
+    sender: type, instance: Revision, origin: Any = None, **kwargs: Any
+) -> None:
+    """
+    The revision after a deleted revision is compared to its new parent. All
+    revisions deleted along with it are gone by now.
+    """
+    if not deleted_with_page(instance, origin):
+        revision_stats.update_child_stats(instance)
+
+
+@receiver(post_migrate)
+def install_search_backend(
+    sender: AppConfig, using: str = "default", **kwargs: Any
+) -> None:
+    """
+    Creates the database objects of the search backend, e.g. its full-text
+    index, once the tables of this app are created. Nothing is created while
+    migrated back to before the search documents.
+    """
+    if sender.name != "wakawaka":
+        return
+    if not router.allow_migrate_model(using, SearchDocument):
+        return
+    table = SearchDocument._meta.db_table  # noqa: SLF001 - Model metadata
+    if table not in connections[using].introspection.table_names():
+        return
+    get_search_backend(using).install()
@@ -0,0 +1,240 @@
+"""
+Storage of revision content.
+
+Revision content is stored in `RevisionBody` rows, keyed by the SHA-256
+digest of the content, so identical content (e.g. after a revert) is only
+stored once. By default every revision points to the body of its content.
+With the `delta` storage mode, a revision is stored as a compressed delta
+against its predecessor, with a full keyframe every
+`WAKAWAKA_KEYFRAME_INTERVAL` revisions. Rebuilding
+the content of a revision therefore applies at most that many deltas, which
+are all fetched with a single query.
+"""
+
+from __future__ import annotations
+
+import difflib
+import hashlib
+import json
+import zlib
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+if TYPE_CHECKING:
+    from django.db.models import QuerySet
+
+    from wakawaka.models import Revision, RevisionBody
+
+FULL = "full"
+DELTA = "delta"
+
+# The storage fields of a revision.
+STORAGE_FIELDS = (
+    "content_hash",
+    "body",
+    "delta",
+    "delta_base",
+    "delta_keyframe",
+    "delta_depth",
+)
+
+# The fields needed to rebuild the content of a revision.
+READ_FIELDS = ("body", "body__content", "delta", "delta_base")
+
+
+def get_storage_mode() -> str:
+    return getattr(settings, "WAKAWAKA_REVISION_STORAGE", FULL)
+
+
+def get_keyframe_interval() -> int:
+    return getattr(settings, "WAKAWAKA_KEYFRAME_INTERVAL", 16)
+
+
+def content_digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def store_body(text: str, digest: str | None = None) -> RevisionBody:
+    """
+    Returns the body for the given content, and creates it if no revision
+    with this content was stored before.
+    """
+    from wakawaka.models import RevisionBody  # noqa: PLC0415 - Circular import
+
+    body, _created = RevisionBody.objects.get_or_create(
+        digest=digest or content_digest(text), defaults={"content": text}
+    )
+    return body
+
+
+def encode_delta(base: str, text: str) -> bytes:
+    """
+    Returns a compressed delta to rebuild `text` from `base`. The delta is a
+    list of operations on lines: a `[start, end]` pair copies these lines of
+    the base, a string inserts new text.
+    """
+    base_lines = base.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, base_lines, lines)
+
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append("".join(lines[j1:j2]))
+    return zlib.compress(json.dumps(ops, separators=(",", ":")).encode())
+
+
+def apply_delta(base: str, delta: bytes) -> str:
+    base_lines = base.splitlines(keepends=True)
+    ops = json.loads(zlib.decompress(delta))
+    return "".join(
+        op if isinstance(op, str) else "".join(base_lines[op[0] : op[1]]) for op in ops
+    )
+
+
+def read_content(rev: Revision) -> str:
+    """
+    Returns the full content of the given revision. Deltas are applied on
+    top of their keyframe; the chain is fetched with one query.
+    """
+    if rev.delta_base_id is None:
+        return rev.body.content
+
+    # Without its keyframe, which was deleted, the chain is fetched revision
+    # by revision.
+    chain = {}
+    if rev.delta_keyframe_id is not None:
+        chain = {
+            r.pk: r
+            for r in type(rev)
+            .objects.filter(
+                Q(pk=rev.delta_keyframe_id)
+                | Q(
+                    delta_keyframe=rev.delta_keyframe_id,
+                    delta_depth__lt=rev.delta_depth,
+                )
+            )
+            .select_related("body")
+            .only(*READ_FIELDS)
+        }
+
+    # Walk back to the keyframe. If a revision in between was turned into a
+    # keyframe of its own, it is not part of the chain and fetched by itself.
+    deltas = [rev.delta]
+    node = rev
+    while node.delta_base_id is not None:
+        base_id = node.delta_base_id
+        node = chain.get(base_id) or type(rev).objects.select_related("body").only(
+            *READ_FIELDS
+        ).get(pk=base_id)
+        if node.delta_base_id is not None:
+            deltas.append(node.delta)
+
+    text = node.body.content
+    for delta in reversed(deltas):
+        text = apply_delta(text, delta)
+    return text
+
+
+def store_content(rev: Revision, text: str) -> None:
+    """
+    Sets the storage fields of the given (unsaved) revision for the given
+    content. In the `delta` storage mode, the content is stored as a delta
+    against the latest revision of the page, unless a keyframe is due or the
+    delta is not smaller than the content. Content which is stored already
+    is always referenced rather than stored again.
+    """
+    digest = content_digest(text)
+    rev.content_hash = digest
+    rev.body = None
+    rev.delta = None
+    rev.delta_base = None
+    rev.delta_keyframe = None
+    rev.delta_depth = 0
+
+    # Changing the content of an existing revision breaks the deltas stored
+    # against it, and it's kept as a keyframe itself.
+    if rev.pk is not None:
+        materialize_children(rev)
+        rev.body = store_body(text, digest)
+        return
+
+    if get_storage_mode() != DELTA or rev.page_id is None:
+        rev.body = store_body(text, digest)
+        return
+
+    # Content which is stored already is referenced as a keyframe.
+    if _body_exists(digest):
+        rev.body_id = digest
+        return
+
+    base = (
+        type(rev).objects.filter(page=rev.page_id).order_by("-modified", "-pk").first()
+    )
+    if base is None or base.delta_depth + 1 >= get_keyframe_interval():
+        rev.body = store_body(text, digest)
+        return
+
+    delta = encode_delta(base.content, text)
+    if len(delta) >= len(text.encode()):
+        rev.body = store_body(text, digest)
+        return
+
+    rev.delta = delta
+    rev.delta_base = base
+    rev.delta_keyframe_id = base.delta_keyframe_id or base.pk
+    rev.delta_depth = base.delta_depth + 1
+
+
+def materialize_children(rev: Revision, exclude: QuerySet | None = None) -> None:
+    """
+    Turns all revisions stored as a delta against the given revision into
+    keyframes, except those in `exclude`, e.g. because they are deleted along
+    with it. Called before a revision is deleted or its content changes.
+    """
+    children = type(rev).objects.filter(delta_base=rev.pk).only(*STORAGE_FIELDS)
+    if exclude is not None:
+        children = children.exclude(pk__in=exclude.values("pk"))
+    for child in children:
+        body = store_body(read_content(child), child.content_hash)
+        type(rev).objects.filter(pk=child.pk).update(
+            body=body,
+            delta=None,
+            delta_base=None,
+            delta_keyframe=None,
+            delta_depth=0,
+        )
+
+
+def delete_unused_bodies(batch_size: int) -> int:
+    """
+    Deletes the bodies no longer used by any revision, in batches ordered by
+    their digest, each in its own transaction. Returns the number of bodies
+    deleted.
+    """
+    from wakawaka.models import RevisionBody  # noqa: PLC0415 - Circular import
+
+    unused = RevisionBody.objects.filter(revisions__isnull=True)
+    deleted = 0
+    last_digest = ""
+    while digests := list(
+        unused.filter(pk__gt=last_digest)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:batch_size]
+    ):
+        with transaction.atomic():
+            count, _deleted = unused.filter(pk__in=digests).only("pk").delete()
+        deleted += count
+        last_digest = digests[-1]
+    return deleted
+
+
+def _body_exists(digest: str) -> bool:
+    from wakawaka.models import RevisionBody  # noqa: PLC0415 - Circular import
+
+    return RevisionBody.objects.filter(pk=digest).exists()
@@ -1,11 +1,19 @@
-from typing import Any
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
 
 from django import get_version
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import testcases
+from django.test.utils import CaptureQueriesContext
 
 from wakawaka.models import Revision, WikiPage
 
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
 DJANGO_VERSION = get_version()
 
 
@@ -14,6 +22,28 @@ class BaseTestCase(testcases.TestCase):
     General integrity tests around the project.
     """
 
+    @contextmanager
+    def assertQueryBudget(self, budget: int) -> Iterator[CaptureQueriesContext]:  # noqa: N802
+        """
+        Fails if the code within the block runs more than `budget` database
+        queries. All executed queries are listed in the failure message::
+
+            >>> with self.assertQueryBudget(2):
+            ...     self.client.get('/WikiIndex/')
+        """
+        with CaptureQueriesContext(connection) as context:
+            yield context
+
+        executed = len(context.captured_queries)
+        queries = "\n".join(
+            f"{i}. {query['sql']}"
+            for i, query in enumerate(context.captured_queries, start=1)
+        )
+        if executed > budget:
+            self.fail(
+                f"{executed} queries executed, the budget is {budget}:\n{queries}"
+            )
+
     def _create_user(self, username: str, password: str) -> User:
         try:
             user = User.objects.get(username=username)
@@ -65,4 +95,5 @@ class BaseTestCase(testcases.TestCase):
                 message=f"Created via API: {rev}",
                 creator_ip="127.0.0.1",
             )
+        page.update_current_revision()
         return page
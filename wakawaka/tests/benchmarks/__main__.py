@@ -0,0 +1,105 @@
+"""
+Runs the benchmark suite against a test database with a synthetic wiki.
+
+    python -m wakawaka.tests.benchmarks [--pages N] [--revisions M]
+        [--link-density D] [--page-size S] [--repeat R] [--output FILE]
+        [--baseline FILE] [--time-tolerance T] [--memory-tolerance T]
+
+Exits with status 1 if a benchmark regressed against the baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "wakawaka.tests.test_project.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from wakawaka.tests.benchmarks.corpus import generate_wiki  # noqa: E402
+from wakawaka.tests.benchmarks.suite import (  # noqa: E402
+    BENCHMARKS,
+    Wiki,
+    compare,
+    run_benchmarks,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m wakawaka.tests.benchmarks")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--revisions", type=int, default=10)
+    parser.add_argument("--link-density", type=float, default=0.05)
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--benchmark",
+        action="append",
+        choices=list(BENCHMARKS),
+        help="Run only the given benchmark. Can be given multiple times.",
+    )
+    parser.add_argument("--output", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Compare the results to this file.")
+    parser.add_argument("--time-tolerance", type=float, default=1.25)
+    parser.add_argument("--memory-tolerance", type=float, default=1.25)
+    args = parser.parse_args()
+
+    corpus = {
+        "pages": args.pages,
+        "revisions": args.revisions,
+        "link_density": args.link_density,
+        "page_size": args.page_size,
+        "seed": args.seed,
+    }
+
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0, serialize=False)
+    try:
+        wiki = Wiki(generate_wiki(**corpus))
+        results = run_benchmarks(wiki, args.benchmark, args.repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+        },
+        "corpus": corpus,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:  # noqa: PTH123
+            f.write(output)
+    else:
+        print(output)  # noqa: T201
+
+    if args.baseline:
+        with open(args.baseline) as f:  # noqa: PTH123
+            baseline = json.load(f)["results"]
+        regressions = compare(
+            results, baseline, args.time_tolerance, args.memory_tolerance
+        )
+        for regression in regressions:
+            print(regression, file=sys.stderr)  # noqa: T201
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Throughput of the sync and async views under uvicorn, on a synthetic wiki.
+
+    python -m wakawaka.tests.benchmarks.asgi [--pages N] [--revisions M]
+        [--concurrency C] [--duration SECONDS] [--output FILE]
+
+The test project is served by uvicorn in a separate process, once with the
+sync views and once with the async views (`WAKAWAKA_ASYNC_VIEWS`). Each
+server gets requests for the page, history, changes, recent changes and page
+list views from C concurrent keep-alive connections for the given duration.
+The number of requests per second and the latency percentiles are printed
+as JSON. Requires uvicorn.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "wakawaka.tests.test_project.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from wakawaka.tests.benchmarks.corpus import generate_wiki  # noqa: E402
+
+HOST = "127.0.0.1"
+
+URLCONFS = {
+    "sync": "wakawaka.tests.test_project.urls",
+    "async": "wakawaka.tests.test_project.async_urls",
+}
+
+
+def serve(urlconf: str, port: int) -> None:
+    """
+    Runs uvicorn with the test project and the given urlconf. Runs in a
+    child process, which inherits the test database.
+    """
+    import uvicorn  # noqa: PLC0415 - Optional dependency
+    from django.core.asgi import get_asgi_application  # noqa: PLC0415
+
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = [HOST]
+    settings.ROOT_URLCONF = urlconf
+    uvicorn.run(get_asgi_application(), host=HOST, port=port, log_level="warning")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def is_serving(port: int) -> bool:
+    try:
+        _reader, writer = await asyncio.open_connection(HOST, port)
+    except OSError:
+        return False
+    writer.close()
+    return True
+
+
+async def wait_for_server(port: int, timeout: float = 10) -> None:
+    deadline = time.perf_counter() + timeout
+    while not await is_serving(port):
+        if time.perf_counter() > deadline:
+            msg = f"The server on port {port} didn't start in {timeout}s"
+            raise TimeoutError(msg)
+        await asyncio.sleep(0.1)
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """
+    Reads an HTTP/1.1 response with a `Content-Length` and returns its
+    status code.
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    length = 0
+    for line in header_lines:
+        name, _sep, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+
+async def client(
+    port: int, urls: list[str], deadline: float, latencies: list, errors: list
+) -> None:
+    reader, writer = await asyncio.open_connection(HOST, port)
+    i = 0
+    while time.perf_counter() < deadline:
+        url = urls[i % len(urls)]
+        i += 1
+        start = time.perf_counter()
+        writer.write(f"GET {url} HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode())
+        status = await read_response(reader)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:  # noqa: PLR2004
+            errors.append(status)
+    writer.close()
+
+
+async def load(port: int, urls: list[str], concurrency: int, duration: float) -> dict:
+    await wait_for_server(port)
+    # Warm up the caches, so both servers start from the same state.
+    await client(port, urls, time.perf_counter() + 1, [], [])
+
+    latencies: list[float] = []
+    errors: list[int] = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            client(port, urls, start + duration, latencies, errors)
+            for _i in range(concurrency)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": len(latencies) / elapsed,
+        "latency_p50": quantiles[49],
+        "latency_p95": quantiles[94],
+        "latency_p99": quantiles[98],
+    }
+
+
+def benchmark_urls(pages: list) -> list[str]:
+    page = pages[len(pages) // 2]
+    revisions = list(page.revisions.order_by("pk"))
+    first, last = revisions[0], revisions[-1]
+    changes = reverse("wakawaka_changes", kwargs={"slug": page.slug})
+    return [
+        reverse("wakawaka_page", kwargs={"slug": page.slug}),
+        reverse("wakawaka_page", kwargs={"slug": page.slug, "rev_id": first.pk}),
+        reverse("wakawaka_revision_list", kwargs={"slug": page.slug}),
+        f"{changes}?a={last.pk}&b={first.pk}",
+        reverse("wakawaka_revision_list"),
+        reverse("wakawaka_page_list"),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m wakawaka.tests.benchmarks.asgi")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--revisions", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--output", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn  # noqa: F401, PLC0415 - Optional dependency
+    except ImportError:
+        sys.exit("This benchmark requires uvicorn: pip install uvicorn")
+
+    corpus = {
+        "pages": args.pages,
+        "revisions": args.revisions,
+        "page_size": args.page_size,
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as tempdir:
+        # The servers run in other processes, so the database is a file.
+        connection.settings_dict["TEST"]["NAME"] = str(Path(tempdir) / "db")
+        old_name = connection.creation.create_test_db(verbosity=0, serialize=False)
+        try:
+            urls = benchmark_urls(generate_wiki(**corpus))
+            connections.close_all()
+
+            context = multiprocessing.get_context("fork")
+            for mode, urlconf in URLCONFS.items():
+                port = free_port()
+                server = context.Process(target=serve, args=(urlconf, port))
+                server.start()
+                try:
+                    results[mode] = asyncio.run(
+                        load(port, urls, args.concurrency, args.duration)
+                    )
+                finally:
+                    server.terminate()
+                    server.join()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "concurrency": args.concurrency,
+        },
+        "corpus": corpus,
+        "urls": urls,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:  # noqa: PTH123
+            f.write(output)
+    else:
+        print(output)  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Generator for synthetic wikis, to benchmark the views on realistic data.
+"""
+
+from __future__ import annotations
+
+import random
+
+from django.conf import settings
+
+from wakawaka.models import Revision, WikiPage
+
+VOCABULARY = [
+    "lorem",
+    "ipsum",
+    "dolor",
+    "sit",
+    "amet",
+    "consectetur",
+    "adipiscing",
+    "elit",
+    "sed",
+    "do",
+    "eiusmod",
+    "tempor",
+    "incididunt",
+    "ut",
+    "labore",
+    "et",
+    "dolore",
+    "magna",
+    "aliqua",
+    "enim",
+    "ad",
+    "minim",
+    "veniam",
+    "quis",
+    "nostrud",
+    "exercitation",
+    "ullamco",
+    "laboris",
+    "nisi",
+    "aliquip",
+    "ex",
+    "ea",
+    "commodo",
+]
+
+# Share of links which point to a page that doesn't exist.
+MISSING_LINK_RATIO = 0.1
+URL_RATIO = 0.01
+
+
+def page_slug(i: int) -> str:
+    """
+    Returns the slug of the `i`th page. The first page is the wiki index.
+    """
+    if i == 0:
+        return getattr(settings, "WAKAWAKA_DEFAULT_INDEX", "WikiIndex")
+    humps = ""
+    while i:
+        i, digit = divmod(i, 26)
+        humps += f"{chr(ord('A') + digit)}x"
+    return f"Page{humps}"
+
+
+def generate_content(
+    rng: random.Random, slugs: list[str], link_density: float, page_size: int
+) -> str:
+    """
+    Returns random content of about `page_size` characters, in which the
+    given share of words link to one of the given slugs.
+    """
+    words = []
+    size = 0
+    while size < page_size:
+        if rng.random() < link_density:
+            if rng.random() < MISSING_LINK_RATIO:
+                word = f"Missing{rng.choice(slugs)}"
+            else:
+                word = rng.choice(slugs)
+        elif rng.random() < URL_RATIO:
+            word = f"https://example.com/{rng.choice(VOCABULARY)}"
+        else:
+            word = rng.choice(VOCABULARY)
+
+        if len(words) % 80 == 79:  # noqa: PLR2004
+            word += "\n\n"
+        elif len(words) % 12 == 11:  # noqa: PLR2004
+            word += "\n"
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def edit_content(rng: random.Random, content: str) -> str:
+    """
+    Returns the given content with about every twentieth word changed, like a
+    typical edit.
+    """
+    words = content.split(" ")
+    for _ in range(max(1, len(words) // 20)):
+        words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+    return " ".join(words)
+
+
+def generate_wiki(
+    pages: int = 200,
+    revisions: int = 10,
+    link_density: float = 0.05,
+    page_size: int = 5000,
+    seed: int = 0,
+) -> list[WikiPage]:
+    """
+    Creates a wiki of `pages` pages with `revisions` revisions each, and
+    returns the pages. Each revision is about `page_size` characters long
+    and the given share of its words are WikiWords. The wiki is the same
+    for the same `seed`.
+    """
+    rng = random.Random(seed)  # noqa: S311 - Not used for security
+    slugs = [page_slug(i) for i in range(pages)]
+
+    wiki = []
+    for slug in slugs:
+        page = WikiPage.objects.create(slug=slug)
+        content = generate_content(rng, slugs, link_density, page_size)
+        for i in range(revisions):
+            if i:
+                content = edit_content(rng, content)
+            Revision.objects.create(
+                page=page,
+                content=content,
+                message=f"Revision {i + 1}",
+                creator_ip="127.0.0.1",
+            )
+        page.update_current_revision()
+        wiki.append(page)
+    return wiki
@@ -0,0 +1,85 @@
+"""
+Micro-benchmark of the single pass renderer against the former
+`urlize|wikify|linebreaks` filter chain, on 1 MB pages.
+
+    python -m wakawaka.tests.benchmarks.render [--size BYTES] [--repeat N]
+
+WikiWords are resolved without a database, so only rendering is measured.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import timeit
+from unittest import mock
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "wakawaka.tests.test_project.settings")
+django.setup()
+
+from django.template.defaultfilters import linebreaks_filter, urlize  # noqa: E402
+
+from wakawaka.markup import parse_content  # noqa: E402
+from wakawaka.wikiwords import replace_wikiwords  # noqa: E402
+
+PROSE = (
+    "Lorem ipsum dolor sit amet, see WikiIndex and the CarrotCake/Frosting "
+    "recipe. More at https://example.com/recipes?page=2 or www.example.org.\n"
+    'Mail (cook@example.com) for NutBread, or CamelCase-words & "quotes".\n\n'
+)
+
+# Inputs which make naive scanners backtrack or rescan.
+PAGES = {
+    "prose": PROSE,
+    "camelcase": "AbAb",
+    "slashes": "AbAb/",
+    "uppercase": "A",
+    "punctuation": "(a.",
+}
+
+
+def resolve(slugs: set[str]) -> dict[str, str]:
+    return {slug: f'<a href="/{slug}/">{slug}</a>' for slug in slugs}
+
+
+def render_chain(content: str) -> str:
+    return linebreaks_filter(replace_wikiwords(urlize(content)))
+
+
+def render_single_pass(content: str) -> str:
+    parsed = parse_content(content)
+    return parsed.to_html(resolve(parsed.slugs))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'page':<12} {'chain':>9} {'single pass':>12} {'speedup':>8}")  # noqa: T201
+    with mock.patch("wakawaka.wikiwords.resolve_wikiwords", resolve):
+        for name, unit in PAGES.items():
+            content = unit * (args.size // len(unit))
+            assert render_chain(content) == render_single_pass(content)  # noqa: S101
+
+            chain, single_pass = (
+                min(
+                    timeit.repeat(
+                        lambda f=f, content=content: f(content),
+                        number=1,
+                        repeat=args.repeat,
+                    )
+                )
+                for f in (render_chain, render_single_pass)
+            )
+            print(  # noqa: T201
+                f"{name:<12} {chain:>8.3f}s {single_pass:>11.3f}s "
+                f"{chain / single_pass:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
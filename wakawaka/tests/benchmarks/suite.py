@@ -0,0 +1,199 @@
+"""
+Benchmarks of the hot paths of the wiki, on a synthetic corpus.
+
+Each benchmark records its best wall time, the number of database queries
+and the peak memory allocated by Python. The results are emitted as JSON, so
+they can be stored and compared between commits::
+
+    python -m wakawaka.tests.benchmarks --output before.json
+    python -m wakawaka.tests.benchmarks --baseline before.json
+
+Compared to a baseline, a benchmark regresses if it runs more queries, or
+takes more time or memory than the baseline times the tolerance.
+"""
+
+from __future__ import annotations
+
+import time
+import tracemalloc
+from typing import TYPE_CHECKING, Any, Callable
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from wakawaka.rendering import get_render_cache
+from wakawaka.wikiwords import replace_wikiwords
+
+if TYPE_CHECKING:
+    from wakawaka.models import WikiPage
+
+
+class Wiki:
+    """
+    The state the benchmarks run against: a generated wiki, an anonymous
+    client and a client logged in as an editor.
+    """
+
+    def __init__(self, pages: list[WikiPage]) -> None:
+        self.pages = pages
+        # A page in the middle, so it's neither the newest nor the oldest.
+        self.page = pages[len(pages) // 2]
+        revisions = self.page.revisions.order_by("pk")
+        self.first, self.last = revisions.first(), revisions.last()
+
+        self.client = Client()
+        self.editor = Client()
+        user, _created = User.objects.get_or_create(
+            username="benchmark", defaults={"is_superuser": True, "is_staff": True}
+        )
+        self.editor.force_login(user)
+
+    def url(self, name: str, **kwargs: Any) -> str:
+        return reverse(name, kwargs=kwargs)
+
+
+# Each benchmark prepares a run, which is not measured, and returns the
+# callable to measure.
+BENCHMARKS: dict[str, Callable[[Wiki], Callable[[], Any]]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    def decorator(func: Callable[[Wiki], Callable[[], Any]]) -> Callable:
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+def clear_render_cache() -> None:
+    cache = get_render_cache()
+    if cache is not None:
+        cache.clear()
+
+
+@benchmark("replace_wikiwords")
+def wikiwords(wiki: Wiki) -> Callable[[], Any]:
+    content = wiki.page.current.content
+    return lambda: replace_wikiwords(content)
+
+
+@benchmark("page")
+def page(wiki: Wiki) -> Callable[[], Any]:
+    clear_render_cache()
+    url = wiki.url("wakawaka_page", slug=wiki.page.slug)
+    return lambda: wiki.client.get(url)
+
+
+@benchmark("page_cached")
+def page_cached(wiki: Wiki) -> Callable[[], Any]:
+    url = wiki.url("wakawaka_page", slug=wiki.page.slug)
+    wiki.client.get(url)
+    return lambda: wiki.client.get(url)
+
+
+@benchmark("changes")
+def changes(wiki: Wiki) -> Callable[[], Any]:
+    clear_render_cache()
+    url = wiki.url("wakawaka_changes", slug=wiki.page.slug)
+    url = f"{url}?a={wiki.last.pk}&b={wiki.first.pk}"
+    return lambda: wiki.client.get(url)
+
+
+@benchmark("revision_list")
+def revision_list(wiki: Wiki) -> Callable[[], Any]:
+    url = wiki.url("wakawaka_revision_list")
+    return lambda: wiki.client.get(url)
+
+
+@benchmark("revisions")
+def revisions(wiki: Wiki) -> Callable[[], Any]:
+    url = wiki.url("wakawaka_revision_list", slug=wiki.page.slug)
+    return lambda: wiki.client.get(url)
+
+
+@benchmark("page_list")
+def page_list(wiki: Wiki) -> Callable[[], Any]:
+    url = wiki.url("wakawaka_page_list")
+    return lambda: wiki.client.get(url)
+
+
+@benchmark("edit")
+def edit(wiki: Wiki) -> Callable[[], Any]:
+    url = wiki.url("wakawaka_edit", slug=wiki.page.slug)
+    content = f"{wiki.page.current.content}\n\nEdited at {time.time()}"
+    return lambda: wiki.editor.post(url, {"content": content, "message": "Edit"})
+
+
+def measure(wiki: Wiki, name: str, repeat: int = 5) -> dict[str, Any]:
+    """
+    Runs the given benchmark `repeat` times and returns its best wall time
+    in seconds and its number of queries. The peak memory in bytes is taken
+    from an additional run, as tracing allocations slows the run down.
+    """
+    prepare = BENCHMARKS[name]
+    timings = []
+    for _ in range(repeat):
+        run = prepare(wiki)
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        queries = len(context.captured_queries)
+
+    run = prepare(wiki)
+    tracemalloc.start()
+    try:
+        run()
+        _current, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "time": min(timings),
+        "queries": queries,
+        "peak_memory": peak_memory,
+    }
+
+
+def run_benchmarks(
+    wiki: Wiki, names: list[str] | None = None, repeat: int = 5
+) -> dict[str, dict[str, Any]]:
+    """
+    Runs the given benchmarks, or all of them, and returns the results by
+    benchmark name.
+    """
+    return {name: measure(wiki, name, repeat) for name in names or BENCHMARKS}
+
+
+def compare(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    time_tolerance: float = 1.25,
+    memory_tolerance: float = 1.25,
+) -> list[str]:
+    """
+    Returns a message for each regression of the results against the
+    baseline. Benchmarks missing in the baseline are skipped.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        if result["queries"] > before["queries"]:
+            regressions.append(
+                f"{name}: {result['queries']} queries, was {before['queries']}"
+            )
+        if result["time"] > before["time"] * time_tolerance:
+            regressions.append(
+                f"{name}: {result['time']:.4f}s, was {before['time']:.4f}s"
+            )
+        if result["peak_memory"] > before["peak_memory"] * memory_tolerance:
+            regressions.append(
+                f"{name}: {result['peak_memory']} bytes peak memory, "
+                f"was {before['peak_memory']}"
+            )
+    return regressions
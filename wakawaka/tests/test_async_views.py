@@ -0,0 +1,151 @@
+import asyncio
+from unittest import mock
+
+import django
+from asgiref.sync import iscoroutinefunction
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from wakawaka import async_views, metrics
+from wakawaka.tests.base import BaseTestCase
+
+ASYNC_URLCONF = "wakawaka.tests.test_project.async_urls"
+
+
+class AsyncViewsTestCase(BaseTestCase):
+    """
+    The async views respond just like their sync counterparts.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.page = self.create_wikipage(
+            "WikiIndex", "First revision", "Second revision links to CarrotCake"
+        )
+        self.first, self.second = self.page.revisions.order_by("pk")
+        self.urls = (
+            reverse("wakawaka_page", kwargs={"slug": "WikiIndex"}),
+            reverse(
+                "wakawaka_page", kwargs={"slug": "WikiIndex", "rev_id": self.first.pk}
+            ),
+            reverse("wakawaka_revision_list", kwargs={"slug": "WikiIndex"}),
+            reverse("wakawaka_changes", kwargs={"slug": "WikiIndex"})
+            + f"?a={self.second.pk}&b={self.first.pk}",
+            reverse("wakawaka_revision_list"),
+            reverse("wakawaka_page_list"),
+        )
+
+    def get_both(self, url: str, **headers: str) -> tuple:
+        sync_response = self.client.get(url, headers=headers)
+        with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+            async_response = self.client.get(url, headers=headers)
+        return sync_response, async_response
+
+    def test_same_responses(self) -> None:
+        for url in self.urls:
+            with self.subTest(url=url):
+                sync_response, async_response = self.get_both(url)
+                assert async_response.status_code == 200
+                assert async_response.content == sync_response.content
+                assert async_response.get("ETag") == sync_response.get("ETag")
+
+    def test_same_responses_logged_in(self) -> None:
+        self.login_superuser()
+        self.test_same_responses()
+
+    def test_same_responses_without_auser(self) -> None:
+        """
+        Before Django 5.0, the user is loaded without `request.auser()`.
+        """
+        self.login_superuser()
+        with mock.patch.object(django, "VERSION", (4, 2, 0, "final", 0)):
+            self.test_same_responses()
+
+    def test_conditional_get(self) -> None:
+        with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+            for url in self.urls[:4]:
+                with self.subTest(url=url):
+                    etag = self.client.get(url)["ETag"]
+                    response = self.client.get(url, headers={"if-none-match": etag})
+                    assert response.status_code == 304
+
+    def test_errors(self) -> None:
+        self.create_wikipage("NutBread", "Nuts")
+        changes = reverse("wakawaka_changes", kwargs={"slug": "WikiIndex"})
+        for url, status in (
+            (reverse("wakawaka_page", kwargs={"slug": "CarrotCake"}), 404),
+            (
+                reverse("wakawaka_page", kwargs={"slug": "WikiIndex", "rev_id": 999}),
+                404,
+            ),
+            (
+                reverse(
+                    "wakawaka_page",
+                    kwargs={"slug": "NutBread", "rev_id": self.first.pk},
+                ),
+                404,
+            ),
+            (reverse("wakawaka_revision_list", kwargs={"slug": "CarrotCake"}), 404),
+            (f"{changes}?a={self.first.pk}", 400),
+            (f"{changes}?a={self.first.pk}&b=foo", 400),
+            (f"{changes}?a={self.first.pk}&b=999", 404),
+        ):
+            with self.subTest(url=url):
+                sync_response, async_response = self.get_both(url)
+                assert sync_response.status_code == status
+                assert async_response.status_code == status
+
+        # Logged in users are redirected to the edit form of missing pages
+        self.login_superuser()
+        _sync_response, async_response = self.get_both(
+            reverse("wakawaka_page", kwargs={"slug": "CarrotCake"})
+        )
+        assert async_response.status_code == 302
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+    def test_query_budget(self) -> None:
+        """
+        The async views run as many queries as the sync views.
+        """
+        for url, budget in zip(self.urls, (3, 4, 2, 4, 1, 1)):
+            with self.subTest(url=url), self.assertQueryBudget(budget):
+                self.client.get(url)
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF, WAKAWAKA_METRICS=True)
+    def test_metrics(self) -> None:
+        metrics.registry.reset()
+        self.client.get(self.urls[0])
+        assert metrics.registry.view_queries["page"].sum == 3
+        assert ("page", "render") in metrics.registry.section_durations
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF, WAKAWAKA_METRICS=True)
+    async def test_metrics_concurrent_requests(self) -> None:
+        """
+        Concurrent requests share the database connection of the thread
+        running the ORM, but each one only counts its own queries.
+        """
+        received = []
+
+        def receiver(view: str, queries: int, **kwargs: object) -> None:
+            received.append((view, queries))
+
+        metrics.view_measured.connect(receiver)
+        try:
+            # The history of the page and the recent changes, three times
+            urls = [self.urls[2], self.urls[4]] * 3
+            await asyncio.gather(*(self.async_client.get(url) for url in urls))
+        finally:
+            metrics.view_measured.disconnect(receiver)
+
+        assert sorted(received) == [("revision_list", 1)] * 3 + [("revisions", 2)] * 3
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+    async def test_async_client(self) -> None:
+        response = await self.async_client.get(self.urls[0])
+        assert response.status_code == 200
+        assert b"Second revision" in response.content
+
+    def test_views_are_async(self) -> None:
+        for name in ("page", "revisions", "changes", "revision_list", "page_list"):
+            with self.subTest(name=name):
+                assert iscoroutinefunction(getattr(async_views, name))
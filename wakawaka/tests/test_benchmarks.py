@@ -0,0 +1,44 @@
+from wakawaka.models import Revision, WikiLink, WikiPage
+from wakawaka.tests.base import BaseTestCase
+from wakawaka.tests.benchmarks.corpus import generate_wiki, page_slug
+from wakawaka.tests.benchmarks.suite import BENCHMARKS, Wiki, compare, run_benchmarks
+
+
+class BenchmarkSuiteTestCase(BaseTestCase):
+    """
+    The benchmark suite generates a synthetic wiki and measures each hot
+    path on it.
+    """
+
+    def test_generate_wiki(self) -> None:
+        pages = generate_wiki(pages=5, revisions=3, link_density=0.2, page_size=500)
+        assert [p.slug for p in pages] == [page_slug(i) for i in range(5)]
+        assert pages[0].slug == "WikiIndex"
+        assert WikiPage.objects.count() == 5
+        assert Revision.objects.count() == 15
+        assert WikiLink.objects.exists()
+        assert all(400 < len(p.current.content) < 700 for p in pages)
+
+    def test_run_benchmarks(self) -> None:
+        wiki = Wiki(generate_wiki(pages=3, revisions=2, page_size=500))
+        results = run_benchmarks(wiki, repeat=1)
+        assert set(results) == set(BENCHMARKS)
+        assert results["page"]["queries"] == 3
+        for result in results.values():
+            assert result["time"] > 0
+            assert result["peak_memory"] > 0
+
+    def test_compare(self) -> None:
+        baseline = {"page": {"time": 1.0, "queries": 3, "peak_memory": 1000}}
+        within = {"page": {"time": 1.2, "queries": 3, "peak_memory": 1200}}
+        assert compare(within, baseline) == []
+
+        unknown = {"other": {"time": 9.0, "queries": 9, "peak_memory": 9000}}
+        assert compare(unknown, baseline) == []
+
+        regressed = {"page": {"time": 1.3, "queries": 4, "peak_memory": 1300}}
+        assert compare(regressed, baseline) == [
+            "page: 4 queries, was 3",
+            "page: 1.3000s, was 1.0000s",
+            "page: 1300 bytes peak memory, was 1000",
+        ]
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.urls import reverse
 
 from wakawaka.tests.base import BaseTestCase
@@ -33,3 +34,34 @@ class ChangesTestCase(BaseTestCase):
         url = f"{self.page_url}?a=1&b=1"
         response = self.client.get(url)
         assert response.status_code == 200
+
+    def test_invalid_rev_ids_given(self) -> None:
+        url = f"{self.page_url}?a=1&b=foo"
+        response = self.client.get(url)
+        assert response.status_code == 400
+
+    def test_rev_ids_of_other_page_given(self) -> None:
+        other = self.create_wikipage("CarrotCake", "Carrot Content")
+        url = f"{self.page_url}?a={other.current.pk}&b=1"
+        response = self.client.get(url)
+        assert response.status_code == 404
+
+    def test_diff_is_cached(self) -> None:
+        cache.clear()
+        url = f"{self.page_url}?a=2&b=1"
+        response = self.client.get(url)
+        self.assertContains(response, "+Second Content")
+        assert response["Cache-Control"] == "private, max-age=60"
+
+        # The bodies of both revisions aren't needed anymore
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, "-First Content")
+
+        # Revisions with the same content share the diff
+        page = self.create_wikipage("CarrotCake", "First Content", "Second Content")
+        first, second = page.revisions.order_by("pk")
+        url = reverse("wakawaka_changes", kwargs={"slug": "CarrotCake"})
+        with self.assertNumQueries(2):
+            response = self.client.get(f"{url}?a={second.pk}&b={first.pk}")
+        self.assertContains(response, "+Second Content")
@@ -0,0 +1,90 @@
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from wakawaka.tests.base import BaseTestCase
+
+
+class ConditionalGetTestCase(BaseTestCase):
+    """
+    The page, history and changes views send an ETag and Last-Modified
+    header, and answer with 304 if the client's copy is still valid.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.page = self.create_wikipage("WikiIndex", "First", "Links to CarrotCake")
+        self.first, self.second = self.page.revisions.order_by("pk")
+
+    def assertNotModified(self, url: str, queries: int) -> None:  # noqa: N802
+        response = self.client.get(url)
+        assert response.status_code == 200
+        assert response["Last-Modified"]
+
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, headers={"if-none-match": response["ETag"]})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_page(self) -> None:
+        url = reverse("wakawaka_page", kwargs={"slug": "WikiIndex"})
+        self.assertNotModified(url, 1)
+
+        url = reverse(
+            "wakawaka_page", kwargs={"slug": "WikiIndex", "rev_id": self.first.pk}
+        )
+        self.assertNotModified(url, 2)
+
+    def test_page_if_modified_since(self) -> None:
+        url = reverse("wakawaka_page", kwargs={"slug": "WikiIndex"})
+        response = self.client.get(url)
+        response = self.client.get(
+            url, headers={"if-modified-since": response["Last-Modified"]}
+        )
+        assert response.status_code == 304
+
+    def test_page_changes(self) -> None:
+        url = reverse("wakawaka_page", kwargs={"slug": "WikiIndex"})
+        etag = self.client.get(url)["ETag"]
+
+        # A page it links to is created
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_wikipage("CarrotCake", "Carrot Content")
+        response = self.client.get(url, headers={"if-none-match": etag})
+        assert response.status_code == 200
+        etag = response["ETag"]
+
+        # The page is edited
+        self.login_superuser()
+        response = self.client.get(url, headers={"if-none-match": etag})
+        assert response.status_code == 200
+        etag = response["ETag"]
+        edit_url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        self.client.post(edit_url, {"content": "New content"})
+        response = self.client.get(url, headers={"if-none-match": etag})
+        assert response.status_code == 200
+
+    def test_pending_messages(self) -> None:
+        self.login_superuser()
+        edit_url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        response = self.client.post(edit_url, {"content": "New content"}, follow=True)
+        self.assertContains(response, "Your changes to WikiIndex were saved")
+        assert "ETag" not in response
+
+    @override_settings(WAKAWAKA_RENDER_CACHE=None)
+    def test_page_without_render_cache(self) -> None:
+        url = reverse("wakawaka_page", kwargs={"slug": "WikiIndex"})
+        assert "ETag" not in self.client.get(url)
+
+    def test_revisions(self) -> None:
+        url = reverse("wakawaka_revision_list", kwargs={"slug": "WikiIndex"})
+        etag = self.client.get(url)["ETag"]
+        self.assertNotModified(url, 2)
+
+        self.first.delete()
+        response = self.client.get(url, headers={"if-none-match": etag})
+        assert response.status_code == 200
+
+    def test_changes(self) -> None:
+        url = reverse("wakawaka_changes", kwargs={"slug": "WikiIndex"})
+        url = f"{url}?a={self.second.pk}&b={self.first.pk}"
+        self.assertNotModified(url, 2)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import multiprocessing
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.test.utils import override_settings
+
+from wakawaka.diff import (
+    DifflibEngine,
+    ProcessEngine,
+    coarse_diff,
+    compute_diff,
+    unified_diff,
+)
+from wakawaka.tests.base import BaseTestCase
+
+OLD = "\n".join(f"Line {i}" for i in range(10))
+NEW = OLD.replace("Line 4", "Line four").replace("Line 6", "Line six")
+
+
+class SlowEngine(ProcessEngine):
+    def compute(self, old_lines: list[str], new_lines: list[str]) -> list[str]:
+        time.sleep(10)
+        return super().compute(old_lines, new_lines)
+
+
+class DiffTestCase(BaseTestCase):
+    """
+    Diffs are computed by a pluggable engine, within configurable limits.
+    """
+
+    def test_exact_diff(self) -> None:
+        diff, _timed_out = compute_diff(OLD, NEW)
+        assert "@@ -2,9 +2,9 @@" in diff
+        assert " Line 5" in diff
+
+    def test_coarse_diff(self) -> None:
+        assert coarse_diff(OLD.splitlines(), NEW.splitlines(), 100) == [
+            "--- Original",
+            "+++ Current",
+            "@@ -5,3 +5,3 @@",
+            "-Line 4",
+            "-Line 5",
+            "-Line 6",
+            "+Line four",
+            "+Line 5",
+            "+Line six",
+        ]
+        assert coarse_diff(["A"], ["A", "B"], 100)[2] == "@@ -1,0 +2 @@"
+        assert coarse_diff(OLD.splitlines(), NEW.splitlines(), 5) is None
+
+    @override_settings(WAKAWAKA_DIFF_MAX_LINES=10)
+    def test_too_many_lines_for_exact_diff(self) -> None:
+        diff, timed_out = compute_diff(OLD, NEW)
+        assert "@@ -5,3 +5,3 @@" in diff
+        assert not timed_out
+
+    @override_settings(WAKAWAKA_DIFF_MAX_LINES=10, WAKAWAKA_DIFF_MAX_COARSE_LINES=5)
+    def test_too_many_lines_for_coarse_diff(self) -> None:
+        diff, _timed_out = compute_diff(OLD, NEW)
+        assert diff == (
+            "The revisions are too large to compare: 2 lines removed, 2 lines added."
+        )
+
+    @override_settings(WAKAWAKA_DIFF_ENGINE="wakawaka.diff.ProcessEngine")
+    def test_process_engine(self) -> None:
+        old_lines, new_lines = OLD.splitlines(), NEW.splitlines()
+        diff = ProcessEngine().diff(old_lines, new_lines)
+        assert diff == DifflibEngine().diff(old_lines, new_lines)
+        assert "@@ -2,9 +2,9 @@" in compute_diff(OLD, NEW)[0]
+
+    @override_settings(
+        WAKAWAKA_DIFF_ENGINE="wakawaka.tests.test_diff.SlowEngine",
+        WAKAWAKA_DIFF_TIMEOUT=0.1,
+    )
+    def test_timeout(self) -> None:
+        start = time.monotonic()
+        diff, timed_out = compute_diff(OLD, NEW)
+        assert time.monotonic() - start < 5
+        assert "@@ -5,3 +5,3 @@" in diff
+        assert timed_out
+        # Only the process of the timed out diff was killed.
+        assert not multiprocessing.active_children()
+        assert ProcessEngine().diff(["A"], ["B"])[2:] == ["@@ -1 +1 @@", "-A", "+B"]
+
+    @override_settings(
+        WAKAWAKA_DIFF_ENGINE="wakawaka.tests.test_diff.SlowEngine",
+        WAKAWAKA_DIFF_TIMEOUT=0.1,
+        WAKAWAKA_DIFF_RETRY_AFTER=30,
+    )
+    def test_timed_out_diff_is_cached_briefly(self) -> None:
+        """
+        The fallback for a diff which timed out is only cached until the
+        exact diff is retried.
+        """
+        page = self.create_wikipage("WikiIndex", OLD, NEW)
+        old, new = page.revisions.order_by("pk")
+        cache = caches["default"]
+        with mock.patch.object(cache, "set", wraps=cache.set) as cache_set:
+            unified_diff(old, new)
+        assert cache_set.call_args.kwargs["timeout"] == 30
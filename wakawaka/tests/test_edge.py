@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from wakawaka.edge import HTTPPurger, RecordingPurger
+from wakawaka.tests.base import BaseTestCase
+
+
+@override_settings(WAKAWAKA_PURGER="wakawaka.edge.RecordingPurger")
+class EdgeCachingTestCase(BaseTestCase):
+    """
+    Anonymous page views are cacheable by shared caches and tagged with
+    surrogate keys, which are purged whenever a page changes.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.page = self.create_wikipage("WikiIndex", "First", "See CarrotCake")
+        self.first = self.page.revisions.order_by("pk").first()
+        RecordingPurger.purged.clear()
+
+    def test_page_headers(self) -> None:
+        response = self.client.get(
+            reverse("wakawaka_page", kwargs={"slug": "WikiIndex"})
+        )
+        assert response["Cache-Control"] == "public, max-age=0, s-maxage=86400"
+        assert response["Surrogate-Key"] == (
+            f"page:WikiIndex rev:{self.page.current_revision_id} link:CarrotCake"
+        )
+
+    def test_revision_headers(self) -> None:
+        url = reverse(
+            "wakawaka_page", kwargs={"slug": "WikiIndex", "rev_id": self.first.pk}
+        )
+        response = self.client.get(url)
+        assert response["Cache-Control"] == "public, max-age=0, s-maxage=86400"
+        assert response["Surrogate-Key"] == f"page:WikiIndex rev:{self.first.pk}"
+
+    def test_revision_of_other_page(self) -> None:
+        """
+        Revisions are only displayed with the slug of their own page.
+        """
+        self.create_wikipage("CarrotCake", "Carrots")
+        url = reverse(
+            "wakawaka_page", kwargs={"slug": "CarrotCake", "rev_id": self.first.pk}
+        )
+        assert self.client.get(url).status_code == 404
+
+    @override_settings(WAKAWAKA_SURROGATE_KEY_HEADER="xkey")
+    def test_header_name(self) -> None:
+        response = self.client.get(
+            reverse("wakawaka_page", kwargs={"slug": "WikiIndex"})
+        )
+        assert response["xkey"].startswith("page:WikiIndex")
+
+    def test_logged_in_is_private(self) -> None:
+        self.login_superuser()
+        response = self.client.get(
+            reverse("wakawaka_page", kwargs={"slug": "WikiIndex"})
+        )
+        assert response["Cache-Control"] == "private"
+        assert "Surrogate-Key" not in response
+
+    def test_purge_on_edit(self) -> None:
+        self.login_superuser()
+        url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {"content": "Edited"})
+        assert RecordingPurger.purged == [{"page:WikiIndex"}]
+
+        # A new page also purges the pages linking to it
+        url = reverse("wakawaka_edit", kwargs={"slug": "CarrotCake"})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {"content": "Cake"})
+        assert RecordingPurger.purged[1] == {"page:CarrotCake", "link:CarrotCake"}
+
+    def test_purge_on_delete(self) -> None:
+        self.login_superuser()
+        current = self.page.current_revision_id
+        url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {"delete": "rev"})
+        assert RecordingPurger.purged == [{"page:WikiIndex", f"rev:{current}"}]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {"delete": "page"})
+        assert RecordingPurger.purged[1] == {"page:WikiIndex", "link:WikiIndex"}
+
+    @override_settings(WAKAWAKA_PURGE_URL="http://varnish.example.com/")
+    def test_http_purger(self) -> None:
+        with mock.patch("urllib.request.urlopen") as urlopen:
+            HTTPPurger().purge({"page:WikiIndex", "rev:1"})
+        request = urlopen.call_args.args[0]
+        assert request.method == "PURGE"
+        assert request.full_url == "http://varnish.example.com/"
+        assert request.get_header("Surrogate-key") == "page:WikiIndex rev:1"
+
+        with mock.patch("urllib.request.urlopen", side_effect=OSError):  # noqa: SIM117 - Python 3.8
+            with self.assertLogs("wakawaka.edge", "ERROR"):
+                HTTPPurger().purge({"page:WikiIndex"})
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import io
+import json
+import tarfile
+import tempfile
+import zipfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from wakawaka.exporting import export
+from wakawaka.models import WikiPage
+from wakawaka.tests.base import BaseTestCase
+
+CONTENTS = [f"Line {i}\n" * 20 + f"Revision {i}\n" for i in range(6)]
+
+
+@override_settings(WAKAWAKA_REVISION_STORAGE="delta", WAKAWAKA_KEYFRAME_INTERVAL=4)
+class ExportTestCase(BaseTestCase):
+    """
+    The wiki is exported with the current revision or the full history of
+    every page, as JSONL or a tar or zip archive, streamed in chunks.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.user = self._create_user("author", "foobar")
+        self.user.save()
+        self.page = self.create_wikipage("WikiIndex", *CONTENTS)
+        self.page.revisions.update(creator=self.user)
+        self.create_wikipage("CarrotCake", "Grate the carrots.")
+        # A page without revisions has nothing to export
+        WikiPage.objects.create(slug="EmptyPage")
+
+    def read_jsonl(self, chunks: list[bytes]) -> list[dict]:
+        return [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+    def test_jsonl_current(self) -> None:
+        records = self.read_jsonl(list(export("jsonl")))
+        assert [(r["slug"], r["content"]) for r in records] == [
+            ("CarrotCake", "Grate the carrots."),
+            ("WikiIndex", CONTENTS[-1]),
+        ]
+        assert records[1]["creator"] == "author"
+        assert records[1]["creator_ip"] == "127.0.0.1"
+        assert records[1]["message"] == f"Created via API: {CONTENTS[-1]}"
+        assert records[1]["created"] == self.page.current.created.isoformat()
+
+    def test_jsonl_history(self) -> None:
+        # Deltas are applied to the previous revision, without further queries
+        with self.assertNumQueries(1):
+            chunks = list(export("jsonl", history=True))
+        records = self.read_jsonl(chunks)
+        assert [r["content"] for r in records if r["slug"] == "WikiIndex"] == CONTENTS
+
+    def test_tar(self) -> None:
+        data = b"".join(export("tar", history=True))
+        with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+            members = archive.getmembers()
+            assert len(members) == 7
+            first = self.page.revisions.order_by("pk").first()
+            member = archive.getmember(f"WikiIndex/rev{first.pk}.txt")
+            assert archive.extractfile(member).read().decode() == CONTENTS[0]
+            assert member.mtime == int(first.created.timestamp())
+
+    def test_zip(self) -> None:
+        data = b"".join(export("zip"))
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.namelist() == ["CarrotCake.txt", "WikiIndex.txt"]
+            assert archive.read("WikiIndex.txt").decode() == CONTENTS[-1]
+
+    def test_command_roundtrip(self) -> None:
+        """
+        A JSONL export can be imported into another wiki.
+        """
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = str(Path(tempdir) / "wiki.jsonl")
+            stdout = StringIO()
+            call_command("wakawaka_export", path, "--history", stdout=stdout)
+            assert f"Exported the wiki to {path}." in stdout.getvalue()
+
+            WikiPage.objects.all().delete()
+            call_command("wakawaka_import", path, stdout=StringIO())
+
+        page = WikiPage.objects.get(slug="WikiIndex")
+        assert [rev.content for rev in page.revisions.order_by("pk")] == CONTENTS
+        assert page.current.content == CONTENTS[-1]
+        assert page.current.creator == self.user
+
+    def test_command_format(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = str(Path(tempdir) / "wiki.zip")
+            call_command("wakawaka_export", path, stdout=StringIO())
+            assert zipfile.is_zipfile(path)
+
+    def test_view(self) -> None:
+        url = reverse("wakawaka_export")
+        assert self.client.get(url).status_code == 403
+
+        self.login_superuser()
+        response = self.client.get(url, {"format": "tar", "history": "1"})
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-tar"
+        assert response["Content-Disposition"] == (
+            'attachment; filename="wiki-history.tar"'
+        )
+        data = b"".join(response.streaming_content)
+        with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+            assert len(archive.getnames()) == 7
+
+        assert self.client.get(url, {"format": "rar"}).status_code == 400
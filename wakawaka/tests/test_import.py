@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+from wakawaka import importing
+from wakawaka.models import ImportCheckpoint, PageNode, Revision, WikiLink, WikiPage
+from wakawaka.search import SearchResults
+from wakawaka.tests.base import BaseTestCase
+
+MEDIAWIKI_XML = """<?xml version="1.0" encoding="utf-8"?>
+<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/">
+  <siteinfo><sitename>Legacy</sitename></siteinfo>
+  <page>
+    <title>Carrot cake</title>
+    <ns>0</ns>
+    <revision>
+      <timestamp>2004-05-01T10:00:00Z</timestamp>
+      <contributor><username>author</username></contributor>
+      <comment>First</comment>
+      <text>Grate the carrots.</text>
+    </revision>
+    <revision>
+      <timestamp>2004-05-02T10:00:00Z</timestamp>
+      <contributor><ip>10.0.0.1</ip></contributor>
+      <text>Grate the carrots. See NutBread.</text>
+    </revision>
+  </page>
+  <page>
+    <title>Talk:Carrot cake</title>
+    <ns>1</ns>
+    <revision><text>Delicious</text></revision>
+  </page>
+  <page>
+    <title>Cake</title>
+    <ns>0</ns>
+    <revision><text>Not a WikiWord</text></revision>
+  </page>
+</mediawiki>
+"""
+
+
+class ImportTestCase(BaseTestCase):
+    """
+    The `wakawaka_import` command stores revisions from JSONL or MediaWiki XML
+    in batches, with their original timestamps and creators.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.user = self._create_user("author", "foobar")
+        self.user.save()
+        self.create_wikipage("CarrotCake", "Existing content")
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+
+    def write(self, name: str, content: str) -> str:
+        path = Path(self.tempdir.name) / name
+        path.write_text(content, encoding="utf-8")
+        return str(path)
+
+    def write_jsonl(self, *records: dict) -> str:
+        return self.write(
+            "import.jsonl", "\n".join(json.dumps(record) for record in records)
+        )
+
+    def run_import(self, *args: str) -> str:
+        stdout = StringIO()
+        call_command("wakawaka_import", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_import_jsonl(self) -> None:
+        path = self.write_jsonl(
+            {
+                "slug": "NutBread",
+                "content": "Needs CarrotCake",
+                "created": "2010-01-01T12:00:00+00:00",
+                "creator": "author",
+                "message": "Imported",
+            },
+            {"slug": "CarrotCake", "content": "Older", "created": "2000-01-01T00:00"},
+            {
+                "slug": "NutBread",
+                "content": "Needs SugarFree",
+                "created": "2010-01-02T12:00:00+00:00",
+                "creator_ip": "10.0.0.1",
+            },
+        )
+        output = self.run_import(path, "--batch-size=2")
+        assert "Imported 3 revisions, 1 new pages." in output
+
+        page = WikiPage.objects.get(slug="NutBread")
+        assert page.created == datetime(2010, 1, 1, 12, tzinfo=timezone.utc)
+        first, second = page.revisions.order_by("created")
+        assert first.creator == self.user
+        assert first.message == "Imported"
+        assert first.content == "Needs CarrotCake"
+        assert second.creator_ip == "10.0.0.1"
+        assert second.modified == datetime(2010, 1, 2, 12, tzinfo=timezone.utc)
+
+        # The latest revision is current, indexed and its links are stored
+        assert page.current_revision == second
+        assert [p.slug for p in SearchResults("sugarfree")[:10]] == ["NutBread"]
+        assert list(
+            WikiLink.objects.filter(source=page).values_list("target_slug")
+        ) == [("SugarFree",)]
+
+        # An older revision of an existing page doesn't become current
+        page = WikiPage.objects.get(slug="CarrotCake")
+        assert page.revisions.count() == 2
+        assert page.current.content == "Existing content"
+
+        # New pages are added to the page index
+        assert PageNode.objects.get(path="NutBread").page_id is not None
+
+    def test_import_without_bulk_returning(self) -> None:
+        """
+        Databases which don't return the primary keys of bulk inserted rows
+        store the revisions one by one.
+        """
+        with mock.patch.object(
+            type(connection.features), "can_return_rows_from_bulk_insert", False
+        ):
+            self.test_import_jsonl()
+
+    def test_resume(self) -> None:
+        path = self.write_jsonl(
+            *({"slug": f"PageNumber{'Ab' * i}", "content": str(i)} for i in range(5))
+        )
+        import_batch = importing.import_batch
+        calls = []
+
+        def crash_on_second_batch(records: list) -> int:
+            calls.append(records)
+            if len(calls) == 2:
+                raise RuntimeError
+            return import_batch(records)
+
+        with mock.patch(
+            "wakawaka.management.commands.wakawaka_import.import_batch",
+            crash_on_second_batch,
+        ), pytest.raises(RuntimeError):
+            self.run_import(path, "--batch-size=2")
+        assert Revision.objects.filter(page__slug__startswith="Page").count() == 2
+        assert ImportCheckpoint.objects.get().position == 2
+
+        output = self.run_import(path, "--batch-size=2")
+        assert "Resuming after 2 revisions..." in output
+        assert "Imported 3 revisions, 3 new pages." in output
+        assert Revision.objects.filter(page__slug__startswith="Page").count() == 5
+
+        # Once done, running again imports nothing, unless restarted
+        assert "Imported 0 revisions" in self.run_import(path)
+        assert "Imported 5 revisions" in self.run_import(path, "--restart")
+
+    def test_import_mediawiki(self) -> None:
+        path = self.write("export.xml", MEDIAWIKI_XML)
+        output = self.run_import(path)
+        assert "Imported 2 revisions, 0 new pages." in output
+
+        page = WikiPage.objects.get(slug="CarrotCake")
+        assert page.revisions.count() == 3
+        revision = page.revisions.get(creator_ip="10.0.0.1")
+        assert revision.content == "Grate the carrots. See NutBread."
+        revision = page.revisions.get(message="First")
+        assert revision.creator == self.user
+        assert revision.created == datetime(2004, 5, 1, 10, tzinfo=timezone.utc)
+        assert not WikiPage.objects.filter(slug="Cake").exists()
+
+    def test_mediawiki_slug(self) -> None:
+        assert importing.mediawiki_slug("Carrot cake") == "CarrotCake"
+        assert (
+            importing.mediawiki_slug("Carrot_cake/nut bread") == "CarrotCake/NutBread"
+        )
+        assert importing.mediawiki_slug("Cake") is None
+
+    def test_invalid_input(self) -> None:
+        for line in (
+            "{not json",
+            '{"content": "No slug"}',
+            '{"slug": "lowercase", "content": "Invalid slug"}',
+            '{"slug": "NutBread", "content": "Text", "created": "yesterday"}',
+        ):
+            with self.subTest(line=line), self.assertRaisesMessage(
+                CommandError, "Line 1:"
+            ):
+                self.run_import(self.write("invalid.jsonl", line), "--restart")
+
+        with self.assertRaisesMessage(CommandError, "requires a --checkpoint"):
+            self.run_import("-")
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from wakawaka.models import WikiLink
+from wakawaka.tests.base import BaseTestCase
+
+
+class LinkGraphTestCase(BaseTestCase):
+    """
+    The WikiWords of the current revision of each page are stored as links,
+    for the backlinks, orphaned pages and wanted pages views.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.create_wikipage("WikiIndex", "See CarrotCake and NutBread")
+        self.create_wikipage("CarrotCake", "Old link to LostPage", "Needs SugarFree")
+        self.create_wikipage("NutBread", "Needs SugarFree and NutBread")
+        self.create_wikipage("LostPage", "Links to WikiIndex")
+
+    def links(self) -> set[tuple[str, str]]:
+        return set(WikiLink.objects.values_list("source__slug", "target_slug"))
+
+    def test_links_of_current_revisions(self) -> None:
+        assert self.links() == {
+            ("WikiIndex", "CarrotCake"),
+            ("WikiIndex", "NutBread"),
+            ("CarrotCake", "SugarFree"),
+            ("NutBread", "SugarFree"),
+            ("LostPage", "WikiIndex"),
+        }
+
+    def test_links_are_updated(self) -> None:
+        self.login_superuser()
+        url = reverse("wakawaka_edit", kwargs={"slug": "CarrotCake"})
+        self.client.post(url, {"content": "Needs SugarFree and MoreSugar"})
+        assert ("CarrotCake", "MoreSugar") in self.links()
+
+        self.client.post(url, {"delete": "rev"})
+        assert ("CarrotCake", "MoreSugar") not in self.links()
+        assert ("CarrotCake", "SugarFree") in self.links()
+
+        self.client.post(url, {"delete": "page"})
+        assert not WikiLink.objects.filter(source__slug="CarrotCake").exists()
+
+    def test_backlinks(self) -> None:
+        url = reverse("wakawaka_backlinks", kwargs={"slug": "SugarFree"})
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        assert [p.slug for p in response.context["page_list"]] == [
+            "CarrotCake",
+            "NutBread",
+        ]
+
+        url = reverse("wakawaka_backlinks", kwargs={"slug": "LostPage"})
+        self.assertContains(self.client.get(url), "No pages link here.")
+
+    def test_orphans(self) -> None:
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("wakawaka_orphans"))
+        assert [p.slug for p in response.context["page_list"]] == ["LostPage"]
+
+    def test_wanted(self) -> None:
+        self.create_wikipage("MoreCake", "Needs MoreSugar")
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("wakawaka_wanted"))
+        assert list(response.context["wanted_list"]) == [
+            {"target_slug": "SugarFree", "count": 2},
+            {"target_slug": "MoreSugar", "count": 1},
+        ]
+        self.assertContains(response, "2 links")
+
+    def test_wanted_is_cached(self) -> None:
+        url = reverse("wakawaka_wanted")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        assert [link["target_slug"] for link in response.context["wanted_list"]] == [
+            "SugarFree"
+        ]
+
+        # Creating a wanted page changes the link epoch
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_wikipage("SugarFree", "No sugar")
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        assert list(response.context["wanted_list"]) == []
+
+    @override_settings(WAKAWAKA_RENDER_CACHE=None)
+    def test_wanted_without_cache(self) -> None:
+        url = reverse("wakawaka_wanted")
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    @override_settings(WAKAWAKA_INDEX_PER_PAGE=1)
+    def test_listings_are_paginated(self) -> None:
+        self.create_wikipage("MoreCake", "Needs MoreSugar and SugarFree")
+        self.create_wikipage("LastCake", "Needs NoSugar")
+
+        url = reverse("wakawaka_backlinks", kwargs={"slug": "SugarFree"})
+        assert self._walk(url, "page_list") == [
+            ["CarrotCake"],
+            ["MoreCake"],
+            ["NutBread"],
+        ]
+        assert self._walk(reverse("wakawaka_orphans"), "page_list") == [
+            ["LastCake"],
+            ["LostPage"],
+            ["MoreCake"],
+        ]
+        assert self._walk(reverse("wakawaka_wanted"), "wanted_list") == [
+            ["SugarFree"],
+            ["MoreSugar"],
+            ["NoSugar"],
+        ]
+
+    def _walk(self, url: str, name: str) -> list[list[str]]:
+        """
+        Returns the slugs listed on each page of a listing, following the
+        links to the next page.
+        """
+        pages = []
+        query_string = ""
+        while query_string is not None:
+            with self.assertNumQueries(1):
+                response = self.client.get(f"{url}?{query_string}")
+            pages.append(
+                [
+                    item["target_slug"] if isinstance(item, dict) else item.slug
+                    for item in response.context[name]
+                ]
+            )
+            query_string = response.context["next_query_string"]
+        return pages
+
+    def test_backfill_command(self) -> None:
+        links = self.links()
+        WikiLink.objects.all().delete()
+
+        stdout = StringIO()
+        call_command("wakawaka_backfill_links", batch_size=3, stdout=stdout)
+        assert "Stored 5 links of 4 pages." in stdout.getvalue()
+        assert self.links() == links
+
+    @override_settings(WAKAWAKA_REVISION_STORAGE="delta")
+    def test_migration_stores_links(self) -> None:
+        """
+        The migration adding the links stores those of existing pages, whose
+        current revision may be stored as a delta.
+        """
+        self.create_wikipage("BeanSoup", "See WikiIndex", "See WikiIndex and LostPage")
+        links = self.links()
+        WikiLink.objects.all().delete()
+        migration = import_module("wakawaka.migrations.0010_wikilink")
+        migration.store_links(apps, None)
+        assert self.links() == links
+        assert ("BeanSoup", "LostPage") in links
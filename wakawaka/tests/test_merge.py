@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory, SimpleTestCase
+from django.urls import reverse
+
+from wakawaka.forms import WikiPageForm
+from wakawaka.merge import merge
+from wakawaka.models import Revision
+from wakawaka.tests.base import BaseTestCase
+
+BASE = "\n".join(f"Line {i}" for i in range(10))
+
+
+class MergeTestCase(SimpleTestCase):
+    """
+    Edits of different lines are merged, overlapping edits are conflicts.
+    """
+
+    def test_merge(self) -> None:
+        ours = BASE.replace("Line 2", "Line two")
+        theirs = BASE.replace("Line 7", "Line seven") + "\nLine 10"
+        assert merge(BASE, ours, theirs) == (
+            BASE.replace("Line 2", "Line two").replace("Line 7", "Line seven")
+            + "\nLine 10",
+            0,
+        )
+
+    def test_same_change(self) -> None:
+        ours = theirs = BASE.replace("Line 2", "Line two")
+        assert merge(BASE, ours, theirs) == (ours, 0)
+
+    def test_conflict(self) -> None:
+        ours = BASE.replace("Line 2", "Line two")
+        theirs = BASE.replace("Line 2", "Line 2!").replace("Line 8", "Line eight")
+        content, conflicts = merge(BASE, ours, theirs)
+        assert conflicts == 1
+        assert content == BASE.replace(
+            "Line 2",
+            "<<<<<<< Your changes\nLine two\n=======\nLine 2!\n"
+            ">>>>>>> Current revision",
+        ).replace("Line 8", "Line eight")
+
+    def test_newline_at_end(self) -> None:
+        ours = BASE.replace("Line 0", "Line zero")
+        theirs = BASE + "\n"
+        assert merge(BASE, ours, theirs) == (ours, 0)
+        assert merge(BASE, "", "") == ("", 0)
+
+    def test_crlf(self) -> None:
+        """
+        Browsers submit CRLF line endings, which aren't changes of the lines.
+        """
+        assert merge("a\r\nb", "a\r\nb\r\nc", "a2\r\nb") == ("a2\r\nb\r\nc", 0)
+        assert merge("a\nb\n", "a\r\nb\r\nc\r\n", "a2\nb\n") == (
+            "a2\r\nb\r\nc\r\n",
+            0,
+        )
+        content, conflicts = merge("a\r\nb", "a1\r\nb", "a2\r\nb")
+        assert conflicts == 1
+        assert content == (
+            "<<<<<<< Your changes\r\na1\r\n=======\r\na2\r\n"
+            ">>>>>>> Current revision\r\nb"
+        )
+
+
+class ConcurrentEditTestCase(BaseTestCase):
+    """
+    Saving an edit of a page changed meanwhile merges both changes, or
+    displays the conflicts, rather than overwriting the other change.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.page = self.create_wikipage("WikiIndex", BASE)
+        self.base = self.page.current_revision
+        self.edit_url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        self.login_superuser()
+
+    def edit(self, content: str, base: Revision | None = None) -> object:
+        data = {"content": content, "message": "Edit"}
+        if base is not None:
+            data["base_revision"] = base.pk
+        return self.client.post(self.edit_url, data, follow=True)
+
+    def test_base_revision(self) -> None:
+        response = self.client.get(self.edit_url)
+        assert response.context["form"].initial["base_revision"] == self.base.pk
+        self.assertContains(response, 'name="base_revision"')
+
+    def test_merge(self) -> None:
+        self.edit(BASE.replace("Line 7", "Line seven"), self.base)
+        response = self.edit(BASE.replace("Line 2", "Line two"), self.base)
+        self.assertContains(response, "were saved and merged")
+
+        self.page.refresh_from_db()
+        assert self.page.current.content == BASE.replace("Line 2", "Line two").replace(
+            "Line 7", "Line seven"
+        )
+        assert self.page.revisions.count() == 3
+
+    def test_conflict(self) -> None:
+        self.edit(BASE.replace("Line 2", "Line 2!"), self.base)
+        head = Revision.objects.latest("pk")
+        response = self.edit(BASE.replace("Line 2", "Line two"), self.base)
+        form = response.context["form"]
+        assert "content" in form.errors
+        assert form["base_revision"].value() == head.pk
+        assert "<<<<<<< Your changes\nLine two\n=======\nLine 2!" in (
+            form["content"].value()
+        )
+        assert self.page.revisions.count() == 2
+
+        # Resolving the conflict saves it on top of the current revision
+        self.edit(BASE.replace("Line 2", "Line two!"), head)
+        self.page.refresh_from_db()
+        assert self.page.current.content == BASE.replace("Line 2", "Line two!")
+
+    def test_without_base_revision(self) -> None:
+        """
+        Edits without a base revision replace the current revision.
+        """
+        self.edit(BASE.replace("Line 2", "Line 2!"), self.base)
+        self.edit(BASE.replace("Line 2", "Line two"))
+        self.page.refresh_from_db()
+        assert self.page.current.content == BASE.replace("Line 2", "Line two")
+
+    def test_base_revision_of_another_page(self) -> None:
+        other = self.create_wikipage("CarrotCake", "Carrots").current_revision
+        for base_id in (other.pk, other.pk + 100):
+            with self.subTest(base_id=base_id):
+                response = self.client.post(
+                    self.edit_url, {"content": "New content", "base_revision": base_id}
+                )
+                assert "base_revision" in response.context["form"].errors
+        assert self.page.revisions.count() == 1
+
+    def test_revisions_deleted_meanwhile(self) -> None:
+        """
+        An edit of a page which lost all its revisions meanwhile recreates
+        it with the edited content.
+        """
+        form = WikiPageForm(
+            data={"content": "New content", "base_revision": self.base.pk},
+            page=self.page,
+        )
+        assert form.is_valid()
+        self.page.revisions.all().delete()
+
+        request = RequestFactory().post(self.edit_url)
+        request.user = User.objects.get(username="superuser")
+        rev = form.save(request, self.page)
+        self.page.refresh_from_db()
+        assert self.page.current_revision == rev
+        assert rev.content == "New content"
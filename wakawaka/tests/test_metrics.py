@@ -0,0 +1,108 @@
+from django.core.cache import cache
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from wakawaka import metrics
+from wakawaka.tests.base import BaseTestCase
+
+
+@override_settings(WAKAWAKA_METRICS=True)
+class MetricsTestCase(BaseTestCase):
+    """
+    With metrics enabled, the views record their latency, queries, section
+    timings and cache lookups, and expose them in the Prometheus format.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        metrics.registry.reset()
+        self.page = self.create_wikipage("WikiIndex", "First", "See CarrotCake")
+        self.first, self.second = self.page.revisions.order_by("pk")
+        self.url = reverse("wakawaka_page", kwargs={"slug": "WikiIndex"})
+
+    def test_view_metrics(self) -> None:
+        self.client.get(self.url)
+        self.client.get(self.url)
+
+        assert metrics.registry.view_durations["page"].count == 2
+        queries = metrics.registry.view_queries["page"]
+        assert queries.sum == 4  # The first request renders the content
+        assert set(metrics.registry.section_durations) == {
+            ("page", "lookup"),
+            ("page", "render"),
+            ("page", "wikiwords"),
+            ("page", "template"),
+        }
+        assert metrics.registry.cache_requests == {
+            ("render", "miss"): 1,
+            ("render", "hit"): 1,
+        }
+
+    def test_diff_cache(self) -> None:
+        url = reverse("wakawaka_changes", kwargs={"slug": "WikiIndex"})
+        url = f"{url}?a={self.second.pk}&b={self.first.pk}"
+        self.client.get(url)
+        self.client.get(url)
+        assert metrics.registry.cache_requests == {
+            ("diff", "miss"): 1,
+            ("diff", "hit"): 1,
+        }
+        assert ("changes", "diff") in metrics.registry.section_durations
+
+    def test_signal(self) -> None:
+        received = []
+
+        def receiver(**kwargs: object) -> None:
+            received.append(kwargs)
+
+        metrics.view_measured.connect(receiver)
+        try:
+            response = self.client.get(self.url)
+        finally:
+            metrics.view_measured.disconnect(receiver)
+
+        [kwargs] = received
+        assert kwargs["view"] == "page"
+        assert kwargs["response"] is response
+        assert kwargs["queries"] == 3
+        assert kwargs["duration"] >= kwargs["sections"]["render"]
+
+    @override_settings(WAKAWAKA_METRICS_ALLOWED_IPS=("127.0.0.1",))
+    def test_prometheus_export(self) -> None:
+        self.client.get(self.url)
+        response = self.client.get(reverse("wakawaka_metrics"))
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+
+        content = response.content.decode()
+        assert "# TYPE wakawaka_view_duration_seconds histogram" in content
+        assert 'wakawaka_view_duration_seconds_count{view="page"} 1' in content
+        assert 'wakawaka_view_queries_bucket{view="page",le="2"} 0' in content
+        assert 'wakawaka_view_queries_bucket{view="page",le="3"} 1' in content
+        assert 'wakawaka_view_queries_bucket{view="page",le="+Inf"} 1' in content
+        assert (
+            'wakawaka_section_duration_seconds_count{view="page",section="template"} 1'
+            in content
+        )
+        assert (
+            'wakawaka_cache_requests_total{cache="render",result="miss"} 1' in content
+        )
+
+    def test_prometheus_export_access(self) -> None:
+        """
+        Only staff users can view the metrics by default, since behind a
+        local proxy every request comes from 127.0.0.1.
+        """
+        url = reverse("wakawaka_metrics")
+        assert self.client.get(url).status_code == 403
+        with override_settings(WAKAWAKA_METRICS_ALLOWED_IPS=("127.0.0.1",)):
+            assert self.client.get(url).status_code == 200
+        self.login_superuser()
+        assert self.client.get(url).status_code == 200
+
+    @override_settings(WAKAWAKA_METRICS=False)
+    def test_disabled(self) -> None:
+        self.client.get(self.url)
+        assert metrics.registry.view_durations == {}
+        assert metrics.registry.cache_requests == {}
+        assert self.client.get(reverse("wakawaka_metrics")).status_code == 404
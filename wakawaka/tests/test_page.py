@@ -1,4 +1,10 @@
+from __future__ import annotations
+
+from unittest import mock
+
+import pytest
 from django.contrib.auth.models import Permission
+from django.db import IntegrityError, transaction
 from django.urls import reverse
 
 from wakawaka.forms import WikiPageForm
@@ -84,6 +90,37 @@ class PageTestCase(BaseTestCase):
         assert WikiPage.objects.count() == 1
         assert WikiPage.objects.all()[0].revisions.count() == 1
 
+    def test_page_slug_is_unique(self) -> None:
+        self.create_wikipage("WikiIndex")
+        with pytest.raises(IntegrityError), transaction.atomic():
+            self.create_wikipage("WikiIndex")
+
+    def test_page_form_reuses_concurrently_created_page(self) -> None:
+        """
+        If the page was created by someone else meanwhile, the new revision
+        is added to that page rather than creating a duplicate page.
+        """
+        self.login_superuser()
+        get_or_create = WikiPage.objects.get_or_create
+
+        def create_concurrently(**kwargs: str) -> tuple[WikiPage, bool]:
+            # Another edit creates the page after the view found it missing.
+            concurrent = self.create_wikipage("WikiIndex")
+            page, created = get_or_create(**kwargs)
+            assert page.pk == concurrent.pk
+            return page, created
+
+        data = {"content": "This is the content of the new WikiIndex page"}
+        edit_url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        with mock.patch.object(
+            WikiPage.objects, "get_or_create", side_effect=create_concurrently
+        ) as patched:
+            self.client.post(edit_url, data)
+        patched.assert_called_once()
+
+        assert WikiPage.objects.count() == 1
+        assert WikiPage.objects.get().revisions.count() == 1
+
     def test_page_add_only_if_perm(self) -> None:
         """
         The user needs 'add_wikipage' and 'add_revision' permission to add
@@ -224,6 +261,55 @@ class PageTestCase(BaseTestCase):
         self.assertNotContains(response, "Reverted")
         # @OPTIMIZE: should not test for "Reverted" in text, too vague
 
+    def test_current_revision_is_updated_on_edit(self) -> None:
+        """
+        Saving the edit form points the page to its new current revision.
+        """
+        self.login_superuser()
+        edit_url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        self.client.post(edit_url, {"content": "First Content"})
+        self.client.post(edit_url, {"content": "Updated Content"})
+
+        page = WikiPage.objects.get(slug="WikiIndex")
+        assert page.current_revision == page.revisions.latest()
+        assert page.current.content == "Updated Content"
+
+    def test_current_revision_is_updated_on_revision_delete(self) -> None:
+        """
+        Deleting the current revision points the page to the previous one.
+        """
+        self.login_superuser()
+        edit_url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        self.client.post(edit_url, {"content": "First Content"})
+        self.client.post(edit_url, {"content": "Updated Content"})
+        page = WikiPage.objects.get(slug="WikiIndex")
+
+        delete_url = reverse(
+            "wakawaka_edit",
+            kwargs={"slug": "WikiIndex", "rev_id": page.current_revision_id},
+        )
+        self.client.post(delete_url, {"delete": "rev"})
+
+        page.refresh_from_db()
+        assert page.current_revision.content == "First Content"
+
+    def test_page_view_fetches_current_revision_with_page(self) -> None:
+        """
+        The page and its current revision are fetched in one query.
+        """
+        self.login_superuser()
+        edit_url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        self.client.post(edit_url, {"content": "First Content"})
+        page_url = reverse("wakawaka_page", kwargs={"slug": "WikiIndex"})
+        self.client.get(page_url)
+
+        # The page with its revision and creator, the session and the user.
+        # The rendered content is cached by the first request.
+        with self.assertNumQueries(3):
+            response = self.client.get(page_url)
+        assert response.status_code == 200
+        assert response.context["rev"].creator.username == "superuser"
+
     # --------------------------------------------------------------------------
     # Page deletion
     # --------------------------------------------------------------------------
@@ -1,5 +1,15 @@
+from __future__ import annotations
+
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.core.management import call_command
+from django.test.utils import override_settings
 from django.urls import reverse
 
+from wakawaka import hierarchy
+from wakawaka.models import PageNode, WikiPage
 from wakawaka.tests.base import BaseTestCase
 
 
@@ -18,3 +28,105 @@ class PageListTestCase(BaseTestCase):
         self.assertContains(response, "WikiIndex")
         self.assertContains(response, "CarrotCake")
         self.assertContains(response, "BeanSoup")
+
+
+class PageHierarchyTestCase(BaseTestCase):
+    """
+    Pages with nested slugs are listed one level of the hierarchy at a time,
+    with the number of pages below each node.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        for slug in (
+            "WikiIndex",
+            "ProjectAlpha/DesignNotes",
+            "ProjectAlpha/MeetingNotes/WeekOne",
+            "ProjectAlpha/MeetingNotes/WeekTwo",
+            "ProjectBeta",
+        ):
+            self.create_wikipage(slug, "Some content")
+        self.url = reverse("wakawaka_page_list")
+
+    def nodes(self, **params: str) -> list[tuple[str, bool, int]]:
+        response = self.client.get(self.url, params)
+        return [
+            (node.name, node.page_id is not None, node.pages)
+            for node in response.context["node_list"]
+        ]
+
+    def test_levels(self) -> None:
+        assert self.nodes() == [
+            ("ProjectAlpha", False, 3),
+            ("ProjectBeta", True, 0),
+            ("WikiIndex", True, 0),
+        ]
+        assert self.nodes(path="ProjectAlpha") == [
+            ("DesignNotes", True, 0),
+            ("MeetingNotes", False, 2),
+        ]
+        response = self.client.get(self.url, {"path": "ProjectAlpha/MeetingNotes"})
+        self.assertContains(response, 'href="/ProjectAlpha/MeetingNotes/WeekOne/"')
+        assert response.context["breadcrumbs"] == [
+            ("ProjectAlpha", "ProjectAlpha"),
+            ("ProjectAlpha/MeetingNotes", "MeetingNotes"),
+        ]
+
+    def test_descendants(self) -> None:
+        assert list(
+            hierarchy.descendants("ProjectAlpha").values_list("path", flat=True)
+        ) == [
+            "ProjectAlpha/DesignNotes",
+            "ProjectAlpha/MeetingNotes",
+            "ProjectAlpha/MeetingNotes/WeekOne",
+            "ProjectAlpha/MeetingNotes/WeekTwo",
+        ]
+
+    def test_delete_pages(self) -> None:
+        WikiPage.objects.filter(slug__startswith="ProjectAlpha/MeetingNotes/").delete()
+        assert self.nodes(path="ProjectAlpha") == [("DesignNotes", True, 0)]
+
+        # A node with pages below it remains after its page is deleted
+        self.create_wikipage("ProjectAlpha", "Some content")
+        assert self.nodes()[0] == ("ProjectAlpha", True, 1)
+        WikiPage.objects.get(slug="ProjectAlpha").delete()
+        assert self.nodes()[0] == ("ProjectAlpha", False, 1)
+
+    @override_settings(WAKAWAKA_INDEX_PER_PAGE=2)
+    def test_buckets(self) -> None:
+        response = self.client.get(self.url)
+        assert response.context["buckets"] == [("P", 2), ("W", 1)]
+        assert [node.name for node in response.context["node_list"]] == [
+            "ProjectAlpha",
+            "ProjectBeta",
+        ]
+        response = self.client.get(
+            f"{self.url}?{response.context['next_query_string']}"
+        )
+        assert [node.name for node in response.context["node_list"]] == ["WikiIndex"]
+        assert response.context["next_query_string"] is None
+
+        assert self.nodes(letter="w") == [("WikiIndex", True, 0)]
+
+    def test_rebuild(self) -> None:
+        nodes = list(PageNode.objects.order_by("path").values())
+        PageNode.objects.all().delete()
+        stdout = StringIO()
+        call_command("wakawaka_rebuild_index", "--batch-size=2", stdout=stdout)
+        assert "Stored 7 nodes" in stdout.getvalue()
+        assert [
+            {**node, "id": None} for node in PageNode.objects.order_by("path").values()
+        ] == [{**node, "id": None} for node in nodes]
+
+    def test_migration_builds_nodes(self) -> None:
+        """
+        The migration adding the page index stores the nodes of existing
+        pages.
+        """
+        nodes = list(PageNode.objects.order_by("path").values())
+        PageNode.objects.all().delete()
+        migration = import_module("wakawaka.migrations.0012_pagenode")
+        migration.build_nodes(apps, None)
+        assert [
+            {**node, "id": None} for node in PageNode.objects.order_by("path").values()
+        ] == [{**node, "id": None} for node in nodes]
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import re
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from wakawaka.tests.base import BaseTestCase
+
+
+@override_settings(WAKAWAKA_REVISIONS_PER_PAGE=2)
+class PaginationTestCase(BaseTestCase):
+    """
+    The revision lists are paginated using cursors on the revision's
+    modification date and primary key.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.create_wikipage("WikiIndex", *(f"Content {i}" for i in range(5)))
+        self.url = reverse("wakawaka_revision_list", kwargs={"slug": "WikiIndex"})
+
+    def _messages(self, response) -> list:  # noqa: ANN001
+        return [rev.message for rev in response.context["revision_list"]]
+
+    def _link(self, response, name: str) -> str | None:  # noqa: ANN001
+        m = re.search(rf'class="{name}" href="(\?[^"]+)"', response.content.decode())
+        return m and m.group(1).replace("&amp;", "&")
+
+    def test_walk_older_and_newer(self) -> None:
+        response = self.client.get(self.url)
+        assert self._messages(response) == [
+            "Created via API: Content 4",
+            "Created via API: Content 3",
+        ]
+        assert self._link(response, "newer") is None
+
+        response = self.client.get(self.url + self._link(response, "older"))
+        assert self._messages(response) == [
+            "Created via API: Content 2",
+            "Created via API: Content 1",
+        ]
+
+        response = self.client.get(self.url + self._link(response, "older"))
+        assert self._messages(response) == ["Created via API: Content 0"]
+        assert self._link(response, "older") is None
+
+        response = self.client.get(self.url + self._link(response, "newer"))
+        assert self._messages(response) == [
+            "Created via API: Content 2",
+            "Created via API: Content 1",
+        ]
+
+        response = self.client.get(self.url + self._link(response, "newer"))
+        assert self._messages(response) == [
+            "Created via API: Content 4",
+            "Created via API: Content 3",
+        ]
+        assert self._link(response, "newer") is None
+
+    def test_compare_preselected_on_first_page_only(self) -> None:
+        """
+        The latest two revisions are preselected for comparison, but the
+        revisions of older pages are not.
+        """
+        response = self.client.get(self.url)
+        assert len(re.findall(r"\bchecked\b", response.content.decode())) == 2
+
+        response = self.client.get(self.url + self._link(response, "older"))
+        assert not re.search(r"\bchecked\b", response.content.decode())
+
+    def test_no_offset_queries(self) -> None:
+        response = self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url + self._link(response, "older"))
+        assert not any("OFFSET" in q["sql"] for q in queries)
+
+    def test_invalid_cursor_shows_first_page(self) -> None:
+        response = self.client.get(f"{self.url}?older=foobar")
+        assert response.status_code == 200
+        assert self._messages(response)[0] == "Created via API: Content 4"
+
+    def test_global_revision_list(self) -> None:
+        self.create_wikipage("CarrotCake", "Carrot Content")
+        response = self.client.get(reverse("wakawaka_revision_list"))
+        assert self._messages(response) == [
+            "Created via API: Carrot Content",
+            "Created via API: Content 4",
+        ]
+        assert self._link(response, "older")
+
+    def test_changes_keeps_revision_ids(self) -> None:
+        url = reverse("wakawaka_changes", kwargs={"slug": "WikiIndex"})
+        response = self.client.get(f"{url}?a=1&b=2")
+        link = self._link(response, "older")
+        assert "a=1" in link
+        assert "b=2" in link
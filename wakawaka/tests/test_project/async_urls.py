@@ -0,0 +1,12 @@
+from django.contrib.auth import views as auth_views
+from django.urls import include, path
+
+from wakawaka import async_views
+from wakawaka.urls import get_urlpatterns
+
+# The wiki with its async views, as with `WAKAWAKA_ASYNC_VIEWS = True`.
+urlpatterns = [
+    path("accounts/login/", auth_views.LoginView.as_view(), name="auth_login"),
+    path("accounts/logout/", auth_views.LogoutView.as_view(), name="auth_logout"),
+    path("", include(get_urlpatterns(async_views))),
+]
@@ -59,6 +59,11 @@ DATABASES = {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "test_project.sqlite3",
     },
+    # Stands in for a read replica in the tests of `wakawaka.routers`.
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test_project_replica.sqlite3",
+    },
 }
 
 LANGUAGE_CODE = "en-us"
@@ -0,0 +1,82 @@
+from django.test.utils import override_settings
+from django.urls import resolve, reverse
+
+from wakawaka import urls
+from wakawaka.tests.base import BaseTestCase
+
+# Query budgets for every view in `wakawaka.urls`. Each entry is the url
+# name, its kwargs, the query string, whether a user is logged in, and the
+# maximum number of queries. Logged in requests include two queries for the
+# session and the user. Revision bodies are fetched by themselves, so the page
+# view doesn't load them when the rendered content is cached. Metrics are
+# enabled, so the views are instrumented. The export is streamed, so its
+# queries run as the response is read.
+BUDGETS = (
+    ("wakawaka_index", {}, "", False, 0),
+    ("wakawaka_revision_list", {}, "", False, 1),
+    ("wakawaka_page_list", {}, "", False, 1),
+    ("wakawaka_search", {}, "?q=links", False, 3),
+    ("wakawaka_orphans", {}, "", False, 1),
+    ("wakawaka_wanted", {}, "", False, 1),
+    ("wakawaka_metrics", {}, "", False, 0),
+    ("wakawaka_export", {}, "", True, 2),
+    ("wakawaka_backlinks", {"slug": "WikiIndex"}, "", False, 1),
+    ("wakawaka_revision_list", {"slug": "WikiIndex"}, "", False, 2),
+    ("wakawaka_changes", {"slug": "WikiIndex"}, "?a={first}&b={last}", False, 4),
+    ("wakawaka_edit", {"slug": "WikiIndex"}, "", True, 5),
+    ("wakawaka_edit", {"slug": "WikiIndex", "rev_id": "{first}"}, "", True, 6),
+    ("wakawaka_page", {"slug": "WikiIndex"}, "", False, 3),
+    ("wakawaka_page", {"slug": "WikiIndex", "rev_id": "{first}"}, "", False, 4),
+)
+
+
+class QueryBudgetTestCase(BaseTestCase):
+    """
+    Every view runs a fixed number of queries, no matter how many pages,
+    revisions, authors or links there are.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        user = self._create_user("author", "foobar")
+        user.save()
+        for i in range(10):
+            page = self.create_wikipage(
+                f"PageNumber{'Ab' * i}", "Links to WikiIndex and FooBar", "Second"
+            )
+            page.revisions.update(creator=user)
+
+        page = self.create_wikipage(
+            "WikiIndex", *(f"Content {i} links to BarBaz" for i in range(10))
+        )
+        revisions = page.revisions.order_by("pk")
+        self.ids = {"first": revisions.first().pk, "last": revisions.last().pk}
+
+    def _url(self, name: str, kwargs: dict, query: str) -> str:
+        kwargs = {key: str(value).format(**self.ids) for key, value in kwargs.items()}
+        return reverse(name, kwargs=kwargs) + query.format(**self.ids)
+
+    @override_settings(
+        WAKAWAKA_METRICS=True, WAKAWAKA_METRICS_ALLOWED_IPS=("127.0.0.1",)
+    )
+    def test_budgets(self) -> None:
+        for name, kwargs, query, login, budget in BUDGETS:
+            url = self._url(name, kwargs, query)
+            with self.subTest(url=url):
+                self.client.logout()
+                if login:
+                    self.login_superuser()
+                with self.assertQueryBudget(budget):
+                    response = self.client.get(url)
+                assert response.status_code in (200, 302)
+
+    def test_all_views_have_a_budget(self) -> None:
+        """
+        Each url pattern of the wiki must be covered by a query budget.
+        """
+        covered = {
+            resolve(self._url(name, kwargs, "")).route
+            for name, kwargs, *_rest in BUDGETS
+        }
+        patterns = {str(pattern.pattern) for pattern in urls.urlpatterns}
+        assert patterns == covered
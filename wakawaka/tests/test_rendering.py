@@ -0,0 +1,128 @@
+import time
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test.utils import override_settings
+
+from wakawaka.models import WikiPage
+from wakawaka.rendering import (
+    get_link_epoch,
+    link_token_key,
+    render_content,
+    render_revision,
+)
+from wakawaka.tests.base import BaseTestCase
+
+
+class RenderCacheTestCase(BaseTestCase):
+    """
+    The rendered HTML of a revision is cached and only re-rendered if a
+    page it links to is created or deleted.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.page = self.create_wikipage("WikiIndex", "Go to CarrotCake now")
+        self.rev = self.page.current
+
+    def test_render_content(self) -> None:
+        html = render_content("Go to WikiIndex\nor http://example.com\n\nBye")
+        assert html == (
+            '<p>Go to <a href="/WikiIndex/">WikiIndex</a><br>or '
+            '<a href="http://example.com" rel="nofollow">http://example.com</a>'
+            "</p>\n\n<p>Bye</p>"
+        )
+
+    def test_cached_render_does_not_hit_database(self) -> None:
+        first = render_revision(self.rev)
+        with self.assertNumQueries(0):
+            second = render_revision(self.rev)
+        assert first == second
+        assert 'class="doesnotexist"' in first
+
+    def test_creating_linked_page_invalidates(self) -> None:
+        assert 'class="doesnotexist"' in render_revision(self.rev)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_wikipage("CarrotCake", "Some content")
+        assert 'class="doesnotexist"' not in render_revision(self.rev)
+
+    def test_deleting_linked_page_invalidates(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            page = self.create_wikipage("CarrotCake", "Some content")
+        assert 'class="doesnotexist"' not in render_revision(self.rev)
+        with self.captureOnCommitCallbacks(execute=True):
+            page.delete()
+        assert 'class="doesnotexist"' in render_revision(self.rev)
+
+    def test_invalidation_waits_for_commit(self) -> None:
+        """
+        A revision rendered before the new page is committed still links to
+        a missing page, so it must not be cached under the new link token.
+        """
+        token = cache.get(link_token_key("CarrotCake"))
+        epoch = get_link_epoch()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create_wikipage("CarrotCake", "Some content")
+            assert cache.get(link_token_key("CarrotCake")) == token
+            assert get_link_epoch() == epoch
+        assert cache.get(link_token_key("CarrotCake")) == token
+
+        for callback in callbacks:
+            callback()
+        assert cache.get(link_token_key("CarrotCake")) != token
+        assert get_link_epoch() != epoch
+
+    def test_unrelated_page_keeps_cache(self) -> None:
+        render_revision(self.rev)
+        WikiPage.objects.create(slug="BeanSoup")
+        with self.assertNumQueries(0):
+            render_revision(self.rev)
+
+    @override_settings(WAKAWAKA_RENDER_CACHE=None)
+    def test_cache_disabled(self) -> None:
+        render_revision(self.rev)
+        with self.assertNumQueries(1):
+            render_revision(self.rev)
+
+
+class SinglePassRendererTestCase(BaseTestCase):
+    """
+    The single pass renderer returns the same HTML as the former
+    `urlize|wikify|linebreaks` filter chain, in linear time.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.create_wikipage("WikiIndex", "Index")
+
+    def test_same_as_filter_chain(self) -> None:
+        template = Template(
+            "{% load wakawaka_tags %}{{ content|urlize|wikify|linebreaks }}"
+        )
+        for content in (
+            "",
+            "Plain text",
+            "\n\nWikiIndex\r\nCarrotCake\r\rNutBread\n \n",
+            "See WikiIndex/SubPage, WikiIndex/Sub or (WikiIndex).",
+            "WikiIndex9 WikiIndexX _WikiIndex WikiIndexé éWikiIndex",
+            "CarrotCake/NutBread/SubPage/9 CarrotCake/NutBread9 /CarrotCake/",
+            "http://example.com/WikiIndex/ www.example.org, (mail@example.com)",
+            "<b>Tags</b> & \"quotes\" 'and' &amp; R&DepartmentStore <WikiIndex>",
+        ):
+            with self.subTest(content=content):
+                expected = template.render(Context({"content": content}))
+                assert render_content(content) == expected
+
+    def test_adversarial_input(self) -> None:
+        for content in (
+            "AbAb" * 50_000 + "9",
+            "AbAb/" * 50_000,
+            "-" + "A" * 200_000,
+            "(" * 100_000 + "example.com" + ")" * 100_000,
+            "a." * 100_000,
+        ):
+            with self.subTest(content=content[:10]):
+                start = time.perf_counter()
+                render_content(content)
+                assert time.perf_counter() - start < 1
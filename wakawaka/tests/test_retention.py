@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from django.utils import timezone as django_timezone
+
+from wakawaka.models import Revision, RevisionBody
+from wakawaka.retention import expired_revisions
+from wakawaka.tests.base import BaseTestCase
+
+CUTOFF = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+def revisions(*timestamps: str) -> list:
+    return [
+        (pk, datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc))
+        for pk, timestamp in enumerate(timestamps, start=1)
+    ]
+
+
+@override_settings(TIME_ZONE="UTC")
+class ExpiredRevisionsTestCase(SimpleTestCase):
+    """
+    Older revisions are thinned to the latest of each period, keeping the
+    first and the current one.
+    """
+
+    def test_periods(self) -> None:
+        history = revisions(
+            "2024-01-01T10:00",  # First
+            "2024-01-01T11:00",
+            "2024-01-01T12:00",  # Latest of the day
+            "2024-01-02T10:00",
+            "2024-01-02T11:00",  # Latest of the day and week
+            "2024-01-29T10:00",  # Latest of the month, same week as the next
+            "2024-02-01T10:00",  # Latest of the day and week
+            "2024-02-05T10:00",
+            "2024-02-05T11:00",  # Latest of the month
+            "2024-03-01T10:00",  # Recent
+            "2024-03-01T11:00",  # Recent
+        )
+        assert expired_revisions(history, CUTOFF, "day", None) == [2, 4, 8]
+        assert expired_revisions(history, CUTOFF, "week", None) == [2, 3, 4, 6, 8]
+        assert expired_revisions(history, CUTOFF, "month", None) == [2, 3, 4, 5, 7, 8]
+
+    def test_current_revision(self) -> None:
+        history = revisions("2024-01-01T10:00", "2024-01-01T11:00", "2024-01-01T12:00")
+        assert expired_revisions(history, CUTOFF, "day", None) == [2]
+        assert expired_revisions(history, CUTOFF, "day", 2) == []
+        assert expired_revisions(history[:1], CUTOFF, "day", None) == []
+
+
+@override_settings(WAKAWAKA_REVISION_STORAGE="delta", WAKAWAKA_KEYFRAME_INTERVAL=4)
+class CompactRevisionsTestCase(BaseTestCase):
+    """
+    The `wakawaka_compact_revisions` command deletes expired revisions in
+    batches and prunes content no longer used.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.contents = ["Line\n" * 50 + f"Revision {i}\n" for i in range(10)]
+        self.page = self.create_wikipage("WikiIndex", *self.contents)
+        # Two revisions per day, from 20 days ago to 16 days ago
+        now = django_timezone.now().replace(hour=12)
+        self.revisions = list(self.page.revisions.order_by("pk"))
+        for i, rev in enumerate(self.revisions):
+            timestamp = now - timedelta(days=20 - i // 2, hours=1 - i % 2)
+            Revision.objects.filter(pk=rev.pk).update(
+                created=timestamp, modified=timestamp
+            )
+
+    def compact(self, *args: str) -> str:
+        stdout = StringIO()
+        call_command(
+            "wakawaka_compact_revisions",
+            "--keep-days=10",
+            "--batch-size=2",
+            *args,
+            stdout=stdout,
+        )
+        return stdout.getvalue()
+
+    def test_dry_run(self) -> None:
+        output = self.compact("--dry-run")
+        assert "Would delete 4 revisions of 1 pages" in output
+        assert self.page.revisions.count() == 10
+
+    def test_compact(self) -> None:
+        output = self.compact()
+        assert "Deleted 4 revisions of 1 pages" in output
+
+        # The first and the latest revision of each day are kept
+        kept = [0, 1, 3, 5, 7, 9]
+        remaining = list(self.page.revisions.order_by("pk"))
+        assert [rev.pk for rev in remaining] == [self.revisions[i].pk for i in kept]
+        # Deltas against deleted revisions were rebuilt
+        assert [rev.content for rev in remaining] == [self.contents[i] for i in kept]
+        # Unused content is pruned
+        assert not RevisionBody.objects.filter(revisions__isnull=True).exists()
+
+    def test_recent_revisions(self) -> None:
+        output = self.compact("--keep-days=30")
+        assert "Deleted 0 revisions" in output
+        assert self.page.revisions.count() == 10
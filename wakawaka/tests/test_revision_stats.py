@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from wakawaka.models import Revision
+from wakawaka.revision_stats import STATS_FIELDS, compute_stats
+from wakawaka.tests.base import BaseTestCase
+
+
+class ComputeStatsTestCase(SimpleTestCase):
+    def test_compute_stats(self) -> None:
+        assert compute_stats("One two\nthree\n", None) == {
+            "size": 14,
+            "size_delta": 14,
+            "lines_added": 2,
+            "lines_removed": 0,
+            "word_count": 3,
+        }
+        assert compute_stats("One two\nfour five\nsix\n", "One two\nthree\n") == {
+            "size": 22,
+            "size_delta": 8,
+            "lines_added": 2,
+            "lines_removed": 1,
+            "word_count": 5,
+        }
+        assert compute_stats("Grüße", "Gruss")["size_delta"] == 2
+
+    def moved_line_stats(self) -> tuple[int, int]:
+        stats = compute_stats("Two\nOne\n", "One\nTwo\n")
+        return stats["lines_removed"], stats["lines_added"]
+
+    def test_moved_line(self) -> None:
+        assert self.moved_line_stats() == (1, 1)
+
+    @override_settings(WAKAWAKA_DIFF_MAX_LINES=3)
+    def test_too_many_lines(self) -> None:
+        """
+        Lines are counted regardless of position beyond the diff size limit.
+        """
+        assert self.moved_line_stats() == (0, 0)
+
+    @override_settings(
+        WAKAWAKA_DIFF_ENGINE="wakawaka.tests.test_diff.SlowEngine",
+        WAKAWAKA_DIFF_TIMEOUT=0.1,
+    )
+    def test_timeout(self) -> None:
+        """
+        Lines are counted regardless of position if the diff times out.
+        """
+        assert self.moved_line_stats() == (0, 0)
+
+
+@override_settings(WAKAWAKA_REVISION_STORAGE="delta", WAKAWAKA_KEYFRAME_INTERVAL=3)
+class RevisionStatsTestCase(BaseTestCase):
+    """
+    Revisions store the metadata displayed in the history listings.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.contents = [
+            "Line\n" * 20 + "\n".join(["Word"] * i) for i in range(0, 12, 2)
+        ]
+        self.page = self.create_wikipage("WikiIndex", *self.contents)
+
+    def stats(self) -> list[tuple]:
+        return list(
+            self.page.revisions.order_by("modified", "pk").values_list(*STATS_FIELDS)
+        )
+
+    def test_stored_on_create(self) -> None:
+        first, second = self.stats()[:2]
+        assert first == (100, 100, 20, 0, 20)
+        assert second == (109, 9, 2, 0, 22)
+
+    def test_history(self) -> None:
+        url = reverse("wakawaka_revision_list", kwargs={"slug": "WikiIndex"})
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertContains(response, "109 bytes")
+        self.assertContains(response, '<span class="size-delta size-added">(+9)</span>')
+
+        # The listing never loads content
+        for query in context.captured_queries:
+            assert "wakawaka_revisionbody" not in query["sql"]
+            assert '"delta"' not in query["sql"]
+
+        response = self.client.get(reverse("wakawaka_revision_list"))
+        self.assertContains(response, "109 bytes")
+
+    def backfill(self, *args: str) -> str:
+        stdout = StringIO()
+        call_command("wakawaka_backfill_revision_stats", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_backfill(self) -> None:
+        stats = self.stats()
+        Revision.objects.update(**dict.fromkeys(STATS_FIELDS))
+        output = self.backfill("--batch-size=4")
+        assert "Stored the metadata of 6 revisions." in output
+        assert self.stats() == stats
+
+        # Only revisions without metadata are processed, unless all are asked for
+        assert "Stored the metadata of 0 revisions." in self.backfill()
+        assert "Stored the metadata of 6 revisions." in self.backfill("--all")
+
+    def expected_stats(self, kept: list[int]) -> list[tuple]:
+        """
+        Returns the metadata of the revisions with the given contents, each
+        compared to the one before it.
+        """
+        expected = []
+        parent = None
+        for i in kept:
+            stats = compute_stats(self.contents[i], parent)
+            expected.append(tuple(stats[field] for field in STATS_FIELDS))
+            parent = self.contents[i]
+        return expected
+
+    def test_delete_revision(self) -> None:
+        self.login_superuser()
+        rev = self.page.revisions.order_by("modified", "pk")[2]
+        url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex", "rev_id": rev.pk})
+        self.client.post(url, {"delete": "rev"})
+        assert self.stats() == self.expected_stats([0, 1, 3, 4, 5])
+
+    def test_delete_revisions(self) -> None:
+        """
+        Deleting several revisions at once, like `wakawaka_compact_revisions`,
+        compares each remaining revision to the one before it.
+        """
+        revisions = list(self.page.revisions.order_by("modified", "pk"))
+        Revision.objects.filter(
+            pk__in=(revisions[1].pk, revisions[2].pk, revisions[4].pk)
+        ).delete()
+        assert self.stats() == self.expected_stats([0, 3, 5])
@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.test.utils import modify_settings, override_settings
+from django.urls import reverse
+
+from wakawaka import routers
+from wakawaka.models import Revision, RevisionBody, WikiPage
+from wakawaka.tests.base import BaseTestCase
+
+ASYNC_URLCONF = "wakawaka.tests.test_project.async_urls"
+
+
+@override_settings(
+    DATABASE_ROUTERS=["wakawaka.routers.ReplicaRouter"],
+    WAKAWAKA_READ_REPLICAS=["replica"],
+    WAKAWAKA_RENDER_CACHE=None,
+)
+@modify_settings(
+    MIDDLEWARE={
+        "append": "wakawaka.middleware.ReplicaPinningMiddleware",
+    }
+)
+class ReplicaRouterTestCase(BaseTestCase):
+    """
+    Reads go to the replica, writes and the reads after them to the primary.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.page = self.create_wikipage("WikiIndex", "Primary content")
+        self.url = reverse("wakawaka_page", kwargs={"slug": "WikiIndex"})
+
+        # The replica lags behind, having older content.
+        for model in (RevisionBody, WikiPage, Revision):
+            objects = list(model.objects.using("default").order_by("pk"))
+            model.objects.using("replica").bulk_create(objects)
+        RevisionBody.objects.using("replica").update(content="Replica content")
+
+    def test_read_from_replica(self) -> None:
+        response = self.client.get(self.url)
+        self.assertContains(response, "Replica content")
+
+        with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+            response = self.client.get(self.url)
+        self.assertContains(response, "Replica content")
+
+    def test_read_your_writes(self) -> None:
+        self.login_superuser()
+        edit_url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        data = {"content": "Edited content", "message": "Edit"}
+        response = self.client.post(edit_url, data, follow=True)
+        self.assertContains(response, "Edited content")
+        assert routers.PINNED_UNTIL_SESSION_KEY in self.client.session
+
+        # The session sticks to the primary for a while
+        response = self.client.get(self.url)
+        self.assertContains(response, "Edited content")
+        with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+            response = self.client.get(self.url)
+        self.assertContains(response, "Edited content")
+
+        # And reads from the replica afterwards
+        pinned_until = self.client.session[routers.PINNED_UNTIL_SESSION_KEY]
+        with mock.patch("time.time", return_value=pinned_until + 1):
+            response = self.client.get(self.url)
+        self.assertContains(response, "Replica content")
+
+    @override_settings(WAKAWAKA_REPLICA_PIN_SECONDS=0)
+    def test_pin_seconds(self) -> None:
+        self.login_superuser()
+        edit_url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        data = {"content": "Edited content", "message": "Edit"}
+        self.client.post(edit_url, data)
+        response = self.client.get(self.url)
+        self.assertContains(response, "Replica content")
+
+    def test_reads_without_writes(self) -> None:
+        """
+        Requests that don't write don't pin the session.
+        """
+        self.login_superuser()
+        edit_url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        response = self.client.get(edit_url)
+        self.assertContains(response, "Replica content")
+        assert routers.PINNED_UNTIL_SESSION_KEY not in self.client.session
+
+    def test_outside_of_requests(self) -> None:
+        """
+        Code outside of requests, like management commands, reads from the
+        primary.
+        """
+        page = WikiPage.objects.get(slug="WikiIndex")
+        assert page._state.db == "default"  # noqa: SLF001
+        assert page.current.content == "Primary content"
+
+    def test_allow_relation(self) -> None:
+        rev = Revision.objects.using("default").get(page=self.page)
+        rev.page = WikiPage.objects.using("replica").get(slug="WikiIndex")
+        rev.save()
+        assert rev._state.db == "default"  # noqa: SLF001
+
+
+class ReplicaRouterDisabledTestCase(BaseTestCase):
+    """
+    Without replicas, the router leaves the wiki on the default database.
+    """
+
+    def test_no_replicas(self) -> None:
+        router = routers.ReplicaRouter()
+        assert router.db_for_read(WikiPage) is None
+        assert router.db_for_write(WikiPage) is None
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from importlib import import_module
+from io import StringIO
+from unittest import skipUnless
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from wakawaka.models import SearchDocument
+from wakawaka.search import (
+    SearchResults,
+    SQLiteSearchBackend,
+    get_search_backend,
+    split_words,
+)
+from wakawaka.tests.base import BaseTestCase
+
+
+class SearchTestCase(BaseTestCase):
+    """
+    The current revision of each page can be searched for.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.create_wikipage("CarrotCake", "A cake with carrots", "Carrots and nuts")
+        self.create_wikipage("NutBread", "Bread with nuts and more nuts")
+        self.create_wikipage("WikiIndex", "Welcome to the kitchen")
+
+    def search(self, query: str) -> list[str]:
+        return [document.slug for document in SearchResults(query)[:10]]
+
+    def test_split_words(self) -> None:
+        assert split_words("CarrotCake") == "Carrot Cake"
+        assert split_words("CarrotCake/SugarFree") == "Carrot Cake Sugar Free"
+
+    def test_search(self) -> None:
+        assert self.search("nuts") == ["NutBread", "CarrotCake"]
+        assert self.search("carrot") == ["CarrotCake"]
+        assert self.search("bread nuts") == ["NutBread"]
+        assert self.search("kitch") == ["WikiIndex"]
+        assert self.search("cabbage") == []
+        assert self.search("") == []
+
+    def test_only_current_revision_is_indexed(self) -> None:
+        assert self.search("cake") == ["CarrotCake"]
+        assert self.search("with carrots") == []
+
+    def test_query_syntax_is_escaped(self) -> None:
+        assert self.search('nuts" OR "cake') == []
+        assert self.search("(nuts*") == ["NutBread", "CarrotCake"]
+
+    def test_index_is_updated_incrementally(self) -> None:
+        self.login_superuser()
+        url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        self.client.post(url, {"content": "Welcome to the bakery"})
+        assert self.search("bakery") == ["WikiIndex"]
+        assert self.search("kitchen") == []
+
+        # Deleting the current revision indexes the previous one
+        self.client.post(url, {"delete": "rev"})
+        assert self.search("kitchen") == ["WikiIndex"]
+
+        self.client.post(url, {"delete": "page"})
+        assert self.search("kitchen") == []
+        assert SearchDocument.objects.count() == 2
+
+    def test_search_view(self) -> None:
+        url = reverse("wakawaka_search")
+        response = self.client.get(url)
+        assert response.status_code == 200
+
+        response = self.client.get(url, {"q": "nuts"})
+        self.assertContains(response, 'href="/CarrotCake/"')
+        self.assertContains(response, "Bread with nuts and more nuts")
+
+        response = self.client.get(url, {"q": "cabbage"})
+        self.assertContains(response, 'No pages found for "cabbage".')
+
+    def test_search_view_is_paginated(self) -> None:
+        url = reverse("wakawaka_search")
+        view_kwargs = {"q": "nuts"}
+        with self.settings(WAKAWAKA_SEARCH_RESULTS_PER_PAGE=1):
+            response = self.client.get(url, view_kwargs)
+            assert [d.slug for d in response.context["result_list"]] == ["NutBread"]
+            self.assertContains(response, "?q=nuts&amp;page=2")
+
+            response = self.client.get(url, {**view_kwargs, "page": 2})
+            assert [d.slug for d in response.context["result_list"]] == ["CarrotCake"]
+
+    def test_reindex_command(self) -> None:
+        SearchDocument.objects.all().delete()
+        assert self.search("nuts") == []
+
+        stdout = StringIO()
+        call_command("wakawaka_reindex", batch_size=2, stdout=stdout)
+        assert "Indexed 3 pages." in stdout.getvalue()
+        assert self.search("nuts") == ["NutBread", "CarrotCake"]
+
+    @override_settings(WAKAWAKA_REVISION_STORAGE="delta")
+    def test_migration_indexes_pages(self) -> None:
+        """
+        The migration adding the search documents stores those of existing
+        pages, whose current revision may be stored as a delta.
+        """
+        self.create_wikipage("BeanSoup", "Soup of beans", "Soup of beans and leeks")
+        SearchDocument.objects.all().delete()
+        migration = import_module("wakawaka.migrations.0009_searchdocument")
+        migration.index_pages(apps, None)
+        assert self.search("nuts") == ["NutBread", "CarrotCake"]
+        assert self.search("leeks") == ["BeanSoup"]
+
+    @skipUnless(connection.vendor == "sqlite", "FTS5 is only used on SQLite")
+    def test_install_indexes_documents(self) -> None:
+        """
+        Documents stored before the FTS5 table is created are indexed when it
+        is installed.
+        """
+        table = SQLiteSearchBackend.table
+        with connection.cursor() as cursor:
+            for trigger in ("insert", "delete", "update"):
+                cursor.execute(f"DROP TRIGGER {table}_{trigger}")
+            cursor.execute(f"DROP TABLE {table}")
+        get_search_backend().install()
+        assert self.search("nuts") == ["NutBread", "CarrotCake"]
+
+    @override_settings(WAKAWAKA_SEARCH_BACKEND="wakawaka.search.SimpleSearchBackend")
+    def test_simple_backend(self) -> None:
+        assert type(get_search_backend()).__name__ == "SimpleSearchBackend"
+        assert self.search("nuts") == ["CarrotCake", "NutBread"]
+        assert self.search("bread nuts") == ["NutBread"]
+        assert self.search("") == []
@@ -0,0 +1,172 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from wakawaka.models import Revision, RevisionBody, WikiPage
+from wakawaka.storage import (
+    apply_delta,
+    content_digest,
+    delete_unused_bodies,
+    encode_delta,
+)
+from wakawaka.tests.base import BaseTestCase
+
+# Ten revisions of 20 lines, each one changing another line.
+CONTENTS = [
+    "\n".join(f"Line {n} of revision {i}" if n == i else f"Line {n}" for n in range(20))
+    for i in range(10)
+]
+
+
+@override_settings(WAKAWAKA_REVISION_STORAGE="delta", WAKAWAKA_KEYFRAME_INTERVAL=4)
+class DeltaStorageTestCase(BaseTestCase):
+    """
+    Revisions can be stored as deltas against their predecessor, with a full
+    keyframe every couple of revisions.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.page = self.create_wikipage("WikiIndex", *CONTENTS)
+        self.revisions = list(self.page.revisions.order_by("pk"))
+
+    def test_encode_and_apply_delta(self) -> None:
+        delta = encode_delta(CONTENTS[0], CONTENTS[1])
+        assert apply_delta(CONTENTS[0], delta) == CONTENTS[1]
+        assert apply_delta("", encode_delta("", "New\n")) == "New\n"
+        assert apply_delta("Old", encode_delta("Old", "")) == ""
+
+    def test_keyframes_and_deltas(self) -> None:
+        depths = [rev.delta_depth for rev in self.revisions]
+        assert depths == [0, 1, 2, 3, 0, 1, 2, 3, 0, 1]
+        for rev in self.revisions:
+            if rev.delta_depth:
+                assert rev.body is None
+                assert rev.delta
+            else:
+                assert rev.body.content
+
+    def test_content_is_rebuilt_with_one_query(self) -> None:
+        for i, rev in enumerate(self.revisions):
+            fresh = Revision.objects.get(pk=rev.pk)
+            with self.assertNumQueries(1):
+                assert fresh.content == CONTENTS[i]
+
+    def test_delete_revision_keeps_later_content(self) -> None:
+        self.revisions[5].delete()
+        for i, rev in enumerate(self.revisions):
+            if i != 5:
+                assert Revision.objects.get(pk=rev.pk).content == CONTENTS[i]
+
+    def test_delete_page(self) -> None:
+        self.page.delete()
+        assert Revision.objects.count() == 0
+
+    def test_views_keep_working(self) -> None:
+        self.login_superuser()
+        slug = {"slug": "WikiIndex"}
+
+        response = self.client.get(reverse("wakawaka_page", kwargs=slug))
+        self.assertContains(response, "Line 9 of revision 9")
+
+        url = reverse("wakawaka_changes", kwargs=slug)
+        response = self.client.get(
+            f"{url}?a={self.revisions[7].pk}&b={self.revisions[6].pk}"
+        )
+        self.assertContains(response, "+Line 7 of revision 7")
+
+        # Revert to an older revision
+        url = reverse("wakawaka_edit", kwargs={**slug, "rev_id": self.revisions[2].pk})
+        self.client.post(url, {"content": CONTENTS[2]})
+        assert WikiPage.objects.get().current.content == CONTENTS[2]
+
+    def test_convert_command(self) -> None:
+        call_command("wakawaka_compress_revisions", mode="full", stdout=StringIO())
+        assert not Revision.objects.filter(delta__isnull=False).exists()
+
+        call_command(
+            "wakawaka_compress_revisions",
+            mode="delta",
+            keyframe_interval=3,
+            batch_size=1,
+            stdout=StringIO(),
+        )
+        revisions = self.page.revisions.order_by("pk")
+        assert [rev.delta_depth for rev in revisions] == [0, 1, 2, 0, 1, 2, 0, 1, 2, 0]
+        for i, rev in enumerate(revisions):
+            assert Revision.objects.get(pk=rev.pk).content == CONTENTS[i]
+
+    @override_settings(WAKAWAKA_REVISION_STORAGE="full")
+    def test_full_storage(self) -> None:
+        page = self.create_wikipage("CarrotCake", "First", "Second")
+        assert not page.revisions.filter(delta__isnull=False).exists()
+
+
+class RevisionBodyTestCase(BaseTestCase):
+    """
+    Identical revision content is stored once, keyed by its hash.
+    """
+
+    def test_identical_content_is_stored_once(self) -> None:
+        page = self.create_wikipage("WikiIndex", "Ping", "Pong", "Ping", "Pong")
+        self.create_wikipage("CarrotCake", "Ping")
+        assert RevisionBody.objects.count() == 2
+
+        revisions = page.revisions.order_by("pk")
+        assert [rev.content_hash for rev in revisions] == [
+            content_digest(text) for text in ("Ping", "Pong", "Ping", "Pong")
+        ]
+        assert [Revision.objects.get(pk=rev.pk).content for rev in revisions] == [
+            "Ping",
+            "Pong",
+            "Ping",
+            "Pong",
+        ]
+
+    @override_settings(WAKAWAKA_REVISION_STORAGE="delta")
+    def test_identical_content_is_referenced_in_delta_storage(self) -> None:
+        page = self.create_wikipage("WikiIndex", *CONTENTS[:3], CONTENTS[0])
+        revisions = list(page.revisions.order_by("pk"))
+        assert [rev.delta_depth for rev in revisions] == [0, 1, 2, 0]
+        assert revisions[3].body_id == revisions[0].body_id
+        assert RevisionBody.objects.count() == 1
+
+    def test_revert_stores_no_content(self) -> None:
+        page = self.create_wikipage("WikiIndex", "First", "Second")
+        first = page.revisions.order_by("pk").first()
+        self.login_superuser()
+
+        url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex", "rev_id": first.pk})
+        self.client.post(url, {"content": "First"})
+        assert page.revisions.count() == 3
+        assert RevisionBody.objects.count() == 2
+
+    def test_no_changes(self) -> None:
+        self.create_wikipage("WikiIndex", "First")
+        self.login_superuser()
+
+        url = reverse("wakawaka_edit", kwargs={"slug": "WikiIndex"})
+        response = self.client.post(url, {"content": "First"})
+        self.assertContains(response, "You have made no changes!")
+
+    def test_delete_unused_bodies(self) -> None:
+        self.create_wikipage("WikiIndex", "Ping")
+        page = self.create_wikipage("CarrotCake", "Ping", "Pong", "Pang", "Pung")
+        page.delete()
+        assert delete_unused_bodies(batch_size=2) == 3
+        assert list(RevisionBody.objects.values_list("content", flat=True)) == ["Ping"]
+
+    def test_stats_command(self) -> None:
+        page = self.create_wikipage("WikiIndex", "Ping", "Pong", "Ping", "Pong")
+        stdout = StringIO()
+        call_command("wakawaka_storage_stats", stdout=stdout)
+        assert "Revisions: 4 (4 full, 0 deltas)" in stdout.getvalue()
+        assert "Deduplication saves 8 characters (50.0%)" in stdout.getvalue()
+
+        page.delete()
+        stdout = StringIO()
+        call_command("wakawaka_storage_stats", prune=True, stdout=stdout)
+        assert "Deleted 2 unused bodies." in stdout.getvalue()
+        assert not RevisionBody.objects.exists()
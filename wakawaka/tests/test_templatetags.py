@@ -1,3 +1,7 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
 from wakawaka.templatetags.wakawaka_tags import wikify
 from wakawaka.tests.base import BaseTestCase
 
@@ -58,6 +62,48 @@ class TemplateTagTestCase(BaseTestCase):
             'href="/WikiIndex/edit/">WikiIndex</a> out!'
         )
 
+    def test_mixed_wikinames(self) -> None:
+        """
+        Existing and non-existing pages are linked accordingly, if they
+        appear multiple times in the same text.
+        """
+        self.create_wikipage("WikiIndex")
+        f = wikify("WikiIndex links to CarrotCake and back to WikiIndex.")
+        assert f == (
+            '<a href="/WikiIndex/">WikiIndex</a> links to '
+            '<a class="doesnotexist" href="/CarrotCake/edit/">CarrotCake</a> '
+            'and back to <a href="/WikiIndex/">WikiIndex</a>.'
+        )
+
+    def test_no_wikinames_no_queries(self) -> None:
+        with self.assertNumQueries(0):
+            wikify("Nothing to link here.")
+
+    def test_query_count_independent_of_links(self) -> None:
+        """
+        All WikiWords of a text are resolved with a single query, no matter
+        how many links it has.
+        """
+        self.create_wikipage("WikiIndex")
+        few = "See WikiIndex and CarrotCake."
+        many = " ".join(f"WikiIndex CarrotCake{'Xy' * i}" for i in range(400))
+
+        with self.assertNumQueries(1):
+            wikify(few)
+
+        with self.assertNumQueries(1):
+            wikify(many)
+
+        # Rendering a page through the page view costs the same number of
+        # queries, no matter how many links are on the page.
+        self.create_wikipage("SmallPage", few)
+        self.create_wikipage("HubPage", many)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse("wakawaka_page", kwargs={"slug": "SmallPage"}))
+        with CaptureQueriesContext(connection) as hub:
+            self.client.get(reverse("wakawaka_page", kwargs={"slug": "HubPage"}))
+        assert len(small) == len(hub)
+
     def __defunctest_custom_wikiword_regex(self) -> None:
         """
         This test does not work, because the urlpattern is generated
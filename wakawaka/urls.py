@@ -1,45 +1,73 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.urls import path, re_path
-
-from . import views
-
-# Wiki slugs must been CamelCase but slashes are fine, if each slug
-# is also a CamelCase/OtherSide
-WIKI_SLUG = r"((([A-Z]+[a-z]+){2,})(/([A-Z]+[a-z]+){2,})*)"
-WIKI_SLUG = getattr(settings, "WAKAWAKA_SLUG_REGEX", WIKI_SLUG)
-
-urlpatterns = [
-    path("", views.index, name="wakawaka_index"),
-    # Revision and Page list
-    path("history/", views.revision_list, name="wakawaka_revision_list"),
-    path("index/", views.page_list, name="wakawaka_page_list"),
-    # Revision list for page
-    re_path(
-        rf"^(?P<slug>{WIKI_SLUG})/history/$",
-        views.revisions,
-        name="wakawaka_revision_list",
-    ),
-    # Changes between two revisions, revision id's come from GET
-    re_path(
-        rf"^(?P<slug>{WIKI_SLUG})/changes/$", views.changes, name="wakawaka_changes"
-    ),
-    # Edit Form
-    re_path(
-        rf"^(?P<slug>{WIKI_SLUG})/edit/(?P<rev_id>\d+)/$",
-        login_required(views.edit),
-        name="wakawaka_edit",
-    ),
-    re_path(
-        rf"^(?P<slug>{WIKI_SLUG})/edit/$",
-        login_required(views.edit),
-        name="wakawaka_edit",
-    ),
-    # Page
-    re_path(
-        rf"^(?P<slug>{WIKI_SLUG})/rev(?P<rev_id>\d+)/$",
-        views.page,
-        name="wakawaka_page",
-    ),
-    re_path(rf"^(?P<slug>{WIKI_SLUG})/$", views.page, name="wakawaka_page"),
-]
+from django.urls import URLPattern, path, re_path
+
+from wakawaka.wikiwords import WIKI_SLUG
+
+from . import async_views, views
+
+if TYPE_CHECKING:
+    from types import ModuleType
+
+
+def get_urlpatterns(read_views: ModuleType = views) -> list[URLPattern]:
+    """
+    Returns the url patterns of the wiki, with the page, history and page
+    list views taken from `read_views`, e.g. `wakawaka.async_views`.
+    """
+    return [
+        path("", views.index, name="wakawaka_index"),
+        # Revision and Page list
+        path("history/", read_views.revision_list, name="wakawaka_revision_list"),
+        path("index/", read_views.page_list, name="wakawaka_page_list"),
+        path("search/", views.search, name="wakawaka_search"),
+        path("orphans/", views.orphans, name="wakawaka_orphans"),
+        path("wanted/", views.wanted, name="wakawaka_wanted"),
+        path("metrics/", views.metrics_export, name="wakawaka_metrics"),
+        path("export/", views.export, name="wakawaka_export"),
+        # Revision list for page
+        re_path(
+            rf"^(?P<slug>{WIKI_SLUG})/history/$",
+            read_views.revisions,
+            name="wakawaka_revision_list",
+        ),
+        # Pages linking to a page
+        re_path(
+            rf"^(?P<slug>{WIKI_SLUG})/backlinks/$",
+            views.backlinks,
+            name="wakawaka_backlinks",
+        ),
+        # Changes between two revisions, revision id's come from GET
+        re_path(
+            rf"^(?P<slug>{WIKI_SLUG})/changes/$",
+            read_views.changes,
+            name="wakawaka_changes",
+        ),
+        # Edit Form
+        re_path(
+            rf"^(?P<slug>{WIKI_SLUG})/edit/(?P<rev_id>\d+)/$",
+            login_required(views.edit),
+            name="wakawaka_edit",
+        ),
+        re_path(
+            rf"^(?P<slug>{WIKI_SLUG})/edit/$",
+            login_required(views.edit),
+            name="wakawaka_edit",
+        ),
+        # Page
+        re_path(
+            rf"^(?P<slug>{WIKI_SLUG})/rev(?P<rev_id>\d+)/$",
+            read_views.page,
+            name="wakawaka_page",
+        ),
+        re_path(rf"^(?P<slug>{WIKI_SLUG})/$", read_views.page, name="wakawaka_page"),
+    ]
+
+
+urlpatterns = get_urlpatterns(
+    async_views if getattr(settings, "WAKAWAKA_ASYNC_VIEWS", False) else views
+)
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-import difflib
-from typing import TYPE_CHECKING
+import hashlib
+from typing import TYPE_CHECKING, Any
 
 from django.conf import settings
 from django.contrib import messages
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.paginator import Paginator
+from django.db.models import Count, Exists, OuterRef, Q
 from django.http import (
     Http404,
     HttpRequest,
@@ -13,19 +14,65 @@ from django.http import (
     HttpResponseBadRequest,
     HttpResponseForbidden,
     HttpResponseRedirect,
+    StreamingHttpResponse,
 )
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
+from django.utils.cache import patch_cache_control
 from django.utils.translation import gettext
 from django.utils.translation import gettext_lazy as _
 
-from wakawaka.forms import DeleteWikiPageForm, WikiPageForm
-from wakawaka.models import Revision, WikiPage
+from wakawaka import exporting, hierarchy, metrics
+from wakawaka.conditional import (
+    get_not_modified_response,
+    make_etag,
+    revision_metadata,
+    set_validators,
+)
+from wakawaka.diff import unified_diff
+from wakawaka.edge import set_edge_headers
+from wakawaka.forms import DeleteWikiPageForm, EditConflict, WikiPageForm
+from wakawaka.models import Revision, WikiLink, WikiPage
+from wakawaka.pagination import paginate
+from wakawaka.rendering import (
+    get_link_epoch,
+    get_render_cache,
+    render_revision_with_links,
+)
+from wakawaka.search import SearchResults
+from wakawaka.storage import content_digest
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from django.db.models import QuerySet
     from django.forms import BaseForm
 
+    from wakawaka.pagination import KeysetPage
+
+
+WANTED_CACHE_KEY = "wakawaka:wanted:{epoch}:{cursor}"
+
+
+def history_queryset(queryset: QuerySet) -> QuerySet:
+    """
+    Prepares a revision queryset for the history listings, which never
+    display the revision content.
+    """
+    return queryset.select_related("creator").defer("delta")
+
+
+def render_template(
+    request: HttpRequest, template_name: str, context: dict
+) -> HttpResponse:
+    """
+    Renders the given template, timed as the `template` section of the view.
+    """
+    with metrics.timer("template"):
+        return render(request, template_name, context)
+
 
+@metrics.instrument
 def index(request: HttpRequest) -> HttpResponseRedirect:
     """
     Redirects to the default wiki index name.
@@ -35,6 +82,7 @@ def index(request: HttpRequest) -> HttpResponseRedirect:
     return HttpResponseRedirect(redirect_to)
 
 
+@metrics.instrument
 def page(
     request: HttpRequest,
     slug: str,
@@ -46,32 +94,87 @@ def page(
     Displays a wiki page. Redirects to the edit view if the page doesn't exist.
     """
     try:
-        queryset = WikiPage.objects.all()
-        page = queryset.get(slug=slug)
-        rev = page.current
+        with metrics.timer("lookup"):
+            queryset = WikiPage.objects.select_related("current_revision__creator")
+            page = queryset.get(slug=slug)
+            rev = page.current
+
+            # Display an older revision if rev_id is given
+            if rev_id:
+                rev_specific = get_object_or_404(page.revisions.all(), pk=rev_id)
+                if rev.pk != rev_specific.pk:
+                    rev_specific.is_not_current = True
+                rev = rev_specific
 
-        # Display an older revision if rev_id is given
-        if rev_id:
-            revision_queryset = Revision.objects.all()
-            rev_specific = revision_queryset.get(pk=rev_id)
-            if rev.pk != rev_specific.pk:
-                rev_specific.is_not_current = True
-            rev = rev_specific
-
-    # The Page does not exist, redirect to the edit form or
-    # deny, if the user has no permission to add pages
-    except WikiPage.DoesNotExist as e:
-        if request.user.is_authenticated:
-            kwargs = {"slug": slug}
-            redirect_to = reverse("wakawaka_edit", kwargs=kwargs)
-            return HttpResponseRedirect(redirect_to)
-        raise Http404 from e
-    template_context = {"page": page, "rev": rev}
+    # The Page does not exist (or has no revision yet), redirect to the edit
+    # form or deny, if the user has no permission to add pages
+    except (WikiPage.DoesNotExist, Revision.DoesNotExist) as e:
+        return missing_page_response(request, slug, e)
+
+    return page_response(request, page, rev, template_name, extra_context)
+
+
+def missing_page_response(
+    request: HttpRequest, slug: str, error: Exception
+) -> HttpResponseRedirect:
+    """
+    Redirects to the edit form of a page which doesn't exist, or raises a 404
+    for anonymous users.
+    """
+    if request.user.is_authenticated:
+        kwargs = {"slug": slug}
+        redirect_to = reverse("wakawaka_edit", kwargs=kwargs)
+        return HttpResponseRedirect(redirect_to)
+    raise Http404 from error
+
+
+def page_response(
+    request: HttpRequest,
+    page: WikiPage,
+    rev: Revision,
+    template_name: str,
+    extra_context: dict | None,
+) -> HttpResponse:
+    """
+    Renders the given revision of a page, or a 304 response if the client's
+    copy is still valid.
+    """
+    # The rendered revision depends on the existence of the pages it links
+    # to, which is tracked by the link epoch of the render cache.
+    epoch = get_link_epoch()
+    if epoch is not None:
+        current = page.current
+        etag = make_etag(
+            request,
+            page.slug,
+            rev.pk,
+            rev.modified.timestamp(),
+            current.pk,
+            current.creator_id,
+            epoch,
+        )
+        last_modified = max(
+            rev.modified.timestamp(), current.modified.timestamp(), epoch
+        )
+        if response := get_not_modified_response(request, etag, last_modified):
+            return response
+
+    content, linked_slugs = render_revision_with_links(rev)
+    template_context = {"page": page, "rev": rev, "content": content}
     template_context.update(extra_context or {})
-    return render(request, template_name, template_context)
+    response = render_template(request, template_name, template_context)
+    if epoch is not None:
+        set_validators(request, response, etag, last_modified)
 
+    # Older revisions display the current revision and the links of the
+    # page as well, so they are purged along with the page.
+    return set_edge_headers(
+        request, response, page=page, rev=rev, linked_slugs=linked_slugs
+    )
 
-def edit(  # noqa: C901 PLR0912 PLR0913 - Too complex, too many arguments, too many branches
+
+@metrics.instrument
+def edit(  # noqa: C901 PLR0912 PLR0913 PLR0915 - Too complex, too many arguments, branches and statements
     request: HttpRequest,
     slug: str,
     rev_id: int | None = None,
@@ -85,10 +188,10 @@ def edit(  # noqa: C901 PLR0912 PLR0913 - Too complex, too many arguments, too m
     """
     # Get the page for slug and get a specific revision, if given
     try:
-        queryset = WikiPage.objects.all()
+        queryset = WikiPage.objects.select_related("current_revision__body")
         page_obj = queryset.get(slug=slug)
         rev = page_obj.current
-        initial = {"content": page_obj.current.content}
+        initial = {"content": rev.content, "base_revision": rev.pk}
 
         # Do not allow editing wiki pages if the user has no permission
         if not request.user.has_perms(
@@ -100,18 +203,19 @@ def edit(  # noqa: C901 PLR0912 PLR0913 - Too complex, too many arguments, too m
 
         if rev_id:
             # There is a specific revision, fetch this
-            rev_specific = Revision.objects.get(pk=rev_id)
+            rev_specific = get_object_or_404(page_obj.revisions.all(), pk=rev_id)
             if rev.pk != rev_specific.pk:
                 rev = rev_specific
                 rev.is_not_current = True
                 initial = {
                     "content": rev.content,
                     "message": _('Reverted to "%s"') % rev.message,
+                    "base_revision": page_obj.current_revision_id,
                 }
 
-    # This page does not exist, create a dummy page
+    # This page does not exist (or has no revision yet), create a dummy page
     # Note that it's not saved here
-    except WikiPage.DoesNotExist:
+    except (WikiPage.DoesNotExist, Revision.DoesNotExist):
         # Do not allow adding wiki pages if the user has no permission
         if not request.user.has_perms(
             ("wakawaka.add_wikipage", "wakawaka.add_revision"),
@@ -141,36 +245,62 @@ def edit(  # noqa: C901 PLR0912 PLR0913 - Too complex, too many arguments, too m
                 return delete_form.delete_wiki(request, page_obj, rev)
 
     # Page add/edit form
-    form = wiki_page_form(initial=initial)
+    form = wiki_page_form(initial=initial, page=page_obj)
     if request.method == "POST":
-        form = wiki_page_form(data=request.POST)
+        form = wiki_page_form(data=request.POST, page=page_obj)
         if form.is_valid():
             # Check if the content is changed, except there is a rev_id and the
-            # user possibly only reverted the HEAD to it
-            if not rev_id and initial["content"] == form.cleaned_data["content"]:
+            # user possibly only reverted the HEAD to it. Existing revisions
+            # are compared by their content hash.
+            content = form.cleaned_data["content"]
+            if rev is None:
+                unchanged = initial["content"] == content
+            else:
+                unchanged = rev.content_hash == content_digest(content)
+            if not rev_id and unchanged:
                 form.errors["content"] = (_("You have made no changes!"),)
 
             # Save the form and redirect to the page view
             else:
+                # Get the page, or create it if it's a new one. The unique slug
+                # makes this safe against concurrent first edits.
+                page_obj, _created = WikiPage.objects.get_or_create(slug=slug)
                 try:
-                    # Check that the page already exist
-                    queryset = WikiPage.objects.all()
-                    page_obj = queryset.get(slug=slug)
-                except WikiPage.DoesNotExist:
-                    # Must be a new one, create that page
-                    page_obj = WikiPage(slug=slug)
-                    page_obj.save()
-
-                form.save(request, page_obj)
-
-                kwargs = {"slug": page_obj.slug}
-
-                redirect_to = reverse("wakawaka_page", kwargs=kwargs)
-                messages.success(
-                    request,
-                    gettext("Your changes to %s were saved") % page_obj.slug,
-                )
-                return HttpResponseRedirect(redirect_to)
+                    form.save(request, page_obj)
+
+                # The page was changed meanwhile, display the conflicting
+                # changes for the user to resolve.
+                except EditConflict as conflict:
+                    form = wiki_page_form(
+                        data={
+                            "content": conflict.content,
+                            "message": form.cleaned_data["message"],
+                            "base_revision": conflict.head.pk,
+                        },
+                        page=page_obj,
+                    )
+                    form.is_valid()
+                    form.errors["content"] = (
+                        _(
+                            "This page was changed while you were editing it. "
+                            "Please resolve the conflicting changes."
+                        ),
+                    )
+                    rev = conflict.head
+
+                else:
+                    kwargs = {"slug": page_obj.slug}
+
+                    redirect_to = reverse("wakawaka_page", kwargs=kwargs)
+                    if getattr(form, "merged", False):
+                        message = gettext(
+                            "Your changes to %s were saved and merged with the "
+                            "changes saved while you were editing"
+                        )
+                    else:
+                        message = gettext("Your changes to %s were saved")
+                    messages.success(request, message % page_obj.slug)
+                    return HttpResponseRedirect(redirect_to)
 
     template_context = {
         "form": form,
@@ -178,27 +308,62 @@ def edit(  # noqa: C901 PLR0912 PLR0913 - Too complex, too many arguments, too m
         "page": page_obj,
         "rev": rev,
     }
+    if page_obj.pk:
+        pagination = paginate(request, history_queryset(page_obj.revisions.all()))
+        template_context.update(
+            {"revision_list": pagination.object_list, "pagination": pagination}
+        )
     template_context.update(extra_context or {})
-    return render(request, template_name, template_context)
+    return render_template(request, template_name, template_context)
 
 
+@metrics.instrument
 def revisions(
     request: HttpRequest,
     slug: str,
     template_name: str = "wakawaka/revisions.html",
     extra_context: dict | None = None,
+    paginate_by: int | None = None,
 ) -> HttpResponse:
     """
     Displays the list of all revisions for a specific WikiPage
     """
     queryset = WikiPage.objects.all()
     page = get_object_or_404(queryset, slug=slug)
+    pagination = paginate(request, history_queryset(page.revisions.all()), paginate_by)
+    return revisions_response(request, page, pagination, template_name, extra_context)
+
+
+def revisions_response(
+    request: HttpRequest,
+    page: WikiPage,
+    pagination: KeysetPage,
+    template_name: str,
+    extra_context: dict | None,
+) -> HttpResponse:
+    """
+    Renders a page of the history of a page, or a 304 response if the
+    client's copy is still valid.
+    """
+    metadata = revision_metadata(pagination)
+    etag = make_etag(
+        request, page.slug, metadata, pagination.has_newer, pagination.has_older
+    )
+    last_modified = max((m[1] for m in metadata), default=page.modified.timestamp())
+    if response := get_not_modified_response(request, etag, last_modified):
+        return response
 
-    template_context = {"page": page}
+    template_context = {
+        "page": page,
+        "revision_list": pagination.object_list,
+        "pagination": pagination,
+    }
     template_context.update(extra_context or {})
-    return render(request, template_name, template_context)
+    response = render_template(request, template_name, template_context)
+    return set_validators(request, response, etag, last_modified)
 
 
+@metrics.instrument
 def changes(
     request: HttpRequest,
     slug: str,
@@ -216,64 +381,367 @@ def changes(
         return HttpResponseBadRequest("Bad Request")
 
     try:
-        revision_queryset = Revision.objects.all()
-        wikipage_queryset = WikiPage.objects.all()
-        rev_a = revision_queryset.get(pk=rev_a_id)
-        rev_b = revision_queryset.get(pk=rev_b_id)
-        page = wikipage_queryset.get(slug=slug)
-    except ObjectDoesNotExist as e:
-        raise Http404 from e
-
-    if rev_a.content != rev_b.content:
-        d = difflib.unified_diff(
-            rev_b.content.splitlines(),
-            rev_a.content.splitlines(),
-            "Original",
-            "Current",
-            lineterm="",
-        )
-        difftext = "\n".join(d)
-    else:
-        difftext = _("No changes were made between this two files.")
+        rev_a_id, rev_b_id = int(rev_a_id), int(rev_b_id)
+    except ValueError:
+        return HttpResponseBadRequest("Bad Request")
+
+    # Fetch both revisions with their page at once, and only if they belong
+    # to the page in the URL.
+    queryset = Revision.objects.select_related("page").filter(
+        page__slug=slug, pk__in=(rev_a_id, rev_b_id)
+    )
+    revisions = {rev.pk: rev for rev in queryset}
+    if rev_a_id not in revisions or rev_b_id not in revisions:
+        raise Http404
+    rev_a, rev_b = revisions[rev_a_id], revisions[rev_b_id]
+    pagination = paginate(request, history_queryset(rev_a.page.revisions.all()))
+    return changes_response(
+        request,
+        rev_a,
+        rev_b,
+        pagination,
+        template_name=template_name,
+        extra_context=extra_context,
+    )
+
+
+def changes_response(  # noqa: PLR0913 - Too many arguments
+    request: HttpRequest,
+    rev_a: Revision,
+    rev_b: Revision,
+    pagination: KeysetPage,
+    *,
+    template_name: str,
+    extra_context: dict | None,
+) -> HttpResponse:
+    """
+    Renders the diff between two revisions of a page with its history, or a
+    304 response if the client's copy is still valid.
+    """
+    page = rev_a.page
+
+    # The diff of two revisions never changes, only the history below it.
+    metadata = revision_metadata((rev_a, rev_b, *pagination))
+    etag = make_etag(
+        request,
+        page.slug,
+        rev_a.content_hash,
+        rev_b.content_hash,
+        metadata,
+        pagination.has_newer,
+        pagination.has_older,
+    )
+    last_modified = max(m[1] for m in metadata)
+    if response := get_not_modified_response(request, etag, last_modified):
+        return response
 
     template_context = {
         "page": page,
-        "diff": difftext,
+        "diff": unified_diff(rev_b, rev_a),
         "rev_a": rev_a,
         "rev_b": rev_b,
+        "revision_list": pagination.object_list,
+        "pagination": pagination,
     }
     template_context.update(extra_context or {})
-    return render(request, template_name, template_context)
+    response = render_template(request, template_name, template_context)
+
+    # The diff itself never changes, but the revision history below it does.
+    max_age = getattr(settings, "WAKAWAKA_CHANGES_MAX_AGE", 60)
+    patch_cache_control(response, private=True, max_age=max_age)
+    return set_validators(request, response, etag, last_modified)
 
 
 # Some useful views
+@metrics.instrument
 def revision_list(
     request: HttpRequest,
     template_name: str = "wakawaka/revision_list.html",
     extra_context: dict | None = None,
+    paginate_by: int | None = None,
 ) -> HttpResponse:
     """
     Displays a list of all recent revisions.
     """
-    revisions = Revision.objects.all()
-    template_context = {"revision_list": revisions}
+    queryset = history_queryset(Revision.objects.select_related("page"))
+    pagination = paginate(request, queryset, paginate_by)
+    template_context = {
+        "revision_list": pagination.object_list,
+        "pagination": pagination,
+    }
     template_context.update(extra_context or {})
-    return render(request, template_name, template_context)
+    return render_template(request, template_name, template_context)
 
 
+@metrics.instrument
 def page_list(
     request: HttpRequest,
     template_name: str = "wakawaka/page_list.html",
     extra_context: dict | None = None,
 ) -> HttpResponse:
     """
-    Displays all Pages
+    Displays all Pages, one level of the page hierarchy at a time. The
+    subtree of a page is displayed by its own request.
+    """
+    path, letter, after = index_params(request)
+    per_page = hierarchy.get_per_page()
+    nodes = list(hierarchy.children(path, letter, after)[: per_page + 1])
+    buckets = []
+    if letter or len(nodes) > per_page:
+        buckets = list(hierarchy.buckets(path))
+    return page_list_response(request, nodes, buckets, template_name, extra_context)
+
+
+def index_params(request: HttpRequest) -> tuple[str, str, str]:
+    """
+    Returns the path of the displayed level of the page index, the letter of
+    the displayed bucket, and the name after which the listing continues.
+    """
+    return (
+        request.GET.get("path", "").strip(hierarchy.SEPARATOR),
+        request.GET.get("letter", "")[:1].upper(),
+        request.GET.get("after", ""),
+    )
+
+
+def page_list_response(
+    request: HttpRequest,
+    nodes: list,
+    buckets: list,
+    template_name: str,
+    extra_context: dict | None,
+) -> HttpResponse:
+    """
+    Renders a level of the page index from up to one node more than fits a
+    page.
+    """
+    path, letter, _after = index_params(request)
+    nodes, next_query_string = listing_page(
+        request, nodes, lambda node: {"after": node.name}
+    )
+
+    breadcrumbs = [*hierarchy.ancestors(path), path] if path else []
+    template_context = {
+        "node_list": nodes,
+        "path": path,
+        "breadcrumbs": [
+            (crumb, crumb.rpartition(hierarchy.SEPARATOR)[2]) for crumb in breadcrumbs
+        ],
+        "letter": letter,
+        "buckets": buckets,
+        "next_query_string": next_query_string,
+        "index_slug": getattr(settings, "WAKAWAKA_DEFAULT_INDEX", "WikiIndex"),
+    }
+    template_context.update(extra_context or {})
+    return render_template(request, template_name, template_context)
+
+
+def listing_page(
+    request: HttpRequest, items: list, cursor: Callable[[Any], dict[str, str]]
+) -> tuple[list, str | None]:
+    """
+    Returns the items of a page of a listing, which were fetched with one
+    item more than fits the page, and the query string of the next page, if
+    any. `cursor` returns the query parameters by which the next page
+    continues after the given item.
+    """
+    per_page = hierarchy.get_per_page()
+    if len(items) <= per_page:
+        return items, None
+    items = items[:per_page]
+    query = request.GET.copy()
+    for param, value in cursor(items[-1]).items():
+        query[param] = value
+    return items, query.urlencode()
+
+
+@metrics.instrument
+def backlinks(
+    request: HttpRequest,
+    slug: str,
+    template_name: str = "wakawaka/backlinks.html",
+    extra_context: dict | None = None,
+) -> HttpResponse:
+    """
+    Displays all pages linking to a page, which may not exist yet.
     """
-    pages = WikiPage.objects.order_by("slug")
+    pages = WikiPage.objects.filter(outgoing_links__target_slug=slug)
+    if after := request.GET.get("after"):
+        pages = pages.filter(slug__gt=after)
+    pages, next_query_string = listing_page(
+        request,
+        list(pages.order_by("slug")[: hierarchy.get_per_page() + 1]),
+        lambda page: {"after": page.slug},
+    )
 
     template_context = {
+        "slug": slug,
         "page_list": pages,
-        "index_slug": getattr(settings, "WAKAWAKA_DEFAULT_INDEX", "WikiIndex"),
+        "next_query_string": next_query_string,
     }
     template_context.update(extra_context or {})
-    return render(request, template_name, template_context)
+    return render_template(request, template_name, template_context)
+
+
+@metrics.instrument
+def orphans(
+    request: HttpRequest,
+    template_name: str = "wakawaka/orphans.html",
+    extra_context: dict | None = None,
+) -> HttpResponse:
+    """
+    Displays all pages no other page links to, except the wiki index.
+    """
+    index_slug = getattr(settings, "WAKAWAKA_DEFAULT_INDEX", "WikiIndex")
+    linked = WikiLink.objects.filter(target_slug=OuterRef("slug"))
+    pages = WikiPage.objects.filter(~Exists(linked)).exclude(slug=index_slug)
+    if after := request.GET.get("after"):
+        pages = pages.filter(slug__gt=after)
+    pages, next_query_string = listing_page(
+        request,
+        list(pages.order_by("slug")[: hierarchy.get_per_page() + 1]),
+        lambda page: {"after": page.slug},
+    )
+
+    template_context = {"page_list": pages, "next_query_string": next_query_string}
+    template_context.update(extra_context or {})
+    return render_template(request, template_name, template_context)
+
+
+def wanted_links(cursor: tuple[str, int] | None) -> list[dict]:
+    """
+    Returns a page of the slugs which are linked to but don't exist, with
+    their number of links, after the given slug and link count, if any.
+
+    The links of all pages are counted for each page of the listing, so the
+    pages are cached in the render cache. Creating or deleting a page changes
+    the link epoch, and with it the cache keys. Edits changing the links to
+    missing pages are reflected after `WAKAWAKA_WANTED_CACHE_TIMEOUT`
+    seconds.
+    """
+    cache = get_render_cache()
+    key = None
+    if cache is not None:
+        digest = hashlib.sha256(repr(cursor).encode()).hexdigest()
+        key = WANTED_CACHE_KEY.format(epoch=get_link_epoch(), cursor=digest)
+        links = cache.get(key)
+        metrics.count_cache_request("wanted", hit=links is not None)
+        if links is not None:
+            return links
+
+    existing = WikiPage.objects.filter(slug=OuterRef("target_slug"))
+    links = (
+        WikiLink.objects.filter(~Exists(existing))
+        .values("target_slug")
+        .annotate(count=Count("source"))
+    )
+    if cursor is not None:
+        after, count = cursor
+        links = links.filter(Q(count__lt=count) | Q(count=count, target_slug__gt=after))
+    links = list(
+        links.order_by("-count", "target_slug")[: hierarchy.get_per_page() + 1]
+    )
+
+    if cache is not None:
+        timeout = getattr(settings, "WAKAWAKA_WANTED_CACHE_TIMEOUT", 300)
+        cache.set(key, links, timeout=timeout)
+    return links
+
+
+@metrics.instrument
+def wanted(
+    request: HttpRequest,
+    template_name: str = "wakawaka/wanted.html",
+    extra_context: dict | None = None,
+) -> HttpResponse:
+    """
+    Displays all pages which are linked to but don't exist, the most
+    wanted first.
+    """
+    # The next page continues after the slug and link count of the last one.
+    after, count = request.GET.get("after", ""), request.GET.get("links", "")
+    cursor = (after, int(count)) if after and count.isdigit() else None
+    links, next_query_string = listing_page(
+        request,
+        wanted_links(cursor),
+        lambda link: {"after": link["target_slug"], "links": str(link["count"])},
+    )
+
+    template_context = {"wanted_list": links, "next_query_string": next_query_string}
+    template_context.update(extra_context or {})
+    return render_template(request, template_name, template_context)
+
+
+@metrics.instrument
+def search(
+    request: HttpRequest,
+    template_name: str = "wakawaka/search.html",
+    extra_context: dict | None = None,
+    paginate_by: int | None = None,
+) -> HttpResponse:
+    """
+    Displays the pages matching the search query, best match first.
+    """
+    query = request.GET.get("q", "").strip()
+    per_page = paginate_by or getattr(settings, "WAKAWAKA_SEARCH_RESULTS_PER_PAGE", 20)
+
+    page_obj = None
+    if query:
+        paginator = Paginator(SearchResults(query), per_page)
+        page_obj = paginator.get_page(request.GET.get("page"))
+
+    template_context = {
+        "query": query,
+        "result_list": page_obj.object_list if page_obj else [],
+        "page_obj": page_obj,
+    }
+    template_context.update(extra_context or {})
+    return render_template(request, template_name, template_context)
+
+
+@metrics.instrument
+def export(request: HttpRequest) -> HttpResponse:
+    """
+    Streams the export of every page to staff users, with the current
+    revision or, with `history=1`, all revisions. The `format` is `jsonl`
+    (the default), `tar` or `zip`.
+    """
+    if not request.user.is_staff:
+        return HttpResponseForbidden(
+            gettext("You don't have permission to export the wiki.")
+        )
+
+    export_format = request.GET.get("format", exporting.JSONL)
+    if export_format not in exporting.FORMATS:
+        return HttpResponseBadRequest(gettext("Unknown export format."))
+    history = request.GET.get("history") == "1"
+
+    filename = f"wiki{'-history' if history else ''}.{export_format}"
+    return StreamingHttpResponse(
+        exporting.export(export_format, history=history),
+        content_type=exporting.CONTENT_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def metrics_export(request: HttpRequest) -> HttpResponse:
+    """
+    Exposes the metrics of this process in the Prometheus text format, to
+    staff users and the addresses in `WAKAWAKA_METRICS_ALLOWED_IPS`. Doesn't
+    exist while metrics are disabled.
+    """
+    if not metrics.is_enabled():
+        raise Http404
+
+    # REMOTE_ADDR is the address of the proxy, if any, so no address is
+    # allowed by default.
+    allowed_ips = getattr(settings, "WAKAWAKA_METRICS_ALLOWED_IPS", ())
+    if not request.user.is_staff and request.META.get("REMOTE_ADDR") not in allowed_ips:
+        return HttpResponseForbidden(
+            gettext("You don't have permission to view the metrics.")
+        )
+
+    return HttpResponse(
+        metrics.registry.to_prometheus(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
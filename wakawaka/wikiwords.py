@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.http import RFC3986_SUBDELIMS
+from django.utils.safestring import SafeString, mark_safe
+
+from wakawaka import metrics
+from wakawaka.models import WikiPage
+
+# Wiki slugs must been CamelCase but slashes are fine, if each slug
+# is also a CamelCase/OtherSide
+DEFAULT_WIKI_SLUG = r"((([A-Z]+[a-z]+){2,})(/([A-Z]+[a-z]+){2,})*)"
+WIKI_SLUG = getattr(settings, "WAKAWAKA_SLUG_REGEX", DEFAULT_WIKI_SLUG)
+
+WIKI_WORDS_REGEX = re.compile(rf"\b{WIKI_SLUG}\b", re.UNICODE)
+
+# Memoized (prefix, suffix) pairs around the slug, per url name, script
+# prefix and urlconf, so links don't need a full reverse() per WikiWord.
+_url_templates: dict[tuple, tuple[str, str]] = {}
+
+
+def wikiword_url(viewname: str, slug: str) -> str:
+    """
+    Returns the url for the given wiki url name and slug.
+    """
+    # Quote the slug the same way reverse() does.
+    quoted_slug = quote(slug, safe=RFC3986_SUBDELIMS + "/~:@")
+
+    key = (viewname, get_script_prefix(), get_urlconf())
+    if key not in _url_templates:
+        url = reverse(viewname, kwargs={"slug": slug})
+        # The slug is always the last variable part of the url, followed
+        # by a static suffix like `/` or `/edit/`.
+        prefix, _, suffix = url.rpartition(quoted_slug)
+        _url_templates[key] = (prefix, suffix)
+
+    prefix, suffix = _url_templates[key]
+    return f"{prefix}{quoted_slug}{suffix}"
+
+
+def find_wikiwords(value: str) -> set[str]:
+    """
+    Returns the set of WikiWords found in the given text.
+    """
+    return {m.group(1) for m in WIKI_WORDS_REGEX.finditer(value)}
+
+
+def resolve_wikiwords(slugs: set[str]) -> dict[str, str]:
+    """
+    Returns a mapping of each slug to its link markup. All slugs are checked
+    against the database with a single query, regardless of their number.
+    """
+    if not slugs:
+        return {}
+
+    with metrics.timer("wikiwords"):
+        existing = set(
+            WikiPage.objects.filter(slug__in=slugs).values_list("slug", flat=True)
+        )
+
+    links = {}
+    for slug in slugs:
+        if slug in existing:
+            url = wikiword_url("wakawaka_page", slug)
+            links[slug] = rf'<a href="{url}">{slug}</a>'
+        else:
+            url = wikiword_url("wakawaka_edit", slug)
+            links[slug] = rf'<a class="doesnotexist" href="{url}">{slug}</a>'
+    return links
+
+
+def replace_wikiwords(value: str) -> SafeString:
+    # First pass: collect all WikiWords and resolve them in one go.
+    links = resolve_wikiwords(find_wikiwords(value))
+
+    # Second pass: substitute each WikiWord with its link.
+    def replace_wikiword(m: re.Match) -> str:
+        return links[m.group(1)]
+
+    return mark_safe(WIKI_WORDS_REGEX.sub(replace_wikiword, value))  # noqa: S308